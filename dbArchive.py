@@ -0,0 +1,195 @@
+"""
+dbArchive.py - Archiving Completed Flights
+    Moves flights that landed or were cancelled more than a horizon ago (90 days by default) out of flight and
+    crewAssignment into the same tables in the archive database beside the main one (flightManagementArchive.db).
+    The operational tables stay small, so the day-to-day queries, indexes and triggers only deal with current flights,
+    while the historical reports read the allFlights / allCrewAssignments views over both (see dbConnection.py).
+    The summary tables (pilotMonthlyWorkload, pilotPunctuality, terminalUsage) keep counting the archived flights.
+    Run with:
+        python dbArchive.py                               archive flights completed over 90 days ago
+        python dbArchive.py --horizon-days 30 --batch-size 200 --pause 0.1
+        python dbArchive.py --database other.db --no-vacuum
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from dbConnection import ConnectionPool, databaseFile, archiveSchema, getArchivePath
+from dbOperations import flightAttributeList, printTableOfResults
+from dbSetup import createArchiveDatabase, archiveInProgressSetting
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+defaultHorizonDays = 90
+defaultBatchSize = 500
+
+#Only flights that can't change any more are archived
+archivedStatuses = ("Landed", "Cancelled")
+archivedStatusList = ", ".join(f"'{status}'" for status in archivedStatuses)
+
+flightKey = "flightID = ? AND scheduledDepartureDateTime = ?"
+
+archiveBatchQuery = f'''SELECT flightID, scheduledDepartureDateTime FROM main.flight
+                        WHERE flightStatus IN ({archivedStatusList}) AND scheduledDepartureEpoch < ?
+                        ORDER BY scheduledDepartureEpoch LIMIT ?'''
+
+#The generated columns are worked out again in the archive, so only the stored attributes are copied.
+#A copy left by an interrupted run is replaced, so the archive always gets the flight as it is now.
+copyFlightQuery = f'''INSERT OR REPLACE INTO {archiveSchema}.flight ({", ".join(flightAttributeList)})
+                      SELECT {", ".join(flightAttributeList)} FROM main.flight WHERE {flightKey}'''
+clearCrewCopyQuery = f"DELETE FROM {archiveSchema}.crewAssignment WHERE {flightKey}"
+copyCrewQuery = f'''INSERT INTO {archiveSchema}.crewAssignment
+                    SELECT * FROM main.crewAssignment WHERE {flightKey}'''
+
+#A flight is only deleted if its copy in the archive is identical, i.e. no staff session has changed it since the copy
+deleteArchivedFlightQuery = f'''DELETE FROM main.flight WHERE {flightKey}
+                                AND EXISTS (SELECT 1 FROM {archiveSchema}.flight a WHERE
+                                            {" AND ".join(f"a.{a} IS main.flight.{a}" for a in flightAttributeList)})'''
+
+#A flight changed by a staff session between the copy and the delete stays in flight, so its copy is taken back out
+removeStaleCopyQueries = [
+    f'''DELETE FROM {archiveSchema}.{table} WHERE {flightKey}
+        AND EXISTS (SELECT 1 FROM main.flight f WHERE f.flightID = {archiveSchema}.{table}.flightID
+                    AND f.scheduledDepartureDateTime = {archiveSchema}.{table}.scheduledDepartureDateTime)'''
+    for table in ("crewAssignment", "flight")]
+
+"""
+____________________________________________
+=============• ARCHIVING •=============
+--------------------------------------------
+"""
+
+#Counters for one archiving run
+class ArchiveStats:
+    def __init__(self, cutoff):
+        self.cutoff = cutoff
+        self.flightsArchived = 0
+        self.crewArchived = 0
+        self.batches = 0
+        self.startedAt = time.perf_counter()
+        self.elapsedSeconds = 0.0
+
+    def finish(self):
+        self.elapsedSeconds = time.perf_counter() - self.startedAt
+
+"""
+Copies one batch of flights (and their crew) into the archive, then deletes them from the main tables.
+Each step is its own short BEGIN IMMEDIATE transaction, so staff sessions are only held up for one batch at a time.
+In WAL mode a transaction isn't atomic across two database files, so the copy is committed before anything is
+deleted: if the run is interrupted in between, the flights are in both databases (and counted twice by allFlights)
+until the next run deletes them.
+The archiveInProgress setting stops the summary delete triggers from uncounting the flights being moved.
+Returns (flights selected, flights archived, crew rows copied); no flights are selected once nothing is left
+before the cutoff.
+"""
+def archiveBatch(conn, cutoffEpoch, batchSize):
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        keys = cursor.execute(archiveBatchQuery, (cutoffEpoch, batchSize)).fetchall()
+        if not keys:
+            conn.commit()
+            return 0, 0, 0
+        cursor.executemany(clearCrewCopyQuery, keys)
+        cursor.executemany(copyCrewQuery, keys)
+        crewCopied = cursor.rowcount
+        cursor.executemany(copyFlightQuery, keys)
+        conn.commit()
+
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("INSERT OR REPLACE INTO dbSettings (settingName, settingValue) VALUES (?, '1')",
+                       (archiveInProgressSetting,))
+        cursor.executemany(deleteArchivedFlightQuery, keys)
+        flightsDeleted = cursor.rowcount
+        cursor.execute("DELETE FROM dbSettings WHERE settingName = ?", (archiveInProgressSetting,))
+        if flightsDeleted < len(keys):
+            cursor.executemany(removeStaleCopyQueries[0], keys)
+            crewCopied -= cursor.rowcount
+            cursor.executemany(removeStaleCopyQueries[1], keys)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return len(keys), flightsDeleted, crewCopied
+
+"""
+Archives every Landed or Cancelled flight that departed more than horizonDays before now, batchSize flights at a
+time, sleeping pauseSeconds between batches to leave room for other writers. The archive database is created
+first if it doesn't exist. vacuum=True compacts the archive afterwards; the pages freed in the main database are
+reused by new flights.
+The run uses its own connection with foreign keys off: the archive has no pilot or destination tables to check
+against, and every flight it receives already passed those checks in the main database.
+Called with: stats = archiveCompletedFlights('flightManagement.db', horizonDays=90)
+"""
+def archiveCompletedFlights(databasePath=databaseFile, horizonDays=defaultHorizonDays, batchSize=defaultBatchSize,
+                            pauseSeconds=0.0, vacuum=True, now=None):
+    if horizonDays < 0:
+        raise ValueError("horizonDays can't be negative")
+    if batchSize < 1:
+        raise ValueError("batchSize must be at least 1")
+    if pauseSeconds < 0:
+        raise ValueError("pauseSeconds can't be negative")
+
+    cutoff = (now or datetime.now(timezone.utc).replace(tzinfo=None)) - timedelta(days=horizonDays)
+    cutoffEpoch = int(cutoff.replace(tzinfo=timezone.utc).timestamp())
+    stats = ArchiveStats(cutoff.strftime("%Y-%m-%d %H:%M:%S"))
+
+    createArchiveDatabase(databasePath)
+    archivePool = ConnectionPool(databasePath=databasePath, maxConnections=1, pragmas={"foreign_keys": "OFF"})
+    try:
+        with archivePool.connection() as conn:
+            while True:
+                selected, flights, crew = archiveBatch(conn, cutoffEpoch, batchSize)
+                if not selected:
+                    break
+                stats.flightsArchived += flights
+                stats.crewArchived += crew
+                stats.batches += 1
+                if pauseSeconds:
+                    time.sleep(pauseSeconds)
+            if vacuum and stats.batches:
+                conn.execute(f"VACUUM {archiveSchema}")
+    finally:
+        archivePool.close()
+        stats.finish()
+    return stats
+
+"""
+Prints what an archiving run moved.
+"""
+def printArchiveSummary(stats, databasePath):
+    print(f"\nArchived flights completed before {stats.cutoff} into {getArchivePath(databasePath)}.")
+    printTableOfResults([(stats.flightsArchived, stats.crewArchived, stats.batches, f"{stats.elapsedSeconds:.2f}")],
+                        ["Flights", "Crew Assignments", "Batches", "Seconds"])
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Move completed flights older than a horizon into the archive database.")
+    parser.add_argument("--horizon-days", type=int, default=defaultHorizonDays,
+                        help="archive flights that departed more than this many days ago")
+    parser.add_argument("--batch-size", type=int, default=defaultBatchSize, help="flights moved per transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to wait between batches")
+    parser.add_argument("--no-vacuum", action="store_true", help="don't compact the archive afterwards")
+    parser.add_argument("--database", default=databaseFile, help="database file to archive from")
+    options = parser.parse_args(args)
+
+    try:
+        stats = archiveCompletedFlights(options.database, horizonDays=options.horizon_days,
+                                        batchSize=options.batch_size, pauseSeconds=options.pause,
+                                        vacuum=not options.no_vacuum)
+    except ValueError as e:
+        print(f"Archiving not started: {e}")
+        return 2
+    except sqlite3.Error as e:
+        print(f"Archiving stopped: {e}")
+        return 3
+
+    printArchiveSummary(stats, options.database)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,186 @@
+"""
+dbAsync.py - asyncio Interface
+    The functions in dbOperations.py block until SQLite answers, which would stall an event loop (a web dashboard,
+    a feed consumer) for the whole query. AsyncFlightOperations offers the same flight, pilot and report operations
+    as coroutines:
+        > Each call runs on a thread of its own executor, with a connection from its own pool, so the loop keeps
+          serving other tasks while SQLite works and the menus' shared pool isn't used up.
+        > Reads run side by side, up to maxReaders at once. Writes are queued and run one at a time, so they never
+          compete for SQLite's single write lock.
+        > Every call can be cancelled or given a timeout. A query still running is interrupted and any transaction
+          it had open is rolled back, so a write that is interrupted before it commits leaves nothing behind.
+    Called with:
+        async with AsyncFlightOperations(maxReaders=8) as db:
+            pilots = await db.viewAllPilots()
+            flights = await db.viewFlightsByCriteria("flightStatus", ("Scheduled",), flightAttributeList, timeout=2)
+            await db.assignPilotToFlight("BA663", "2026-02-06 14:45:00", 3, "captainID")
+"""
+import asyncio
+import functools
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import dbOperations
+from dbConnection import ConnectionPool, getPool
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+defaultMaxReaders = 4
+
+#Seconds a call may take before it is cancelled; None waits as long as it takes
+defaultTimeout = None
+
+#The dbOperations functions available as coroutines. streamFlights isn't: its rows are read after it returns,
+#which would be back on the event loop. viewFlightPage pages through flights instead.
+readOperations = [
+    "viewAllFlights", "viewFlightPage", "viewFlightsByCriteria", "viewSelectedFlightAttibutes",
+    "viewUnassignedFlights", "getPilotName", "viewAllPilots", "viewPilotSchedules", "viewAvailablePilots",
+    "viewAvailablePilotsForUnassignedFlights", "reportPilotFlightCount", "reportPilotWorkloadByMonth",
+    "reportBusiestTerminal", "reportBusiestTerminalByPeriod", "reportTerminalUsageSplit", "reportByTimeframe",
+    "reportPilotPunctuality", "reportFlightPunctuality",
+]
+#autoRosterFlights counts as a write because it can apply the roster it plans
+writeOperations = [
+    "addFlight", "updateFlightRecord", "updateFlightDetails", "deleteFlightRecord", "addPilot", "updatePilotDetails",
+    "updatePilotAttributes", "deletePilotRecord", "assignPilotToFlight", "autoRosterFlights",
+]
+
+#Every operation offered here is timed like its sync version; one missing from dbOperations.publicOperations
+#(e.g. after it was moved onto a cache and no longer looks like a database call) is caught on import
+uninstrumentedOperations = sorted(set(readOperations + writeOperations) - set(dbOperations.instrumentedOperations))
+if uninstrumentedOperations:
+    raise RuntimeError(f"Operation(s) missing from dbOperations.publicOperations: {', '.join(uninstrumentedOperations)}")
+
+"""
+_____________________________________________
+=============• ASYNC OPERATIONS •=============
+---------------------------------------------
+"""
+"""
+OperationCall
+    One call on its way through the executor. cancel() stops it: before it starts it never runs, and while a
+    statement is running that statement is interrupted (sqlite3.Connection.interrupt is safe from any thread).
+"""
+class OperationCall:
+    def __init__(self):
+        self.conn = None
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def start(self, conn):
+        with self.lock:
+            if self.cancelled:
+                return False
+            self.conn = conn
+            return True
+
+    def finish(self):
+        with self.lock:
+            self.conn = None
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            if self.conn is not None:
+                self.conn.interrupt()
+
+"""
+AsyncFlightOperations
+    Every name in readOperations and writeOperations is a coroutine method taking the same arguments as the
+    dbOperations function, plus an optional timeout in seconds, e.g. await db.reportBusiestTerminal(timeout=5).
+    The connections are opened against the database the shared pool points at when this is created. There is no
+    choosing another file: the caches dbOperations reads through (dbReferenceCache.py, dbReportCache.py) follow the
+    shared pool, so they would answer from the wrong database. Calls fail if the shared pool is later moved.
+    Errors are raised as they are by dbOperations (sqlite3.Error, ValueError, AssignmentConflict);
+    a call that runs out of time raises TimeoutError.
+"""
+class AsyncFlightOperations:
+    def __init__(self, maxReaders=defaultMaxReaders, timeout=defaultTimeout):
+        if maxReaders < 1:
+            raise ValueError("maxReaders must be at least 1")
+        self.maxReaders = maxReaders
+        self.timeout = timeout
+        #One connection and thread per reader, and one for the writer
+        self.pool = ConnectionPool(databasePath=getPool().databasePath,
+                                   maxConnections=maxReaders + 1, profileName=getPool().profileName)
+        self.executor = ThreadPoolExecutor(max_workers=maxReaders + 1, thread_name_prefix="asyncOperations")
+        self.readerSlots = None
+        self.writeLock = None
+        self.stats = {"reads": 0, "writes": 0, "cancelled": 0, "timedOut": 0}
+
+    #The semaphore and lock belong to the running event loop, so they are made on first use inside it
+    def getGates(self):
+        if self.writeLock is None:
+            self.readerSlots = asyncio.Semaphore(self.maxReaders)
+            self.writeLock = asyncio.Lock()
+        return self.readerSlots, self.writeLock
+
+    """
+    Runs in an executor thread: hands one of this object's connections to the operation (ConnectionPool.useConnection)
+    so dbOperations runs on it unchanged. Nothing runs if the call was cancelled while it waited for a thread.
+    """
+    def runOperation(self, call, operation, args, kwargs):
+        if getPool().databasePath != self.pool.databasePath:
+            raise sqlite3.ProgrammingError(f"The shared pool has moved to {getPool().databasePath}; "
+                                           f"these connections are to {self.pool.databasePath}.")
+        with self.pool.connection() as conn, getPool().useConnection(conn):
+            if not call.start(conn):
+                raise asyncio.CancelledError()
+            try:
+                return operation(*args, **kwargs)
+            finally:
+                call.finish()
+
+    """
+    Runs the dbOperations function operationName in the executor, once a reader slot (or the write lock) is free.
+    On a timeout or cancellation the running query is interrupted, and the call waits for its thread to let go of
+    the connection before returning, so a write that is stopped has been rolled back before the next one starts.
+    """
+    async def call(self, operationName, *args, timeout=None, **kwargs):
+        isWrite = operationName in writeOperations
+        if not isWrite and operationName not in readOperations:
+            raise ValueError(f"Unknown operation '{operationName}'")
+        operation = getattr(dbOperations, operationName)
+        timeout = self.timeout if timeout is None else timeout
+
+        readerSlots, writeLock = self.getGates()
+        operationCall = OperationCall()
+        async with (writeLock if isWrite else readerSlots):
+            self.stats["writes" if isWrite else "reads"] += 1
+            future = asyncio.get_running_loop().run_in_executor(
+                self.executor, self.runOperation, operationCall, operation, args, kwargs)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+                self.stats["timedOut" if isinstance(e, asyncio.TimeoutError) else "cancelled"] += 1
+                operationCall.cancel()
+                await asyncio.gather(future, return_exceptions=True)
+                raise
+
+    #db.viewAllPilots etc.: the operation as a coroutine method
+    def __getattr__(self, name):
+        if name in readOperations or name in writeOperations:
+            return functools.partial(self.call, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    #Returns the call counters and those of this object's connection pool
+    def getStats(self):
+        stats = dict(self.stats)
+        stats["pool"] = self.pool.getStats()
+        return stats
+
+    #Waits for calls still running, then closes the executor and connections
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.executor.shutdown, wait=True))
+        self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, excType, excValue, traceback):
+        await self.close()
+
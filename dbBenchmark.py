@@ -0,0 +1,392 @@
+"""
+dbBenchmark.py - Query Benchmarks
+    Measures how every read operation in dbOperations.py scales with the size of the database.
+    For each database size it builds (or reuses) a synthetic database with dbDataGenerator.py, runs each
+    operation repeatedly and records latency percentiles, rows returned and peak Python memory. Results are saved as JSON so runs can be compared;
+    a baseline file and threshold turn slowdowns into a failing exit status.
+    Run with:
+        python dbBenchmark.py --sizes 1000,10000,100000 --output results.json
+        python dbBenchmark.py --baseline results.json --threshold 0.25
+        python dbBenchmark.py --time-columns          text vs integer time columns
+        python dbBenchmark.py --async --clients 16     sync API vs dbAsync.py under concurrent load
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import dbOperations
+from dbConnection import configurePool, closePool
+from dbReportCache import configureReportCache
+from dbDataGenerator import generateDatabase
+from dbAsync import AsyncFlightOperations
+from dbMigrations import latestSchemaVersion
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+defaultSizes = [1000, 10000, 100000]
+defaultRepeats = 15
+defaultBenchDirectory = "benchmarkData"
+defaultThreshold = 0.25
+defaultClients = 16
+
+#Pilots scale with flights so that schedules and workloads per pilot stay realistic
+flightsPerPilot = 500
+
+#Representative arguments, chosen inside the generator's default date range (2025-2026)
+sampleDay = ("2026-01-15 00:00:00", "2026-01-15 23:59:59")
+sampleWindow = ("2026-01-15 08:00:00", "2026-01-15 12:00:00")
+sampleMonth = ("2026-01-01 00:00:00", "2026-01-31 23:59:59")
+
+"""
+The operations to benchmark: name -> function taking no arguments.
+Mutating operations (add, update, assign, delete) are left out so every repeat sees the same data.
+"""
+benchmarkOperations = {
+    "viewAllFlights": lambda: dbOperations.viewAllFlights(
+        dbOperations.flightAttributeList, "scheduledDepartureDateTime", "ASC"),
+    "viewFlightPage (first page)": lambda: dbOperations.viewFlightPage(
+        dbOperations.flightAttributeList, "scheduledDepartureDateTime", "ASC").records,
+    "viewFlightPage (mid-table)": lambda: dbOperations.viewFlightPage(
+        dbOperations.flightAttributeList, "scheduledDepartureDateTime", "ASC", after=(sampleDay[0], "")).records,
+    "viewFlightsByCriteria": lambda: dbOperations.viewFlightsByCriteria(
+        "flightStatus", ("Scheduled",), dbOperations.flightAttributeList),
+    "viewSelectedFlightAttibutes": lambda: dbOperations.viewSelectedFlightAttibutes(["flightStatus"]),
+    "viewAllPilots": lambda: dbOperations.viewAllPilots(),
+    "viewPilotSchedules": lambda: dbOperations.viewPilotSchedules(),
+    "viewUnassignedFlights": lambda: dbOperations.viewUnassignedFlights(),
+    "viewAvailablePilots": lambda: dbOperations.viewAvailablePilots(*sampleWindow),
+    "viewAvailablePilotsForUnassignedFlights": lambda: dbOperations.viewAvailablePilotsForUnassignedFlights(),
+    #A preview changes nothing, so it can be repeated
+    "autoRosterFlights (preview, one month)": lambda: dbOperations.autoRosterFlights(*sampleMonth).assignments,
+    "reportPilotFlightCount": lambda: dbOperations.reportPilotFlightCount(),
+    "reportPilotWorkloadByMonth": lambda: dbOperations.reportPilotWorkloadByMonth(),
+    "reportBusiestTerminal": lambda: dbOperations.reportBusiestTerminal(),
+    "reportBusiestTerminalByPeriod (week)": lambda: dbOperations.reportBusiestTerminalByPeriod("week"),
+    "reportBusiestTerminalByPeriod (day, one month)": lambda: dbOperations.reportBusiestTerminalByPeriod("day", *sampleMonth),
+    "reportTerminalUsageSplit": lambda: dbOperations.reportTerminalUsageSplit(),
+    "reportByTimeframe": lambda: dbOperations.reportByTimeframe(*sampleMonth),
+    "reportByTimeframe (by pilot)": lambda: dbOperations.reportByTimeframe(*sampleMonth, pilotID=1),
+    "reportPilotPunctuality": lambda: dbOperations.reportPilotPunctuality(),
+    "reportFlightPunctuality": lambda: dbOperations.reportFlightPunctuality(),
+}
+
+"""
+Text vs integer times: each comparison asks the same question of the DATETIME text columns and of the integer
+*Epoch columns (schema version 6), so the gain from storing times as integers can be measured at each size.
+Both forms read the flight table directly (not the allFlights view), so they run on a plain connection.
+name -> (text query, text params, integer query, integer params)
+"""
+timeColumnComparisons = {
+    "range: one month of departures": (
+        "SELECT flightID, scheduledDepartureDateTime, flightStatus FROM flight"
+        " WHERE scheduledDepartureDateTime BETWEEN ? AND ?", sampleMonth,
+        "SELECT flightID, scheduledDepartureDateTime, flightStatus FROM flight"
+        " WHERE scheduledDepartureEpoch BETWEEN ? AND ?", tuple(dbOperations.toEpochSeconds(time) for time in sampleMonth)),
+    "group: flights per day": (
+        "SELECT date(scheduledDepartureDateTime) AS day, COUNT(*) FROM flight GROUP BY day", (),
+        "SELECT date(day * 86400, 'unixepoch'), flights FROM"
+        " (SELECT scheduledDepartureEpoch / 86400 AS day, COUNT(*) AS flights FROM flight GROUP BY day)", ()),
+    #Whole days are counted first, so the month is only formatted once per day rather than once per flight
+    "group: flights per month": (
+        "SELECT strftime('%Y-%m', scheduledDepartureDateTime) AS month, COUNT(*) FROM flight GROUP BY month", (),
+        "SELECT strftime('%Y-%m', day * 86400, 'unixepoch') AS month, SUM(flights) FROM"
+        " (SELECT scheduledDepartureEpoch / 86400 AS day, COUNT(*) AS flights FROM flight GROUP BY day) GROUP BY month", ()),
+    "arithmetic: mean scheduled minutes": (
+        "SELECT AVG((julianday(scheduledArrivalDateTime) - julianday(scheduledDepartureDateTime)) * 1440) FROM flight", (),
+        "SELECT AVG((scheduledArrivalEpoch - scheduledDepartureEpoch) / 60.0) FROM flight", ()),
+}
+
+"""
+Sync vs async: the mix of reads each simulated client of an event-loop service makes, as (operation, arguments).
+"""
+asyncWorkload = [
+    ("viewAllPilots", ()),
+    ("viewFlightsByCriteria", ("flightStatus", ("Scheduled",), dbOperations.flightAttributeList)),
+    ("viewAvailablePilots", sampleWindow),
+    ("reportByTimeframe", sampleDay),
+    ("reportBusiestTerminal", ()),
+    ("reportPilotPunctuality", ()),
+]
+
+#How often the heartbeat task checks that the event loop is still responsive, in seconds
+heartbeatInterval = 0.005
+
+"""
+______________________________________________
+=============• RUNNING BENCHMARKS •=============
+----------------------------------------------
+"""
+"""
+Returns the path of a synthetic database with the given number of flights, generating it if needed.
+The file name records the size, seed and schema version so a later run can reuse it, but not one built with an older schema.
+"""
+def prepareDatabase(flights, benchDirectory, seed):
+    os.makedirs(benchDirectory, exist_ok=True)
+    databasePath = os.path.join(benchDirectory, f"bench_{flights}_seed{seed}_v{latestSchemaVersion}.db")
+    if not os.path.exists(databasePath):
+        print(f"Generating {flights:,} flights into {databasePath}...")
+        generateDatabase(databasePath, flights=flights, pilots=max(10, flights // flightsPerPilot), seed=seed)
+    return databasePath
+
+"""
+Calls an operation and returns (seconds, rowsReturned).
+"""
+def timeOperation(operation):
+    startedAt = time.perf_counter()
+    results = operation()
+    elapsed = time.perf_counter() - startedAt
+    return elapsed, len(results)
+
+#Peak Python memory (bytes) allocated while the operation runs, measured on a separate run
+def measurePeakMemory(operation):
+    tracemalloc.start()
+    try:
+        operation()
+        currentBytes, peakBytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peakBytes
+
+"""
+Summarises a list of timings (seconds) as milliseconds.
+"""
+def summariseTimings(timings):
+    milliseconds = sorted(t * 1000 for t in timings)
+    if len(milliseconds) > 1:
+        percentiles = statistics.quantiles(milliseconds, n=100, method="inclusive")
+        p50, p90, p95, p99 = percentiles[49], percentiles[89], percentiles[94], percentiles[98]
+    else:
+        p50 = p90 = p95 = p99 = milliseconds[0]
+    return {
+        "minMs": round(milliseconds[0], 3),
+        "p50Ms": round(p50, 3),
+        "p90Ms": round(p90, 3),
+        "p95Ms": round(p95, 3),
+        "p99Ms": round(p99, 3),
+        "maxMs": round(milliseconds[-1], 3),
+        "meanMs": round(statistics.fmean(milliseconds), 3),
+    }
+
+"""
+Runs every selected operation against every database size and returns the results document.
+One warm-up call per operation is made first so the page cache is populated before timing.
+The report cache (dbReportCache.py) is switched off, so every repeat runs the query rather than returning a cached result.
+"""
+def runBenchmarks(sizes, repeats, benchDirectory, seed=42, operationNames=None):
+    operationNames = operationNames or list(benchmarkOperations)
+    configureReportCache(enabled=False)
+
+    results = []
+    try:
+        for flights in sizes:
+            databasePath = prepareDatabase(flights, benchDirectory, seed)
+            configurePool(databasePath=databasePath)
+            for name in operationNames:
+                operation = benchmarkOperations[name]
+                timeOperation(operation)
+                timings, rowsReturned = [], 0
+                for _ in range(repeats):
+                    elapsed, rowsReturned = timeOperation(operation)
+                    timings.append(elapsed)
+
+                result = {"flights": flights, "operation": name, "repeats": repeats, "rows": rowsReturned}
+                result.update(summariseTimings(timings))
+                result["peakMemoryKiB"] = round(measurePeakMemory(operation) / 1024, 1)
+                results.append(result)
+                print(f"  {flights:>10,} flights  {name:<30} p50 {result['p50Ms']:>10.2f} ms"
+                      f"  p95 {result['p95Ms']:>10.2f} ms  rows {rowsReturned:>9,}")
+    finally:
+        closePool()
+
+    return {
+        "createdAt": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeats": repeats,
+        "results": results,
+    }
+
+"""
+Runs every timeColumnComparisons pair against every database size and returns one result per pair and size,
+with the p50 of each form and how many times faster the integer form is.
+"""
+def compareTimeColumns(sizes, repeats, benchDirectory, seed=42):
+    results = []
+    for flights in sizes:
+        conn = sqlite3.connect(prepareDatabase(flights, benchDirectory, seed))
+        try:
+            for name, (textQuery, textParams, epochQuery, epochParams) in timeColumnComparisons.items():
+                p50s = []
+                for sqlQuery, params in ((textQuery, textParams), (epochQuery, epochParams)):
+                    query = lambda: conn.execute(sqlQuery, params).fetchall()
+                    timeOperation(query)
+                    p50s.append(summariseTimings([timeOperation(query)[0] for _ in range(repeats)])["p50Ms"])
+                result = {"flights": flights, "comparison": name, "textP50Ms": p50s[0], "epochP50Ms": p50s[1],
+                          "speedup": round(p50s[0] / p50s[1], 2) if p50s[1] else None}
+                results.append(result)
+                print(f"  {flights:>10,} flights  {name:<36} text {p50s[0]:>9.2f} ms  integer {p50s[1]:>9.2f} ms"
+                      f"  x{result['speedup']}")
+        finally:
+            conn.close()
+    return results
+
+"""
+Runs clients coroutines at once on one event loop, each making repeats passes over asyncWorkload through call(name,
+args), alongside a heartbeat task that measures how late the loop wakes it (how long the loop was stalled).
+Returns (operations per second, p95 ms per call, longest stall in ms).
+"""
+async def driveClients(call, clients, repeats):
+    latencies, stalls, finished = [], [0.0], asyncio.Event()
+
+    async def heartbeat():
+        while not finished.is_set():
+            expected = time.perf_counter() + heartbeatInterval
+            await asyncio.sleep(heartbeatInterval)
+            stalls.append(time.perf_counter() - expected)
+
+    async def client():
+        for _ in range(repeats):
+            for name, args in asyncWorkload:
+                startedAt = time.perf_counter()
+                await call(name, args)
+                latencies.append(time.perf_counter() - startedAt)
+
+    heartbeatTask = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    startedAt = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - startedAt
+    finished.set()
+    await heartbeatTask
+    return round(len(latencies) / elapsed, 1), summariseTimings(latencies)["p95Ms"], round(max(stalls) * 1000, 1)
+
+"""
+Compares the sync API called straight from coroutines (each call blocks the loop) with AsyncFlightOperations,
+for the same clients, at every database size. The report cache is off so every call runs its queries.
+"""
+def compareAsync(sizes, repeats, benchDirectory, seed=42, clients=defaultClients):
+    configureReportCache(enabled=False)
+
+    async def syncCall(name, args):
+        return getattr(dbOperations, name)(*args)
+
+    async def compare():
+        async with AsyncFlightOperations() as db:
+            asyncCall = lambda name, args: db.call(name, *args)
+            return [await driveClients(call, clients, repeats) for call in (syncCall, asyncCall)]
+
+    results = []
+    try:
+        for flights in sizes:
+            configurePool(databasePath=prepareDatabase(flights, benchDirectory, seed))
+            for name, args in asyncWorkload:
+                getattr(dbOperations, name)(*args)
+            (syncRate, syncP95, syncStall), (asyncRate, asyncP95, asyncStall) = asyncio.run(compare())
+            result = {"flights": flights, "clients": clients, "syncOpsPerSecond": syncRate, "syncP95Ms": syncP95,
+                      "syncMaxStallMs": syncStall, "asyncOpsPerSecond": asyncRate, "asyncP95Ms": asyncP95,
+                      "asyncMaxStallMs": asyncStall}
+            results.append(result)
+            print(f"  {flights:>10,} flights  sync {syncRate:>8.1f} ops/s  p95 {syncP95:>9.2f} ms  stall {syncStall:>8.1f} ms"
+                  f"  |  async {asyncRate:>8.1f} ops/s  p95 {asyncP95:>9.2f} ms  stall {asyncStall:>8.1f} ms")
+    finally:
+        closePool()
+    return results
+
+"""
+_______________________________________________
+=============• COMPARING RUNS •=============
+-----------------------------------------------
+"""
+"""
+Compares p50 latencies with a baseline results document.
+Returns a list of (flights, operation, baselineMs, currentMs, change) for every operation that got slower by
+more than threshold (0.25 = 25%). Operations missing from either run are ignored.
+"""
+def findRegressions(baseline, current, threshold):
+    baselineTimes = {(r["flights"], r["operation"]): r["p50Ms"] for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        baselineMs = baselineTimes.get((r["flights"], r["operation"]))
+        if baselineMs is None or baselineMs <= 0:
+            continue
+        change = (r["p50Ms"] - baselineMs) / baselineMs
+        if change > threshold:
+            regressions.append((r["flights"], r["operation"], baselineMs, r["p50Ms"], f"{change:+.0%}"))
+    return regressions
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Benchmark the read operations in dbOperations.py.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in defaultSizes),
+                        help="comma-separated flight counts, e.g. 1000,10000,100000")
+    parser.add_argument("--repeats", type=int, default=defaultRepeats)
+    parser.add_argument("--operations", help="comma-separated operation names (default: all)")
+    parser.add_argument("--bench-dir", default=defaultBenchDirectory, help="where generated databases are kept")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=defaultThreshold,
+                        help="allowed p50 slowdown before failing, e.g. 0.25 for 25%%")
+    parser.add_argument("--time-columns", action="store_true",
+                        help="compare queries on the text time columns with the integer ones instead")
+    parser.add_argument("--async", dest="compareAsync", action="store_true",
+                        help="compare the sync API with dbAsync.py under concurrent clients instead")
+    parser.add_argument("--clients", type=int, default=defaultClients, help="concurrent clients for --async")
+    options = parser.parse_args(args)
+
+    sizes = [int(size) for size in options.sizes.split(",") if size.strip()]
+    if options.time_columns:
+        results = compareTimeColumns(sizes, options.repeats, options.bench_dir, options.seed)
+        if options.output:
+            with open(options.output, "w", encoding="utf-8") as outputFile:
+                json.dump({"createdAt": datetime.now().isoformat(timespec="seconds"), "sqlite": sqlite3.sqlite_version,
+                           "seed": options.seed, "repeats": options.repeats, "timeColumnResults": results},
+                          outputFile, indent=2)
+        return 0
+    if options.compareAsync:
+        results = compareAsync(sizes, options.repeats, options.bench_dir, options.seed, options.clients)
+        if options.output:
+            with open(options.output, "w", encoding="utf-8") as outputFile:
+                json.dump({"createdAt": datetime.now().isoformat(timespec="seconds"), "sqlite": sqlite3.sqlite_version,
+                           "seed": options.seed, "repeats": options.repeats, "asyncResults": results},
+                          outputFile, indent=2)
+        return 0
+
+    operationNames = [name.strip() for name in options.operations.split(",")] if options.operations else None
+    unknownOperations = set(operationNames or []) - set(benchmarkOperations)
+    if unknownOperations:
+        print(f"Unknown operation(s): {', '.join(sorted(unknownOperations))}")
+        return 2
+
+    current = runBenchmarks(sizes, options.repeats, options.bench_dir, options.seed, operationNames)
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as outputFile:
+            json.dump(current, outputFile, indent=2)
+        print(f"\nResults written to {options.output}")
+
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as baselineFile:
+            baseline = json.load(baselineFile)
+        regressions = findRegressions(baseline, current, options.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {options.threshold:.0%}:")
+            dbOperations.printTableOfResults(regressions, ["Flights", "Operation", "Baseline p50 ms", "p50 ms", "Change"])
+            return 1
+        print(f"\nNo regressions beyond {options.threshold:.0%} against {options.baseline}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,281 @@
+"""
+dbBulkImport.py - Bulk Flight Import
+    Loads a timetable of flights from a CSV or JSONL file in one transaction.
+    Rows are streamed from the file through a generator, validated against flightAttributeList and
+    allowedFlightStatus, and inserted with executemany in large batches, so memory use stays flat
+    however large the file is.
+    CSV files need a header row of flight attribute names; JSONL files need one JSON object per line.
+    Run with:
+        python dbBulkImport.py timetable.csv
+        python dbBulkImport.py timetable.jsonl --batch-size 20000 --replace --rejects rejected.jsonl
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from dbOperations import flightAttributeList, allowedFlightStatus, requiredFlightAttributes, printTableOfResults
+from dbConnection import ConnectionPool, databaseFile
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+defaultBatchSize = 10000
+
+dateTimeAttributes = [
+    "scheduledDepartureDateTime", "scheduledArrivalDateTime", "actualArrivalDateTime", "actualDepartureDateTime"]
+
+pilotAttributes = ["captainID", "firstOfficerID"]
+
+#Sets for fast membership checks while validating each row
+knownAttributes = set(flightAttributeList)
+allowedStatusSet = set(allowedFlightStatus)
+
+#Each attribute paired with its check, in flightAttributeList order, so validation is one pass per row
+attributeChecks = [
+    (attribute,
+     attribute in requiredFlightAttributes,
+     "status" if attribute == "flightStatus" else
+     "dateTime" if attribute in dateTimeAttributes else
+     "pilot" if attribute in pilotAttributes else None)
+    for attribute in flightAttributeList]
+
+scheduledDepartureIndex = flightAttributeList.index("scheduledDepartureDateTime")
+scheduledArrivalIndex = flightAttributeList.index("scheduledArrivalDateTime")
+
+#Only the first rejections are kept in memory for the summary; the rejects file gets all of them
+maxRejectionsKept = 100
+
+"""
+______________________________________________
+=============• READING ROWS •=============
+----------------------------------------------
+"""
+"""
+Yields (lineNumber, record) pairs from a CSV or JSONL file, one at a time.
+The file type is taken from the extension: .csv, or .jsonl / .json (one object per line).
+"""
+def readFlightRows(filePath):
+    if filePath.lower().endswith(".csv"):
+        with open(filePath, newline="", encoding="utf-8") as csvFile:
+            reader = csv.DictReader(csvFile)
+            for record in reader:
+                #The header is line 1, so the first data row is line 2
+                yield reader.line_num, record
+    elif filePath.lower().endswith((".jsonl", ".json")):
+        with open(filePath, encoding="utf-8") as jsonFile:
+            for lineNumber, line in enumerate(jsonFile, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield lineNumber, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield lineNumber, ValueError(f"invalid JSON: {e.msg}")
+    else:
+        raise ValueError(f"Unsupported file type for {filePath}. Use .csv or .jsonl")
+
+"""
+True if value is a real date and time written exactly as YYYY-MM-DD HH:MM:SS, the format the
+reports compare against. fromisoformat is used for speed, with the length and separators checked
+first because it also accepts other ISO layouts.
+"""
+def isCanonicalDateTime(value):
+    if not isinstance(value, str) or len(value) != 19 or value[10] != " " or value[4] != "-" or value[13] != ":":
+        return False
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+"""
+Checks one record and returns it as a tuple in flightAttributeList order, ready for the INSERT.
+Raises ValueError describing the first problem found.
+Empty strings are stored as NULL, as they are when staff leave an optional field blank in main.py.
+"""
+def validateFlightRow(record):
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("row is not an object of attribute names and values")
+
+    if not knownAttributes.issuperset(record):
+        unknownAttributes = [str(name) for name in record if name not in knownAttributes]
+        raise ValueError(f"unknown attribute(s): {', '.join(unknownAttributes)}")
+
+    values = []
+    for attribute, isRequired, check in attributeChecks:
+        value = record.get(attribute)
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                value = None
+
+        if value is None:
+            if isRequired:
+                raise ValueError(f"{attribute} is required")
+        elif check == "status":
+            if value not in allowedStatusSet:
+                raise ValueError(f"flightStatus '{value}' must be one of: {', '.join(allowedFlightStatus)}")
+        elif check == "dateTime":
+            if not isCanonicalDateTime(value):
+                raise ValueError(f"{attribute} '{value}' is not in YYYY-MM-DD HH:MM:SS format")
+        elif check == "pilot":
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{attribute} '{value}' is not a pilot ID")
+        values.append(value)
+
+    if values[scheduledArrivalIndex] < values[scheduledDepartureIndex]:
+        raise ValueError("scheduledArrivalDateTime is before scheduledDepartureDateTime")
+
+    return tuple(values)
+
+"""
+_______________________________________________
+=============• IMPORTING •=============
+-----------------------------------------------
+"""
+"""
+Collects counts, timings and rejected rows while an import runs.
+"""
+class ImportStats:
+    def __init__(self, filePath):
+        self.filePath = filePath
+        self.rowsRead = 0
+        self.rowsInserted = 0
+        self.rowsRejected = 0
+        self.batches = 0
+        self.rejections = []
+        self.startedAt = time.perf_counter()
+        self.elapsedSeconds = 0.0
+
+    def reject(self, lineNumber, reason, record, rejectsFile):
+        self.rowsRejected += 1
+        if len(self.rejections) < maxRejectionsKept:
+            self.rejections.append((lineNumber, reason))
+        if rejectsFile is not None:
+            rejectsFile.write(json.dumps({"line": lineNumber, "reason": reason, "row": record}, default=str) + "\n")
+
+    def finish(self):
+        self.elapsedSeconds = time.perf_counter() - self.startedAt
+
+    @property
+    def rowsPerSecond(self):
+        return self.rowsRead / self.elapsedSeconds if self.elapsedSeconds > 0 else 0.0
+
+"""
+Inserts one batch inside a savepoint.
+If executemany fails (e.g. a duplicate primary key or a missing pilot), the savepoint is rolled back and
+the batch is retried row by row so that only the offending rows are rejected, with their line numbers.
+"""
+def insertBatch(cursor, sqlQuery, batch, stats, rejectsFile):
+    cursor.execute("SAVEPOINT importBatch")
+    try:
+        cursor.executemany(sqlQuery, [values for lineNumber, values, record in batch])
+        stats.rowsInserted += len(batch)
+    except sqlite3.DatabaseError:
+        cursor.execute("ROLLBACK TO importBatch")
+        for lineNumber, values, record in batch:
+            try:
+                cursor.execute(sqlQuery, values)
+                stats.rowsInserted += 1
+            except sqlite3.DatabaseError as e:
+                stats.reject(lineNumber, f"database rejected row: {e}", record, rejectsFile)
+    cursor.execute("RELEASE importBatch")
+    stats.batches += 1
+
+"""
+Streams a CSV/JSONL file into the flight table.
+    - Every valid row is inserted in one transaction; nothing is committed if the import is interrupted.
+    - replace=True uses INSERT OR REPLACE, so re-importing a timetable updates existing flights.
+    - Rejected rows are counted, the first few are kept on the returned stats and, if rejectsPath is given,
+      every rejected row is written there as JSONL with its line number and reason.
+The import uses its own connection with the 'bulk-load' performance profile (dbProfiles.py), but keeps
+foreign keys enforced so rows that reference unknown pilots, destinations or terminals are rejected.
+Called with: stats = importFlights('timetable.csv', batchSize=10000)
+"""
+def importFlights(filePath, batchSize=defaultBatchSize, replace=False, rejectsPath=None, databasePath=databaseFile):
+    if batchSize < 1:
+        raise ValueError("batchSize must be at least 1")
+
+    insertVerb = "INSERT OR REPLACE" if replace else "INSERT"
+    flightAttributes = ", ".join(flightAttributeList)
+    valuePlaceholders = ", ".join(["?"] * len(flightAttributeList))
+    sqlQuery = f"{insertVerb} INTO flight ({flightAttributes}) VALUES ({valuePlaceholders})"
+
+    stats = ImportStats(filePath)
+    importPool = ConnectionPool(databasePath=databasePath, maxConnections=1, profileName="bulk-load",
+                                pragmas={"foreign_keys": "ON"})
+    rejectsFile = open(rejectsPath, "w", encoding="utf-8") if rejectsPath else None
+    try:
+        with importPool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            batch = []
+            for lineNumber, record in readFlightRows(filePath):
+                stats.rowsRead += 1
+                try:
+                    values = validateFlightRow(record)
+                except ValueError as e:
+                    stats.reject(lineNumber, str(e), record, rejectsFile)
+                    continue
+
+                batch.append((lineNumber, values, record))
+                if len(batch) >= batchSize:
+                    insertBatch(cursor, sqlQuery, batch, stats, rejectsFile)
+                    batch = []
+
+            if batch:
+                insertBatch(cursor, sqlQuery, batch, stats, rejectsFile)
+            conn.commit()
+    finally:
+        importPool.close()
+        if rejectsFile is not None:
+            rejectsFile.close()
+        stats.finish()
+    return stats
+
+"""
+Prints an import summary: throughput, totals and where rows were rejected.
+"""
+def printImportSummary(stats):
+    print(f"\nImport of {stats.filePath} complete.")
+    printTableOfResults([(
+        stats.rowsRead, stats.rowsInserted, stats.rowsRejected, stats.batches,
+        f"{stats.elapsedSeconds:.2f}", f"{stats.rowsPerSecond:,.0f}")],
+        ["Rows Read", "Inserted", "Rejected", "Batches", "Seconds", "Rows/sec"])
+
+    if stats.rejections:
+        shown = len(stats.rejections)
+        print(f"\nRejected rows (first {shown} of {stats.rowsRejected}):" if shown < stats.rowsRejected
+              else "\nRejected rows:")
+        printTableOfResults(stats.rejections, ["Line", "Reason"])
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Bulk import flights from a CSV or JSONL file.")
+    parser.add_argument("filePath", help="CSV (with header row) or JSONL file of flights")
+    parser.add_argument("--batch-size", type=int, default=defaultBatchSize, help="rows per executemany batch")
+    parser.add_argument("--replace", action="store_true", help="replace flights that already exist")
+    parser.add_argument("--rejects", help="write rejected rows, with reasons, to this JSONL file")
+    parser.add_argument("--database", default=databaseFile, help="database file to import into")
+    options = parser.parse_args(args)
+
+    try:
+        stats = importFlights(options.filePath, batchSize=options.batch_size, replace=options.replace,
+                              rejectsPath=options.rejects, databasePath=options.database)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Import failed, nothing was imported: {e}")
+        return 1
+
+    printImportSummary(stats)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
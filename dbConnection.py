@@ -0,0 +1,376 @@
+"""
+dbConnection.py - Connection Management
+    Provides a bounded pool of reusable SQLite connections to flightManagement.db.
+    Every function in dbOperations.py borrows its connection from here rather than opening its own.
+    This file groups the code by purpose:
+        > Settings
+        > Connection pool
+        > Module-level pool access
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.request import pathname2url
+from dbProfiles import getProfileSettings, readStoredProfile, applyPragmas
+
+"""
+_____________________________________________
+=============• SETTINGS •=============
+---------------------------------------------
+"""
+
+#Default database file, shared by dbSetup.py, dbSeeding.py and dbOperations.py
+databaseFile = 'flightManagement.db'
+
+#Maximum number of connections the pool will open at once
+defaultMaxConnections = 5
+
+#Seconds to wait for a free connection before giving up
+defaultAcquireTimeout = 30
+
+#Extra PRAGMAs applied on top of the performance profile (dbProfiles.py). Name -> value.
+defaultPragmas = {}
+
+#Schema name the archive database of completed flights (see dbArchive.py) is attached under
+archiveSchema = "archive"
+
+#Views over the operational and archived rows together, for reports that need every flight. View -> table.
+unifiedViews = {"allFlights": "flight", "allCrewAssignments": "crewAssignment"}
+
+#The archive database kept beside a database file, e.g. flightManagementArchive.db for flightManagement.db
+def getArchivePath(databasePath):
+    root, extension = os.path.splitext(databasePath)
+    return f"{root}Archive{extension}"
+
+#A read-only URI for a database file, e.g. file:/home/staff/flightManagement.db?mode=ro
+def getReadOnlyURI(databasePath):
+    return f"file:{pathname2url(os.path.abspath(databasePath))}?mode=ro"
+
+def isArchiveAttached(conn):
+    return any(row[1] == archiveSchema for row in conn.execute("PRAGMA database_list"))
+
+"""
+Attaches the archive database beside databasePath as schema 'archive', if it exists, and creates the unifiedViews.
+Without an archive the views read the operational tables alone, so reports can use them either way.
+They are TEMP views because a view stored in the database can't refer to an attached one.
+readOnly=True attaches the archive read-only, by its URI; conn must then have been opened with uri=True.
+Returns True if the archive is attached.
+"""
+def attachArchive(conn, databasePath, readOnly=False):
+    attached = isArchiveAttached(conn)
+    archivePath = getArchivePath(databasePath)
+    if not attached and os.path.exists(archivePath):
+        conn.execute(f"ATTACH DATABASE ? AS {archiveSchema}", (getReadOnlyURI(archivePath) if readOnly else archivePath,))
+        attached = True
+    for viewName, tableName in unifiedViews.items():
+        archivedRows = f" UNION ALL SELECT * FROM {archiveSchema}.{tableName}" if attached else ""
+        conn.execute(f"DROP VIEW IF EXISTS temp.{viewName}")
+        conn.execute(f"CREATE TEMP VIEW {viewName} AS SELECT * FROM main.{tableName}{archivedRows}")
+    return attached
+
+"""
+Opens a read-only connection (mode=ro) to databasePath, with the archive attached read-only and the unified views.
+The performance profile stored in the database (or profileName) is applied, apart from journal_mode.
+Any attempt to write through it raises sqlite3.OperationalError. Used for reports run side by side (dbReportPack.py).
+"""
+def openReadOnlyConnection(databasePath=databaseFile, profileName=None):
+    if not os.path.exists(databasePath):
+        raise sqlite3.OperationalError(f"Database file {databasePath} does not exist.")
+    conn = sqlite3.connect(getReadOnlyURI(databasePath), uri=True, check_same_thread=False)
+    try:
+        applyPragmas(conn, getProfileSettings(profileName or readStoredProfile(conn)), readOnly=True)
+        attachArchive(conn, databasePath, readOnly=True)
+    except (sqlite3.Error, ValueError):
+        conn.close()
+        raise
+    return conn
+
+#Raised when no pooled connection comes free within acquireTimeout; an OperationalError, as before it had its own type
+class PoolTimeoutError(sqlite3.OperationalError):
+    pass
+
+"""
+DataVersionWatcher
+    A connection of its own, outside the pool, for noticing changes made by every other connection: PRAGMA
+    data_version moves whenever another connection commits to the database (or the attached archive), whether it
+    belongs to this process's pool or to another process sharing the file. Used by the in-memory caches.
+    It follows the database the shared pool points at, re-opening if the pool is moved to another file.
+    Safe to share between threads: every use holds its lock.
+"""
+class DataVersionWatcher:
+    def __init__(self):
+        self.conn = None
+        self.databasePath = None
+        self.hasArchive = False
+        self.lock = threading.RLock()
+
+    #Returns the watcher's connection, opening it if needed. Called with the lock held.
+    def getConnection(self):
+        databasePath = getPool().databasePath
+        if self.conn is None or self.databasePath != databasePath:
+            self.close()
+            self.conn = sqlite3.connect(databasePath, check_same_thread=False)
+            self.databasePath = databasePath
+            self.hasArchive = attachArchive(self.conn, databasePath)
+        return self.conn
+
+    #The current data version: a number, or a (main, archive) pair when the archive is attached
+    def read(self):
+        with self.lock:
+            conn = self.getConnection()
+            dataVersion = conn.execute("PRAGMA data_version").fetchone()[0]
+            if self.hasArchive:
+                dataVersion = (dataVersion, conn.execute(f"PRAGMA {archiveSchema}.data_version").fetchone()[0])
+            return dataVersion
+
+    #Runs a read on the watcher's connection and returns every row, e.g. to load a cached table
+    def fetchAll(self, sqlQuery, params=()):
+        with self.lock:
+            return self.getConnection().execute(sqlQuery, params).fetchall()
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+"""
+___________________________________________
+=============• CONNECTION POOL •=============
+-------------------------------------------
+"""
+"""
+ConnectionPool
+    A bounded pool of sqlite3 connections.
+    - At most maxConnections are open at any time. When all are busy, callers wait (up to acquireTimeout seconds).
+    - A thread that already holds a connection gets the same one back if it asks again (e.g. a helper called
+      from inside another operation), so nested calls never deadlock on the pool.
+    - PRAGMAs are applied once per connection, when it is opened, rather than on every use.
+      They come from the performance profile stored in the database (or profileName, if given),
+      with any pragmas passed in applied on top.
+    - Each connection attaches the archive database, if there is one, with the allFlights and allCrewAssignments views.
+    - Counters record how many connections were opened, how many requests reused an existing connection and
+      how many requests had to wait.
+    Called with:
+        with pool.connection() as conn:
+            ...
+"""
+class ConnectionPool:
+    def __init__(self, databasePath=databaseFile, maxConnections=defaultMaxConnections,
+                 pragmas=None, acquireTimeout=defaultAcquireTimeout, profileName=None):
+        if maxConnections < 1:
+            raise ValueError("maxConnections must be at least 1")
+        self.databasePath = databasePath
+        self.maxConnections = maxConnections
+        self.pragmas = dict(defaultPragmas if pragmas is None else pragmas)
+        self.acquireTimeout = acquireTimeout
+        self.profileName = profileName
+        self.activeProfile = None
+
+        self.idleConnections = []
+        self.openCount = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.threadState = threading.local()
+        self.stats = {"opens": 0, "reuses": 0, "waits": 0, "waitSeconds": 0.0, "acquires": 0}
+
+    #Opens a new connection and applies the performance profile and configured PRAGMAs to it
+    def openConnection(self):
+        #check_same_thread=False because a pooled connection may be handed to different threads over its lifetime.
+        #The pool itself guarantees only one thread uses a connection at a time.
+        conn = sqlite3.connect(self.databasePath, check_same_thread=False)
+        try:
+            profileName = self.profileName or readStoredProfile(conn)
+            pragmas = getProfileSettings(profileName)
+            pragmas.update(self.pragmas)
+            applyPragmas(conn, pragmas)
+            attachArchive(conn, self.databasePath)
+            self.activeProfile = profileName
+        except (sqlite3.Error, ValueError):
+            conn.close()
+            raise
+        return conn
+
+    """
+    Returns a connection for the calling thread.
+    Order of preference: the connection this thread already holds, an idle pooled connection,
+    a newly opened connection (if below maxConnections), otherwise wait for one to be released.
+    """
+    def acquire(self):
+        heldConnection = getattr(self.threadState, "connection", None)
+        if heldConnection is not None:
+            self.threadState.depth += 1
+            with self.condition:
+                self.stats["acquires"] += 1
+                self.stats["reuses"] += 1
+            return heldConnection
+
+        with self.condition:
+            if self.closed:
+                raise sqlite3.ProgrammingError("Connection pool has been closed.")
+            self.stats["acquires"] += 1
+
+            conn = None
+            if not self.idleConnections and self.openCount >= self.maxConnections:
+                self.stats["waits"] += 1
+                waitStarted = time.perf_counter()
+                hasConnection = self.condition.wait_for(
+                    lambda: self.closed or self.idleConnections or self.openCount < self.maxConnections,
+                    timeout=self.acquireTimeout)
+                self.stats["waitSeconds"] += time.perf_counter() - waitStarted
+                if self.closed:
+                    raise sqlite3.ProgrammingError("Connection pool has been closed.")
+                if not hasConnection:
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.acquireTimeout}s waiting for a database connection.")
+
+            if self.idleConnections:
+                conn = self.idleConnections.pop()
+                self.stats["reuses"] += 1
+            else:
+                #Reserve the slot before opening so other threads can't overshoot maxConnections
+                self.openCount += 1
+
+        if conn is None:
+            try:
+                conn = self.openConnection()
+            except Exception:
+                with self.condition:
+                    self.openCount -= 1
+                    self.condition.notify()
+                raise
+            with self.condition:
+                self.stats["opens"] += 1
+
+        self.threadState.connection = conn
+        self.threadState.depth = 1
+        return conn
+
+    """
+    Hands a connection back to the pool once the outermost holder in this thread is finished with it.
+    Any transaction left open (e.g. after an error) is rolled back so the next borrower starts clean.
+    """
+    def release(self, conn):
+        if getattr(self.threadState, "connection", None) is not conn:
+            raise sqlite3.ProgrammingError("Connection released by a thread that does not hold it.")
+
+        self.threadState.depth -= 1
+        if self.threadState.depth > 0:
+            return
+        self.threadState.connection = None
+
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+
+        with self.condition:
+            if self.closed:
+                self.openCount -= 1
+                conn.close()
+            else:
+                self.idleConnections.append(conn)
+            self.condition.notify()
+
+    #Context-managed acquisition: the connection is always released, even if the block raises
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    """
+    Makes every connection request from this thread return conn, a connection from outside the pool, until the
+    with block ends, so dbOperations functions run on it unchanged (e.g. a read-only report connection).
+    conn is never rolled back or closed by the pool; the caller keeps ownership.
+    Called with:
+        with pool.useConnection(conn):
+            reportBusiestTerminal()
+    """
+    @contextmanager
+    def useConnection(self, conn):
+        if getattr(self.threadState, "connection", None) is not None:
+            raise sqlite3.ProgrammingError("This thread already holds a pooled connection.")
+        self.threadState.connection = conn
+        self.threadState.depth = 1
+        try:
+            yield conn
+        finally:
+            self.threadState.connection = None
+            self.threadState.depth = 0
+
+    #Returns a snapshot of the pool counters plus current occupancy
+    def getStats(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats["open"] = self.openCount
+            stats["idle"] = len(self.idleConnections)
+            stats["maxConnections"] = self.maxConnections
+        return stats
+
+    #Closes idle connections and stops handing out new ones. Borrowed connections are closed on release.
+    def close(self):
+        with self.condition:
+            self.closed = True
+            while self.idleConnections:
+                self.idleConnections.pop().close()
+                self.openCount -= 1
+            self.condition.notify_all()
+
+"""
+_________________________________________________
+=============• MODULE-LEVEL POOL ACCESS •=============
+-------------------------------------------------
+"""
+
+pool = None
+poolLock = threading.Lock()
+
+"""
+Returns the shared pool, creating it with the default settings on first use.
+"""
+def getPool():
+    global pool
+    with poolLock:
+        if pool is None:
+            pool = ConnectionPool()
+        return pool
+
+"""
+Replaces the shared pool, e.g. to point the application at a different database file
+or change its size. The previous pool is closed.
+Called with: configurePool(databasePath='other.db', maxConnections=10)
+"""
+def configurePool(databasePath=None, maxConnections=None, pragmas=None, acquireTimeout=None, profileName=None):
+    global pool
+    with poolLock:
+        previousPool = pool
+        pool = ConnectionPool(
+            databasePath=databasePath or (previousPool.databasePath if previousPool else databaseFile),
+            maxConnections=maxConnections or (previousPool.maxConnections if previousPool else defaultMaxConnections),
+            pragmas=pragmas if pragmas is not None else (previousPool.pragmas if previousPool else None),
+            acquireTimeout=acquireTimeout or (previousPool.acquireTimeout if previousPool else defaultAcquireTimeout),
+            profileName=profileName or (previousPool.profileName if previousPool else None))
+    if previousPool is not None:
+        previousPool.close()
+    return pool
+
+#Returns the counters of the shared pool: opens, reuses, waits, etc.
+def getPoolStats():
+    return getPool().getStats()
+
+#Close pooled connections cleanly when the program exits
+def closePool():
+    global pool
+    with poolLock:
+        if pool is not None:
+            pool.close()
+            pool = None
+
+atexit.register(closePool)
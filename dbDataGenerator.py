@@ -0,0 +1,313 @@
+"""
+dbDataGenerator.py - Synthetic Data Generation
+    Builds databases of any size for sizing and performance regression testing.
+    The schema comes from dbSetup.py and flight rows are produced in flightAttributeList order, so generated
+    databases look exactly like ones created by dbSetup.py and dbSeeding.py, just bigger.
+    Output is deterministic: the same settings and seed always produce the same database.
+    Called by dbSeeding.py, e.g.: python dbSeeding.py --synthetic --flights 1000000 --database big.db
+"""
+import heapq
+import itertools
+import random
+import sqlite3
+import time
+from datetime import datetime, timezone
+from dbOperations import flightAttributeList
+from dbSetup import setupDatabase, createIndexes, dropIndexes
+from dbProfiles import getProfileSettings, applyPragmas
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+"""
+Default generator settings. Any of these can be overridden by keyword in generateDatabase().
+    destinations              - number of airports
+    terminalsPerDestination   - terminals at each airport (at least 1)
+    pilots                    - number of pilots
+    flights                   - number of flight legs
+    startDate, endDate        - scheduled departures are spread evenly over this range (YYYY-MM-DD)
+    asOf                      - flights departing before this are Landed/In-air, after it Scheduled.
+                                Defaults to the middle of the date range.
+    onTimeRate                - share of departed flights leaving on time or early
+    meanDelayMinutes          - mean of the (exponential) delay of the late flights
+    crewAssignmentRate        - chance each crew role on a future flight is already filled
+    diversionRate             - share of landed flights diverted to another airport
+    cancellationRate          - share of flights cancelled
+    minTurnaroundMinutes      - minimum rest between two flights for the same pilot
+    seed                      - random seed
+    batchSize                 - rows per executemany call
+"""
+defaultGeneratorSettings = {
+    "destinations": 50,
+    "terminalsPerDestination": 3,
+    "pilots": 200,
+    "flights": 100000,
+    "startDate": "2025-01-01",
+    "endDate": "2026-12-31",
+    "asOf": None,
+    "onTimeRate": 0.7,
+    "meanDelayMinutes": 25,
+    "crewAssignmentRate": 0.6,
+    "diversionRate": 0.005,
+    "cancellationRate": 0.01,
+    "minTurnaroundMinutes": 45,
+    "seed": 42,
+    "batchSize": 50000,
+}
+
+airlinePrefixes = ["BA", "EZY", "CY", "LH", "AF", "KL", "SQ", "CX", "OS", "FR"]
+firstNames = ["Amara", "Li", "Elena", "Mohammed", "Yuki", "Fatima", "Mateo", "Olusola", "Johnathon", "Priya",
+              "Sven", "Chloe", "Kwame", "Ines", "Tomasz", "Aiko", "Rafael", "Noor", "Declan", "Mei"]
+lastNames = ["Okoro", "Wei", "Rodriguez", "Das", "Tanaka", "Al-Sayed", "Silva", "Adebayo", "Truston", "Andreou",
+             "Novak", "Dubois", "Mensah", "Costa", "Kowalski", "Sato", "Herrera", "Haddad", "Byrne", "Chen"]
+
+"""
+___________________________________________
+=============• HELPERS •=============
+-------------------------------------------
+"""
+"""
+Turns 0, 1, 2, ... into three-letter airport codes AAA, AAB, AAC, ...
+"""
+def makeDestinationCode(index):
+    letters = ""
+    for _ in range(3):
+        index, remainder = divmod(index, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+"""
+Formats epoch seconds (UTC) as 'YYYY-MM-DD HH:MM:SS'. The date part is cached per day,
+which is much faster than strftime when formatting millions of timestamps.
+"""
+class DateTimeFormatter:
+    def __init__(self):
+        self.dayStrings = {}
+
+    def format(self, epochSeconds):
+        day, secondOfDay = divmod(epochSeconds, 86400)
+        dayString = self.dayStrings.get(day)
+        if dayString is None:
+            dayString = datetime.fromtimestamp(day * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+            self.dayStrings[day] = dayString
+        hours, remainder = divmod(secondOfDay, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{dayString} {hours:02d}:{minutes:02d}:{seconds:02d}"
+
+def toEpoch(dateString):
+    return int(datetime.strptime(dateString, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+#Yields lists of up to batchSize items from any iterable
+def inBatches(rows, batchSize):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, batchSize))
+        if not batch:
+            return
+        yield batch
+
+"""
+_____________________________________________
+=============• ROW GENERATORS •=============
+---------------------------------------------
+"""
+"""
+Returns destination rows and, for each destination code, its list of terminal IDs.
+"""
+def generateDestinations(settings):
+    destinationRows, terminalRows, terminalsByDestination = [], [], {}
+    for index in range(settings["destinations"]):
+        code = makeDestinationCode(index)
+        destinationRows.append((code, f"{code} International", f"Country {index % 60}", f"City {index}"))
+        terminalIDs = [f"T{number}" for number in range(1, max(1, settings["terminalsPerDestination"]) + 1)]
+        terminalsByDestination[code] = terminalIDs
+        terminalRows.extend((terminalID, code, f"Terminal {terminalID[1:]}") for terminalID in terminalIDs)
+    return destinationRows, terminalRows, terminalsByDestination
+
+"""
+Returns pilot rows in insert order (pilotID is 1, 2, 3, ... in this order).
+About 60% of pilots are captain qualified and 75% first officer qualified; everyone is at least one.
+"""
+def generatePilots(settings, rng):
+    pilotRows = []
+    for pilotID in range(1, settings["pilots"] + 1):
+        name = f"{rng.choice(firstNames)} {rng.choice(lastNames)}"
+        email = f"{name.split()[0][0].lower()}.{name.split()[1].lower()}{pilotID}@airline.com"
+        dob = f"{rng.randint(1960, 2000)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        isCaptain = 1 if rng.random() < 0.6 else 0
+        isFirstOfficer = 1 if rng.random() < 0.75 or not isCaptain else 0
+        pilotRows.append((name, email, dob, isCaptain, isFirstOfficer))
+    return pilotRows
+
+"""
+Yields flight tuples in flightAttributeList order, in order of scheduled departure.
+    - Departures follow a Poisson process over the date range, so they arrive already sorted.
+    - Each pilot flies from one role pool (captain or first officer); dual-qualified pilots are split between
+      the pools. Each pool is a heap of (next free time, pilotID), so a pilot is only given a flight once their
+      previous one has arrived plus the minimum turnaround. No pilot is double-booked.
+"""
+def generateFlights(settings, rng, pilotRows, terminalsByDestination):
+    formatter = DateTimeFormatter()
+    startEpoch = toEpoch(settings["startDate"])
+    endEpoch = toEpoch(settings["endDate"]) + 86399
+    asOfEpoch = toEpoch(settings["asOf"]) if settings["asOf"] else (startEpoch + endEpoch) // 2
+    meanGap = (endEpoch - startEpoch) / max(1, settings["flights"])
+    turnaround = settings["minTurnaroundMinutes"] * 60
+
+    destinationCodes = list(terminalsByDestination)
+    #Skewed popularity so a few hub airports see most of the traffic
+    popularity = list(itertools.accumulate(rng.paretovariate(1.2) for _ in destinationCodes))
+    routeDurations = {}
+
+    captainPool, firstOfficerPool = [], []
+    for pilotID, (name, email, dob, isCaptain, isFirstOfficer) in enumerate(pilotRows, start=1):
+        if isCaptain and (not isFirstOfficer or rng.random() < 0.5):
+            captainPool.append((startEpoch, pilotID))
+        else:
+            firstOfficerPool.append((startEpoch, pilotID))
+    heapq.heapify(captainPool)
+    heapq.heapify(firstOfficerPool)
+
+    #Takes the pilot who has been free longest, if they are free by the departure time
+    def assignFrom(pool, departure, arrival):
+        if pool and pool[0][0] <= departure:
+            pilotID = pool[0][1]
+            heapq.heapreplace(pool, (arrival + turnaround, pilotID))
+            return pilotID
+        return None
+
+    departure = float(startEpoch)
+    for flightNumber in range(settings["flights"]):
+        departure += rng.expovariate(1 / meanGap) if meanGap > 0 else 0
+        scheduledDeparture = min(int(departure) // 300 * 300, endEpoch)
+
+        departureCode, arrivalCode = rng.choices(destinationCodes, cum_weights=popularity, k=2)
+        if arrivalCode == departureCode:
+            arrivalCode = destinationCodes[(destinationCodes.index(departureCode) + 1) % len(destinationCodes)]
+        route = (departureCode, arrivalCode)
+        duration = routeDurations.get(route)
+        if duration is None:
+            duration = rng.randint(9, 160) * 300
+            routeDurations[route] = duration
+        scheduledArrival = scheduledDeparture + duration
+
+        cancelled = rng.random() < settings["cancellationRate"]
+        actualDeparture = actualArrival = None
+        diversionCode = diversionTerminal = None
+        if cancelled:
+            status = "Cancelled"
+        elif scheduledDeparture >= asOfEpoch:
+            status = "Scheduled"
+        else:
+            if rng.random() < settings["onTimeRate"]:
+                departureDelay = -rng.randint(0, 5) * 60
+            else:
+                departureDelay = int(rng.expovariate(1 / settings["meanDelayMinutes"]) + 1) * 60
+            arrivalDelay = departureDelay + int(rng.gauss(0, 8)) * 60
+            actualDeparture = scheduledDeparture + departureDelay
+            actualArrival = scheduledArrival + arrivalDelay
+            if actualDeparture > asOfEpoch:
+                #Delayed past the 'as of' time, so it hasn't left yet
+                status, actualDeparture, actualArrival = "Scheduled", None, None
+            elif actualArrival > asOfEpoch:
+                status, actualArrival = "In-air", None
+            else:
+                status = "Landed"
+            if status == "Landed" and rng.random() < settings["diversionRate"]:
+                diversionCode = rng.choice(destinationCodes)
+                diversionTerminal = rng.choice(terminalsByDestination[diversionCode])
+
+        #Flights that have already flown always had a crew; future flights are partly rostered
+        needsCrew = status != "Scheduled"
+        captainID = firstOfficerID = None
+        if needsCrew or rng.random() < settings["crewAssignmentRate"]:
+            captainID = assignFrom(captainPool, scheduledDeparture, scheduledArrival)
+        if needsCrew or rng.random() < settings["crewAssignmentRate"]:
+            firstOfficerID = assignFrom(firstOfficerPool, scheduledDeparture, scheduledArrival)
+
+        yield (
+            f"{airlinePrefixes[flightNumber % len(airlinePrefixes)]}{flightNumber + 1}",
+            formatter.format(scheduledDeparture),
+            status,
+            captainID,
+            firstOfficerID,
+            arrivalCode,
+            departureCode,
+            diversionCode,
+            rng.choice(terminalsByDestination[departureCode]),
+            rng.choice(terminalsByDestination[arrivalCode]),
+            diversionTerminal,
+            formatter.format(scheduledArrival),
+            formatter.format(actualArrival) if actualArrival is not None else None,
+            formatter.format(actualDeparture) if actualDeparture is not None else None,
+        )
+
+"""
+___________________________________________
+=============• GENERATION •=============
+-------------------------------------------
+"""
+"""
+Creates a fresh database at databasePath with dbSetup.py's schema and fills it with synthetic data.
+Loading uses the 'bulk-load' PRAGMAs, drops the flight indexes for the load and rebuilds them at the end,
+then runs ANALYZE so the query planner has statistics for the new data.
+Returns a dictionary of row counts and timings.
+Called with: generateDatabase('big.db', flights=1000000, pilots=500, seed=7)
+"""
+def generateDatabase(databasePath, profileName="balanced", **overrides):
+    unknownSettings = set(overrides) - set(defaultGeneratorSettings)
+    if unknownSettings:
+        raise ValueError(f"Unknown generator setting(s): {', '.join(sorted(unknownSettings))}")
+    settings = dict(defaultGeneratorSettings, **overrides)
+    if settings["destinations"] < 2:
+        raise ValueError("At least 2 destinations are needed to make routes")
+    if settings["pilots"] < 1:
+        raise ValueError("At least 1 pilot is needed")
+
+    startedAt = time.perf_counter()
+    rng = random.Random(settings["seed"])
+    setupDatabase(databasePath, profileName)
+
+    conn = sqlite3.connect(databasePath)
+    try:
+        applyPragmas(conn, getProfileSettings("bulk-load"))
+        dropIndexes(conn)
+        cursor = conn.cursor()
+
+        destinationRows, terminalRows, terminalsByDestination = generateDestinations(settings)
+        pilotRows = generatePilots(settings, rng)
+        cursor.executemany("INSERT INTO destination VALUES (?, ?, ?, ?)", destinationRows)
+        cursor.executemany("INSERT INTO terminal VALUES (?, ?, ?)", terminalRows)
+        cursor.executemany("""INSERT INTO pilot
+                           (pilotName, email, dob, isCaptainQualified, isFirstOfficerQualified)
+                           VALUES (?, ?, ?, ?, ?)""", pilotRows)
+
+        flightAttributes = ", ".join(flightAttributeList)
+        valuePlaceholders = ", ".join(["?"] * len(flightAttributeList))
+        insertSQL = f"INSERT INTO flight ({flightAttributes}) VALUES ({valuePlaceholders})"
+        for batch in inBatches(generateFlights(settings, rng, pilotRows, terminalsByDestination),
+                               settings["batchSize"]):
+            cursor.executemany(insertSQL, batch)
+        conn.commit()
+        loadedAt = time.perf_counter()
+
+        createIndexes(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    finishedAt = time.perf_counter()
+    return {
+        "databasePath": databasePath,
+        "destinations": len(destinationRows),
+        "terminals": len(terminalRows),
+        "pilots": len(pilotRows),
+        "flights": settings["flights"],
+        "seed": settings["seed"],
+        "loadSeconds": round(loadedAt - startedAt, 3),
+        "indexSeconds": round(finishedAt - loadedAt, 3),
+        "totalSeconds": round(finishedAt - startedAt, 3),
+    }
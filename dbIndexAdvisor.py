@@ -0,0 +1,198 @@
+"""
+dbIndexAdvisor.py - Index Advisor
+    Runs EXPLAIN QUERY PLAN over every query issued by dbOperations.py and reports which ones
+    still scan a whole table instead of searching an index.
+    Run with:
+        python dbIndexAdvisor.py                   report on flightManagement.db
+        python dbIndexAdvisor.py --create-indexes  create the index set from dbSetup.py first
+        python dbIndexAdvisor.py --strict          exit with status 1 if any query scans unexpectedly
+"""
+import sys
+import sqlite3
+from dbOperations import (getDBConnection, printTableOfResults, flightAttributeList, flightCriteriaQueries,
+pilotSchedulesQuery, unassignedFlightsQuery, availablePilotsQuery, assignPilotQuery, clashingFlightQuery, rosterFlightsQuery, rosterDutiesQuery, pilotFlightCountQuery,
+pilotWorkloadByMonthQuery, busiestTerminalQuery, timeframeQuery, timeframePilotFilter, pilotPunctualityQuery,
+flightPunctualityQuery, buildFlightPageQuery, availabilityParams, toEpochSeconds, unassignedFlightPilotsQuery, busiestTerminalByPeriodQuery, terminalUsagePeriods, terminalUsageSplitQuery)
+from dbReferenceCache import referenceQueries
+
+"""
+_____________________________________________
+=============• QUERY CATALOGUE •=============
+---------------------------------------------
+"""
+"""
+Returns every query dbOperations.py runs, with representative parameters, as
+(operation, sqlQuery, params, expectedScans) tuples.
+expectedScans names the tables (or aliases, as they appear in the plan) that the query reads in full by design,
+e.g. listing every pilot or a report that aggregates all history. Those scans are reported but not flagged.
+"""
+def buildQueryCatalogue():
+    allColumns = ", ".join(flightAttributeList)
+    sampleFlight = ("BA663", "2026-02-06 14:45:00")
+    sampleStart, sampleEnd = "2026-02-03 00:00:00", "2026-02-03 23:59:59"
+    sampleRange = (toEpochSeconds(sampleStart), toEpochSeconds(sampleEnd))
+
+    return [
+        ("viewAllFlights", f"SELECT {allColumns} FROM flight ORDER BY scheduledDepartureDateTime ASC", (), ("flight",)),
+        ("viewFlightPage (next page by departure)",
+            *buildFlightPageQuery(flightAttributeList, "scheduledDepartureDateTime", "ASC", sampleFlight[::-1], 26), ()),
+        ("viewFlightPage (next page by flight)",
+            *buildFlightPageQuery(flightAttributeList, "flightID", "DESC", sampleFlight, 26), ()),
+        ("viewFlightsByCriteria (status)",
+            flightCriteriaQueries["flightStatus"].format(attributeString=allColumns), ("Scheduled",), ()),
+        ("viewFlightsByCriteria (arrival destination)",
+            flightCriteriaQueries["arrivalDestination"].format(attributeString=allColumns), ("LHR",), ()),
+        ("viewFlightsByCriteria (unassigned)",
+            flightCriteriaQueries["unassigned"].format(attributeString=allColumns), (), ()),
+        ("updateFlightRecord",
+            "UPDATE flight SET flightStatus = ? WHERE flightID = ? AND scheduledDepartureDateTime = ?",
+            ("Landed",) + sampleFlight, ()),
+        ("viewSelectedFlightAttibutes",
+            "SELECT flightID, scheduledDepartureDateTime, flightStatus FROM flight"
+            " WHERE flightID = ? AND scheduledDepartureDateTime = ?", sampleFlight, ()),
+        ("deleteFlightRecord", "DELETE FROM flight WHERE flightID = ? AND scheduledDepartureDateTime = ?",
+            sampleFlight, ()),
+        ("viewPilotSchedules", pilotSchedulesQuery, (), ("f",)),
+        ("viewUnassignedFlights", unassignedFlightsQuery, (), ()),
+        ("viewAvailablePilots", availablePilotsQuery, availabilityParams(sampleStart, sampleEnd), ("pilot",)),
+        ("viewAvailablePilotsForUnassignedFlights", unassignedFlightPilotsQuery, (), ("u", "p")),
+        ("assignPilotToFlight", assignPilotQuery.format(role="captainID"), (1,) + sampleFlight, ()),
+        ("assignPilotToFlight (clash check)", clashingFlightQuery,
+            (1, 1, toEpochSeconds("2026-02-06 16:00:00"), toEpochSeconds(sampleFlight[1]), "2026-02-06 16:00:00", sampleFlight[1])
+            + sampleFlight + ("Captain",), ()),
+        ("autoRosterFlights (flights)", rosterFlightsQuery, sampleRange, ()),
+        ("autoRosterFlights (duties)", rosterDutiesQuery, (29530000, 29520000), ()),
+        ("updatePilotDetails", "UPDATE pilot SET email = ? WHERE pilotID = ? AND pilotName = ?",
+            ("a@airline.com", 1, "Amara Okoro"), ()),
+        ("deletePilotRecord", "DELETE FROM pilot WHERE pilotID = ?", (1,), ()),
+        #Adds up every pilotMonthlyWorkload row by design; small tables may be joined by a scan rather than the key
+        #The reference data cache (viewAllPilots, getPilotName, pilot and terminal checks) loads whole tables by design
+        *[(f"referenceData ({table})", sqlQuery, (), (table,)) for table, sqlQuery in referenceQueries.items()],
+        ("reportPilotFlightCount", pilotFlightCountQuery, (), ("p", "w")),
+        #Reads the whole pilotMonthlyWorkload summary by design: one row per month and pilot
+        ("reportPilotWorkloadByMonth", pilotWorkloadByMonthQuery, (), ("w",)),
+        #The terminal reports read every terminalUsage counter by design, or a range of days by idxTerminalUsageDay
+        ("reportBusiestTerminal", busiestTerminalQuery, (), ("terminalUsage",)),
+        ("reportBusiestTerminalByPeriod (day)", busiestTerminalByPeriodQuery.format(period=terminalUsagePeriods["day"]),
+            (sampleStart, sampleEnd), ()),
+        ("reportTerminalUsageSplit", terminalUsageSplitQuery, (), ("terminalUsage",)),
+        ("reportByTimeframe", timeframeQuery, sampleRange, ()),
+        ("reportByTimeframe (by pilot)", timeframeQuery + timeframePilotFilter, sampleRange + (1,), ()),
+        #Reads the whole pilotPunctuality rollup by design: one row per pilot
+        ("reportPilotPunctuality", pilotPunctualityQuery, (), ("r",)),
+        #Reads every flight, operational and archived, in departure order through idxFlightDeparture in both databases
+        ("reportFlightPunctuality", flightPunctualityQuery, (), ()),
+    ]
+
+"""
+____________________________________________
+=============• PLAN ANALYSIS •=============
+--------------------------------------------
+"""
+"""
+Returns the EXPLAIN QUERY PLAN detail lines for a query. The query itself is not executed.
+"""
+def explainQuery(cursor, sqlQuery, params):
+    cursor.execute(f"EXPLAIN QUERY PLAN {sqlQuery}", params)
+    return [row[3] for row in cursor.fetchall()]
+
+"""
+Sorts plan lines into full table scans, full index scans, index searches and temporary sorts.
+Scans of subqueries (CO-ROUTINE / MATERIALIZE) read an intermediate result rather than a table,
+so they are left out of the table scans.
+A virtual table "scan" passed constraints (e.g. the crewDutyIndex R*Tree, "VIRTUAL TABLE INDEX 2:B0D1") is a search.
+"""
+def classifyPlan(planDetails):
+    subqueryNames = set()
+    for detail in planDetails:
+        for prefix in ("CO-ROUTINE ", "MATERIALIZE "):
+            if detail.startswith(prefix):
+                subqueryNames.add(detail[len(prefix):].split(" ")[0])
+
+    summary = {"tableScans": [], "indexScans": [], "searches": [], "tempSorts": []}
+    for detail in planDetails:
+        if detail.startswith("SCAN "):
+            scannedName = detail.split(" ")[1]
+            if scannedName in subqueryNames or scannedName == "CONSTANT":
+                continue
+            if "VIRTUAL TABLE INDEX" in detail and detail.split(":", 1)[-1].strip():
+                summary["searches"].append(detail)
+                continue
+            if "USING" in detail:
+                summary["indexScans"].append(detail)
+            else:
+                summary["tableScans"].append(detail)
+        elif detail.startswith("SEARCH "):
+            summary["searches"].append(detail)
+        elif detail.startswith("USE TEMP B-TREE"):
+            summary["tempSorts"].append(detail)
+    return summary
+
+"""
+Explains every catalogued query and returns one result dictionary per query.
+"""
+def runIndexAdvisor():
+    results = []
+    with getDBConnection() as (conn, cursor):
+        for operation, sqlQuery, params, expectedScans in buildQueryCatalogue():
+            try:
+                planDetails = explainQuery(cursor, sqlQuery, params)
+            except sqlite3.Error as e:
+                results.append({"operation": operation, "verdict": f"ERROR: {e}", "plan": [],
+                                "flagged": True})
+                continue
+
+            summary = classifyPlan(planDetails)
+            unexpectedScans = [d for d in summary["tableScans"] if d.split(" ")[1] not in expectedScans]
+            if unexpectedScans:
+                verdict = "SCAN"
+            elif summary["tableScans"]:
+                verdict = "SCAN (expected)"
+            elif summary["indexScans"]:
+                verdict = "INDEX SCAN"
+            else:
+                verdict = "INDEXED"
+            if summary["tempSorts"]:
+                verdict += " + TEMP SORT"
+
+            results.append({
+                "operation": operation,
+                "verdict": verdict,
+                "plan": planDetails,
+                "flagged": bool(unexpectedScans),
+            })
+    return results
+
+"""
+Prints the advisor results as a table, followed by the full plans of the flagged queries.
+"""
+def printAdvisorReport(results):
+    print("\nIndex Advisor: EXPLAIN QUERY PLAN for every query in dbOperations.py")
+    rows = [(r["operation"], r["verdict"], "; ".join(r["plan"])) for r in results]
+    printTableOfResults(rows, ["Operation", "Verdict", "Plan"])
+
+    flagged = [r for r in results if r["flagged"]]
+    if flagged:
+        print(f"\n{len(flagged)} quer{'y still scans' if len(flagged) == 1 else 'ies still scan'} a whole table:")
+        for r in flagged:
+            print(f"\n  {r['operation']}")
+            for detail in r["plan"]:
+                print(f"      {detail}")
+    else:
+        print("\nNo unexpected full table scans.")
+
+def main(args):
+    if "--create-indexes" in args:
+        from dbSetup import createIndexes
+        with getDBConnection() as (conn, cursor):
+            createIndexes(conn)
+
+    results = runIndexAdvisor()
+    printAdvisorReport(results)
+
+    if "--strict" in args and any(r["flagged"] for r in results):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
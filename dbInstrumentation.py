@@ -0,0 +1,387 @@
+"""
+dbInstrumentation.py - Operation Timing & Slow-Query Log
+    Times every function in dbOperations.py that uses the database. While instrumentation is switched on, each call
+    records its wall time, the rows it returned, the SQL it ran (from sqlite3's trace callback) and how much work the
+    SQLite engine did (counted by its progress handler).
+    - Calls are summarised in memory per operation: count, errors and p50 / p95 / p99 / max milliseconds.
+    - Calls slower than a threshold are written as JSON lines to a rotating slow-query log, optionally with the
+      EXPLAIN QUERY PLAN of each statement.
+    Switched off (the default) a call costs one extra flag check.
+    Switched on with:
+        enableInstrumentation(slowQueryMs=100, logPath='slowQueries.log', explain=True)
+        python main.py --timings --slow-log slowQueries.log report flight-punctuality
+    Summarise a slow-query log (including its rotated files) with:
+        python dbInstrumentation.py                        read slowQueries.log
+        python dbInstrumentation.py --log other.log --top 5
+"""
+import argparse
+import functools
+import glob
+import inspect
+import json
+import logging
+import logging.handlers
+import statistics
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+from dbConnection import getPool
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+defaultSlowQueryMs = 100
+defaultLogPath = "slowQueries.log"
+
+#The log rolls over to slowQueries.log.1, .2, ... once it reaches maxLogBytes
+maxLogBytes = 1_000_000
+logBackupCount = 3
+
+#Most recent call times kept per operation for the percentiles; the call count covers every call
+maxTimingsKept = 10000
+
+#Statements kept per call (an executemany traces one per row); the log gives the total as well
+maxStatementsKept = 20
+
+#SQLite virtual machine instructions between progress handler calls
+progressInterval = 1000
+
+#Statements that have a query plan worth explaining
+explainableStatements = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+OperationTimingRow = namedtuple("OperationTimingRow", [
+    "operation", "calls", "errors", "p50Ms", "p95Ms", "p99Ms", "maxMs", "totalMs"])
+
+settings = {"enabled": False, "slowQueryMs": defaultSlowQueryMs, "explain": False}
+
+slowQueryLogger = logging.getLogger("dbInstrumentation.slowQueries")
+slowQueryLogger.propagate = False
+slowQueryLogger.setLevel(logging.INFO)
+
+"""
+____________________________________________
+=============• RECORDING CALLS •=============
+--------------------------------------------
+"""
+
+#operation -> {"calls", "errors", "seconds", "timings"}
+operationStats = {}
+statsLock = threading.Lock()
+
+#Calls in progress on this thread, innermost last; the trace callback gives statements to the innermost one
+callState = threading.local()
+
+#One call of an instrumented operation
+class CallRecord:
+    def __init__(self, operation):
+        self.operation = operation
+        self.startedAt = time.perf_counter()
+        self.statements = []
+        self.statementCount = 0
+        self.progressTicks = 0
+        self.rows = None
+
+    def elapsedSeconds(self):
+        return time.perf_counter() - self.startedAt
+
+def getCallStack():
+    stack = getattr(callState, "stack", None)
+    if stack is None:
+        stack = callState.stack = []
+    return stack
+
+#Trace callback: records each statement with when it started, relative to the call
+def onStatement(sqlText):
+    stack = getCallStack()
+    if not stack or getattr(callState, "explaining", False):
+        return
+    record = stack[-1]
+    record.statementCount += 1
+    if len(record.statements) < maxStatementsKept:
+        record.statements.append((sqlText, record.elapsedSeconds()))
+
+#Progress handler: counts engine work for the current call. Returning 0 lets the statement carry on.
+def onProgress():
+    stack = getCallStack()
+    if stack:
+        stack[-1].progressTicks += 1
+    return 0
+
+"""
+Installs the trace callback and progress handler on a connection an operation is about to use.
+Called by dbOperations.getDBConnection. While instrumentation is off it removes them instead: pooled connections
+outlive disableInstrumentation(), and would otherwise keep calling back into Python for every statement.
+"""
+def traceConnection(conn):
+    if settings["enabled"]:
+        conn.set_trace_callback(onStatement)
+        conn.set_progress_handler(onProgress, progressInterval)
+    else:
+        conn.set_trace_callback(None)
+        conn.set_progress_handler(None, 0)
+
+#Adds a finished call to the per-operation statistics and logs it if it was slow
+def finishCall(record, failed):
+    elapsed = record.elapsedSeconds()
+    with statsLock:
+        stats = operationStats.setdefault(record.operation, {
+            "calls": 0, "errors": 0, "seconds": 0.0, "timings": deque(maxlen=maxTimingsKept)})
+        stats["calls"] += 1
+        stats["errors"] += failed
+        stats["seconds"] += elapsed
+        stats["timings"].append(elapsed)
+    if elapsed * 1000 >= settings["slowQueryMs"] and slowQueryLogger.handlers:
+        logSlowCall(record, elapsed, failed)
+
+#Counts the rows an operation returned: the length of a list of records, otherwise not counted
+def countRows(result):
+    return len(result) if isinstance(result, list) else None
+
+"""
+Wraps an operation so each call is recorded while instrumentation is on.
+A generator (e.g. streamFlights) is timed from the first row until it is exhausted or closed,
+counting the rows it yields; its statements are recorded while it is producing a row.
+"""
+def instrumentFunction(function, operation):
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def instrumentedGenerator(*args, **kwargs):
+            if not settings["enabled"]:
+                yield from function(*args, **kwargs)
+                return
+            record = CallRecord(operation)
+            record.rows = 0
+            stack = getCallStack()
+            rows = function(*args, **kwargs)
+            failed = True
+            try:
+                while True:
+                    stack.append(record)
+                    try:
+                        row = next(rows)
+                    except StopIteration:
+                        break
+                    finally:
+                        stack.pop()
+                    record.rows += 1
+                    yield row
+                failed = False
+            except GeneratorExit:
+                #The caller stopped early, e.g. after --limit rows
+                failed = False
+                raise
+            finally:
+                rows.close()
+                finishCall(record, failed)
+        return instrumentedGenerator
+
+    @functools.wraps(function)
+    def instrumented(*args, **kwargs):
+        if not settings["enabled"]:
+            return function(*args, **kwargs)
+        record = CallRecord(operation)
+        stack = getCallStack()
+        stack.append(record)
+        failed = True
+        try:
+            result = function(*args, **kwargs)
+            record.rows = countRows(result)
+            failed = False
+            return result
+        finally:
+            stack.pop()
+            finishCall(record, failed)
+    return instrumented
+
+"""
+Replaces each function named in operationNames in a module's namespace with an instrumented version.
+dbOperations.py calls this on its own globals once everything is defined, with the list of its public operations,
+so callers that import its functions by name (main.py) get the instrumented ones.
+The operations are named rather than picked out by what they call, so one that stops using getDBConnection
+(e.g. because it reads a cache) is still timed. A name that isn't a function in the namespace raises ValueError.
+Returns the names of the operations wrapped.
+"""
+def instrumentOperations(namespace, operationNames):
+    missing = [name for name in operationNames if not inspect.isfunction(namespace.get(name))]
+    if missing:
+        raise ValueError(f"Not function(s) of {namespace['__name__']}: {', '.join(missing)}")
+    for name in operationNames:
+        namespace[name] = instrumentFunction(namespace[name], name)
+    return list(operationNames)
+
+"""
+_______________________________________________
+=============• SLOW-QUERY LOG •=============
+-----------------------------------------------
+"""
+
+#Runs EXPLAIN QUERY PLAN for a traced statement. The statement is not executed.
+def explainStatement(conn, sqlText):
+    try:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sqlText}")]
+    except Exception as e:
+        return [f"not explained: {e}"]
+
+"""
+Writes one slow call to the log as a JSON line: the operation, its time, rows and engine work, then each statement
+it ran with the milliseconds until the next one started (the last runs to the end of the call), and its plan if
+explain is on.
+"""
+def logSlowCall(record, elapsed, failed):
+    statements = []
+    for position, (sqlText, startedAt) in enumerate(record.statements):
+        finishedAt = record.statements[position + 1][1] if position + 1 < len(record.statements) else elapsed
+        statements.append({"sql": sqlText, "ms": round((finishedAt - startedAt) * 1000, 3)})
+
+    if settings["explain"]:
+        callState.explaining = True
+        try:
+            with getPool().connection() as conn:
+                for statement in statements:
+                    if statement["sql"].lstrip().upper().startswith(explainableStatements):
+                        statement["plan"] = explainStatement(conn, statement["sql"])
+        except Exception as e:
+            statements.append({"sql": None, "plan": [f"not explained: {e}"]})
+        finally:
+            callState.explaining = False
+
+    slowQueryLogger.info(json.dumps({
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "operation": record.operation,
+        "ms": round(elapsed * 1000, 3),
+        "rows": record.rows,
+        "failed": failed,
+        "vmSteps": record.progressTicks * progressInterval,
+        "statementCount": record.statementCount,
+        "statements": statements,
+    }))
+
+"""
+_____________________________________________
+=============• SWITCHING ON & OFF •=============
+---------------------------------------------
+"""
+"""
+Starts recording calls. Calls taking at least slowQueryMs milliseconds are written to logPath (None for no log);
+explain=True adds the query plan of each statement in them.
+Called with: enableInstrumentation(slowQueryMs=50, logPath='slowQueries.log', explain=True)
+"""
+def enableInstrumentation(slowQueryMs=defaultSlowQueryMs, logPath=defaultLogPath, explain=False):
+    if slowQueryMs < 0:
+        raise ValueError("slowQueryMs can't be negative")
+    for handler in list(slowQueryLogger.handlers):
+        slowQueryLogger.removeHandler(handler)
+        handler.close()
+    if logPath:
+        handler = logging.handlers.RotatingFileHandler(logPath, maxBytes=maxLogBytes, backupCount=logBackupCount,
+                                                       encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        slowQueryLogger.addHandler(handler)
+    settings.update(enabled=True, slowQueryMs=slowQueryMs, explain=explain)
+
+#Stops recording calls and closes the slow-query log. The statistics gathered so far are kept.
+def disableInstrumentation():
+    settings["enabled"] = False
+    for handler in list(slowQueryLogger.handlers):
+        slowQueryLogger.removeHandler(handler)
+        handler.close()
+
+def isInstrumentationEnabled():
+    return settings["enabled"]
+
+def resetOperationStats():
+    with statsLock:
+        operationStats.clear()
+
+"""
+______________________________________________
+=============• SUMMARIES •=============
+----------------------------------------------
+"""
+
+#Nearest-rank style percentiles (ms) of a list of seconds; a single timing is every percentile
+def getPercentiles(timings):
+    milliseconds = sorted(t * 1000 for t in timings)
+    if len(milliseconds) == 1:
+        return milliseconds[0], milliseconds[0], milliseconds[0], milliseconds[0]
+    percentiles = statistics.quantiles(milliseconds, n=100, method="inclusive")
+    return percentiles[49], percentiles[94], percentiles[98], milliseconds[-1]
+
+"""
+Returns an OperationTimingRow per operation called since instrumentation was switched on (or the stats reset),
+slowest total time first. The percentiles cover the most recent maxTimingsKept calls.
+"""
+def getOperationSummary():
+    with statsLock:
+        snapshot = [(operation, dict(stats, timings=list(stats["timings"])))
+                    for operation, stats in operationStats.items()]
+    rows = []
+    for operation, stats in snapshot:
+        p50, p95, p99, slowest = getPercentiles(stats["timings"])
+        rows.append(OperationTimingRow(operation, stats["calls"], stats["errors"], round(p50, 3), round(p95, 3),
+                                       round(p99, 3), round(slowest, 3), round(stats["seconds"] * 1000, 3)))
+    return sorted(rows, key=lambda row: row.totalMs, reverse=True)
+
+#Reads every entry in a slow-query log and its rotated files (slowQueries.log.1 is newer than .2), oldest first
+def readSlowQueryLog(logPath=defaultLogPath):
+    rotatedFiles = [path for path in glob.glob(f"{glob.escape(logPath)}.*") if path.rsplit(".", 1)[-1].isdigit()]
+    rotatedFiles.sort(key=lambda path: int(path.rsplit(".", 1)[-1]), reverse=True)
+    entries = []
+    for path in rotatedFiles + [logPath]:
+        try:
+            with open(path, encoding="utf-8") as logFile:
+                entries.extend(json.loads(line) for line in logFile if line.strip())
+        except FileNotFoundError:
+            continue
+    return entries
+
+"""
+Summarises a slow-query log: an OperationTimingRow per operation, from the slow calls logged.
+"""
+def summariseSlowQueryLog(entries):
+    timingsByOperation = {}
+    for entry in entries:
+        timingsByOperation.setdefault(entry["operation"], []).append(entry)
+    rows = []
+    for operation, calls in timingsByOperation.items():
+        p50, p95, p99, slowest = getPercentiles([call["ms"] / 1000 for call in calls])
+        rows.append(OperationTimingRow(operation, len(calls), sum(call["failed"] for call in calls), round(p50, 3),
+                                       round(p95, 3), round(p99, 3), round(slowest, 3),
+                                       round(sum(call["ms"] for call in calls), 3)))
+    return sorted(rows, key=lambda row: row.totalMs, reverse=True)
+
+operationSummaryHeaders = ["Operation", "Calls", "Errors", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Total ms"]
+
+def main(args):
+    #Imported here: dbOperations imports this file to instrument itself
+    from dbOperations import printTableOfResults
+
+    parser = argparse.ArgumentParser(description="Summarise a slow-query log written by dbInstrumentation.")
+    parser.add_argument("--log", default=defaultLogPath, help="slow-query log file (its rotated files are read too)")
+    parser.add_argument("--top", type=int, default=3, help="show the statements of this many slowest calls")
+    options = parser.parse_args(args)
+
+    entries = readSlowQueryLog(options.log)
+    if not entries:
+        print(f"No slow calls logged in {options.log}.")
+        return 0
+
+    print(f"\n{len(entries)} slow call(s) logged in {options.log}:")
+    printTableOfResults(summariseSlowQueryLog(entries), operationSummaryHeaders)
+
+    for entry in sorted(entries, key=lambda entry: entry["ms"], reverse=True)[:options.top]:
+        print(f"\n{entry['operation']}: {entry['ms']} ms, {entry['rows']} row(s), {entry['vmSteps']} VM steps, "
+              f"{entry['statementCount']} statement(s) at {entry['at']}")
+        for statement in entry["statements"]:
+            print(f"    {statement['ms']} ms  {' '.join((statement['sql'] or '').split())}")
+            for detail in statement.get("plan", []):
+                print(f"        {detail}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
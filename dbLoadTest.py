@@ -0,0 +1,146 @@
+"""
+dbLoadTest.py - Load Test for the HTTP Service
+    Drives dbServer.py with concurrent clients and reports throughput and latency per endpoint.
+    Each client is a thread with its own keep-alive connection, cycling through loadTestRequests like a dashboard
+    polling the service. With --etag the clients send back the ETag of each URL in If-None-Match, so the run
+    shows what unchanged data costs; without it every request runs its queries.
+    Without --url a server is started in this process on a free port, against --database.
+    Run with:
+        python dbLoadTest.py --clients 8 --seconds 10
+        python dbLoadTest.py --clients 16 --etag --database benchmarkData/bench_100000_seed42_v8.db
+        python dbLoadTest.py --url http://127.0.0.1:8080 --seconds 30
+"""
+import argparse
+import http.client
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+from dbBenchmark import summariseTimings
+from dbConnection import databaseFile
+from dbOperations import printTableOfResults
+from dbServer import createServer
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+defaultClients = 8
+defaultSeconds = 10
+
+#The requests each client makes in turn: flight listings, pilots and reports
+loadTestRequests = [
+    "/flights?pageSize=50",
+    "/flights?status=Scheduled&columns=flightID,scheduledDepartureDateTime,flightStatus",
+    "/flights?unassigned=true&columns=flightID,scheduledDepartureDateTime",
+    "/pilots",
+    "/reports/busiest-terminal",
+    "/reports/pilot-punctuality",
+    "/reports/pilot-workload",
+    "/reports/busiest-terminal-by-period?period=week",
+]
+
+loadTestHeaders = ["Endpoint", "Requests", "304s", "Errors", "p50 ms", "p95 ms", "p99 ms", "Max ms"]
+
+"""
+____________________________________________
+=============• RUNNING THE TEST •=============
+--------------------------------------------
+"""
+"""
+One client: requests loadTestRequests in turn over one connection until stopAt, adding
+(endpoint, status, seconds) to results.
+"""
+def runClient(host, port, useETags, stopAt, results, clientNumber):
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    etags = {}
+    requestNumber = clientNumber
+    try:
+        while time.perf_counter() < stopAt:
+            path = loadTestRequests[requestNumber % len(loadTestRequests)]
+            requestNumber += 1
+            headers = {"If-None-Match": etags[path]} if useETags and path in etags else {}
+            startedAt = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+                if response.getheader("ETag"):
+                    etags[path] = response.getheader("ETag")
+            except (OSError, http.client.HTTPException):
+                status = 0
+                connection.close()
+            results.append((path.split("?")[0] if path.startswith("/reports") else path, status,
+                            time.perf_counter() - startedAt))
+    finally:
+        connection.close()
+
+"""
+Runs clients for the given number of seconds against host:port.
+Returns (requests per second, one row per endpoint for loadTestHeaders).
+"""
+def runLoadTest(host, port, clients=defaultClients, seconds=defaultSeconds, useETags=False):
+    results = []
+    stopAt = time.perf_counter() + seconds
+    threads = [threading.Thread(target=runClient, args=(host, port, useETags, stopAt, results, number))
+               for number in range(clients)]
+    startedAt = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - startedAt
+
+    byEndpoint = defaultdict(list)
+    for endpoint, status, duration in results:
+        byEndpoint[endpoint].append((status, duration))
+    rows = []
+    for endpoint, calls in byEndpoint.items():
+        timings = summariseTimings([duration for status, duration in calls])
+        rows.append((endpoint, len(calls), sum(status == 304 for status, duration in calls),
+                     sum(status == 0 or status >= 400 for status, duration in calls),
+                     timings["p50Ms"], timings["p95Ms"], timings["p99Ms"], timings["maxMs"]))
+    return round(len(results) / elapsed, 1), rows
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Load test the HTTP service (dbServer.py).")
+    parser.add_argument("--url", help="a running service to test; by default one is started here")
+    parser.add_argument("--database", default=databaseFile, help="database for the service started here")
+    parser.add_argument("--connections", type=int, default=defaultClients,
+                        help="connection pool size of the service started here")
+    parser.add_argument("--clients", type=int, default=defaultClients)
+    parser.add_argument("--seconds", type=float, default=defaultSeconds)
+    parser.add_argument("--etag", action="store_true", help="send If-None-Match with the last ETag of each URL")
+    options = parser.parse_args(args)
+    if options.clients < 1 or options.seconds <= 0:
+        print("--clients and --seconds must be positive.")
+        return 2
+
+    server = None
+    if options.url:
+        url = urlsplit(options.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        server = createServer(port=0, databasePath=options.database, connections=options.connections)
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        print(f"{options.clients} clients for {options.seconds:g}s against http://{host}:{port}"
+              f"{' with ETags' if options.etag else ''}...")
+        requestsPerSecond, rows = runLoadTest(host, port, options.clients, options.seconds, options.etag)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    printTableOfResults(rows, loadTestHeaders)
+    print(f"\n{requestsPerSecond} requests per second.")
+    return 1 if any(row[3] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,270 @@
+"""
+dbMigrations.py - Schema Migrations
+    Brings an existing database up to the current schema without losing its data.
+    Each migration has a version number. The highest version applied is stored in the dbSettings table
+    as schemaVersion, so running this file again only applies the migrations that are new.
+    A database built by dbSetup.py already has the latest schema and starts at the latest version.
+    Run with:
+        python dbMigrations.py                      migrate flightManagement.db
+        python dbMigrations.py --database other.db
+"""
+import argparse
+import sqlite3
+import sys
+from dbConnection import databaseFile
+from dbSetup import (createSettingsTable, createCrewAssignmentTable, createCrewAssignmentTriggers, createCrewPilotIndex,
+backfillCrewAssignment, createPilotMonthlyWorkloadTable, createPilotMonthlyWorkloadTriggers,
+createPilotPunctualityTable, createPilotPunctualityTriggers, createDeparturePerformanceView, createArrivalPerformanceView,
+createTerminalUsageTable, createTerminalUsageTriggers, createSecondaryIndexes, createCrewDutyIndex, createCrewDutyTriggers,
+backfillCrewDutyIndex, createFlightTable, createArchiveDatabase, createReferenceDataTriggers)
+from dbOperations import flightAttributeList, flightTimeAttributes
+from dbSummaries import rebuildSummary
+
+"""
+___________________________________________
+=============• SCHEMA VERSION •=============
+-------------------------------------------
+"""
+
+schemaVersionSettingName = "schemaVersion"
+
+#Returns the schema version recorded in the database, or 0 if none has been recorded yet
+def readSchemaVersion(conn):
+    try:
+        row = conn.execute("SELECT settingValue FROM dbSettings WHERE settingName = ?",
+                           (schemaVersionSettingName,)).fetchone()
+    except sqlite3.OperationalError:
+        #No dbSettings table: a database from before settings were stored
+        return 0
+    return int(row[0]) if row else 0
+
+#Records the schema version. Not committed here, so it lands in the same transaction as the migration.
+def recordSchemaVersion(conn, version):
+    conn.execute(createSettingsTable.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS"))
+    conn.execute("INSERT OR REPLACE INTO dbSettings (settingName, settingValue) VALUES (?, ?)",
+                 (schemaVersionSettingName, str(version)))
+
+#Column names of a table, including generated columns
+def getColumnNames(conn, tableName):
+    return {row[1] for row in conn.execute(f"PRAGMA table_xinfo({tableName})")}
+
+#Replaces triggers whose definition has changed; the name is read from the CREATE TRIGGER statement
+def replaceTriggers(conn, createTriggers):
+    for createTrigger in createTriggers:
+        triggerName = createTrigger.split("IF NOT EXISTS")[1].split()[0]
+        conn.execute(f"DROP TRIGGER IF EXISTS {triggerName}")
+        conn.execute(createTrigger)
+
+"""
+_______________________________________
+=============• MIGRATIONS •=============
+---------------------------------------
+"""
+"""
+1. crewAssignment
+    Adds the crewAssignment table, its index and the triggers that keep it in step with flight,
+    then backfills it from the captainID / firstOfficerID already recorded on each flight.
+"""
+def migrateCrewAssignment(conn):
+    conn.execute(createCrewAssignmentTable)
+    for createTrigger in createCrewAssignmentTriggers:
+        conn.execute(createTrigger)
+    conn.execute(createCrewPilotIndex)
+    conn.execute(backfillCrewAssignment)
+
+"""
+2. pilotMonthlyWorkload
+    Adds the monthly workload summary table and the crewAssignment triggers that maintain it, then fills it
+    with a full recompute from flight.
+"""
+def migratePilotMonthlyWorkload(conn):
+    conn.execute(createPilotMonthlyWorkloadTable)
+    for createTrigger in createPilotMonthlyWorkloadTriggers:
+        conn.execute(createTrigger)
+    rebuildSummary(conn, "pilotMonthlyWorkload")
+
+"""
+3. Punctuality
+    Adds the generated delay and status columns to flight and points the performance views at them.
+    crewAssignment gains copies of the actual times (the crew triggers are replaced to keep them filled in),
+    then the pilotPunctuality rollup and its triggers are added and filled with a full recompute.
+    A database whose crewAssignment was created by migration 1 after this change already has the new columns.
+    The columns are added as they were defined at schema version 3, comparing the text times; migration 6 replaces them.
+"""
+textPerformanceColumns = [
+    """departureDelayMinutes INTEGER GENERATED ALWAYS AS
+        (CAST(round((julianday(actualDepartureDateTime) - julianday(scheduledDepartureDateTime)) * 1440) AS INTEGER)) VIRTUAL""",
+    """arrivalDelayMinutes INTEGER GENERATED ALWAYS AS
+        (CAST(round((julianday(actualArrivalDateTime) - julianday(scheduledArrivalDateTime)) * 1440) AS INTEGER)) VIRTUAL""",
+    """departureStatus VARCHAR GENERATED ALWAYS AS
+        (CASE WHEN actualDepartureDateTime > scheduledDepartureDateTime THEN 'Delayed' ELSE 'On Time' END) VIRTUAL""",
+    """arrivalStatus VARCHAR GENERATED ALWAYS AS
+        (CASE WHEN actualArrivalDateTime > scheduledArrivalDateTime THEN 'Delayed' ELSE 'On Time' END) VIRTUAL""",
+]
+
+def migratePunctuality(conn):
+    flightColumns = getColumnNames(conn, "flight")
+    for columnDefinition in textPerformanceColumns:
+        if columnDefinition.split()[0] not in flightColumns:
+            conn.execute(f"ALTER TABLE flight ADD COLUMN {columnDefinition}")
+    conn.execute("DROP VIEW IF EXISTS departurePerformance")
+    conn.execute("DROP VIEW IF EXISTS arrivalPerformance")
+    conn.execute(createDeparturePerformanceView)
+    conn.execute(createArrivalPerformanceView)
+    #Only the arrivalPerformance join used this index, and reportFlightPunctuality no longer joins the views
+    conn.execute("DROP INDEX IF EXISTS idxFlightArrival")
+
+    crewColumns = getColumnNames(conn, "crewAssignment")
+    for columnName in ("actualDepartureDateTime", "actualArrivalDateTime"):
+        if columnName not in crewColumns:
+            conn.execute(f"ALTER TABLE crewAssignment ADD COLUMN {columnName} DATETIME")
+    replaceTriggers(conn, createCrewAssignmentTriggers)
+    conn.execute("""
+        UPDATE crewAssignment
+        SET actualDepartureDateTime = f.actualDepartureDateTime, actualArrivalDateTime = f.actualArrivalDateTime
+        FROM flight f
+        WHERE f.flightID = crewAssignment.flightID AND f.scheduledDepartureDateTime = crewAssignment.scheduledDepartureDateTime
+        """)
+
+    conn.execute(createPilotPunctualityTable)
+    for createTrigger in createPilotPunctualityTriggers:
+        conn.execute(createTrigger)
+    rebuildSummary(conn, "pilotPunctuality")
+
+"""
+4. terminalUsage
+    Adds the terminal usage counters, the flight triggers that maintain them and their index by day,
+    then fills them with a full recompute from flight.
+"""
+def migrateTerminalUsage(conn):
+    conn.execute(createTerminalUsageTable)
+    for createTrigger in createTerminalUsageTriggers:
+        conn.execute(createTrigger)
+    for createIndex in createSecondaryIndexes:
+        if "ON terminalUsage" in createIndex:
+            conn.execute(createIndex)
+    rebuildSummary(conn, "terminalUsage")
+
+"""
+5. crewDutyIndex
+    Adds the R*Tree of crew duty periods and the crewAssignment triggers that maintain it, then fills it
+    from crewAssignment.
+"""
+def migrateCrewDutyIndex(conn):
+    conn.execute(createCrewDutyIndex)
+    for createTrigger in createCrewDutyTriggers:
+        conn.execute(createTrigger)
+    conn.execute("DELETE FROM crewDutyIndex")
+    conn.execute(backfillCrewDutyIndex)
+
+"""
+6. Integer time columns
+    Rewrites any flight time that isn't in the canonical 'YYYY-MM-DD HH:MM:SS' form (the triggers carry the change
+    through to crewAssignment and the summary tables); times SQLite can't read at all are left as they are.
+    ALTER TABLE can't add STORED columns, so flight is then rebuilt with the integer time columns: the rows are copied
+    into a new table that replaces the old one, and flight's triggers, indexes and views are created again.
+    The punctuality columns are now worked out from the integers.
+"""
+def migrateEpochColumns(conn):
+    for column in flightTimeAttributes:
+        conn.execute(f"""UPDATE flight SET {column} = datetime({column})
+                         WHERE datetime({column}) IS NOT NULL AND {column} <> datetime({column})""")
+
+    flightColumns = ", ".join(flightAttributeList)
+    conn.execute(createFlightTable.replace("CREATE TABLE flight", "CREATE TABLE flightRebuild"))
+    conn.execute(f"INSERT INTO flightRebuild ({flightColumns}) SELECT {flightColumns} FROM flight")
+    conn.execute("DROP VIEW IF EXISTS departurePerformance")
+    conn.execute("DROP VIEW IF EXISTS arrivalPerformance")
+    #Dropping flight also drops its triggers and indexes
+    conn.execute("DROP TABLE flight")
+    conn.execute("ALTER TABLE flightRebuild RENAME TO flight")
+
+    for createTrigger in createCrewAssignmentTriggers + createTerminalUsageTriggers:
+        conn.execute(createTrigger)
+    for createIndex in createSecondaryIndexes:
+        if "ON flight" in createIndex:
+            conn.execute(createIndex)
+    conn.execute(createDeparturePerformanceView)
+    conn.execute(createArrivalPerformanceView)
+
+"""
+7. Archive database
+    Creates the archive database beside this one (see dbArchive.py) and replaces the summary delete triggers with ones
+    that leave the counts alone while dbArchive moves flights into it, so the summaries keep counting archived flights.
+"""
+def migrateArchive(conn):
+    replaceTriggers(conn, createPilotMonthlyWorkloadTriggers + createPilotPunctualityTriggers + createTerminalUsageTriggers)
+    mainPath = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+    createArchiveDatabase(mainPath)
+
+"""
+8. Reference data versions
+    Adds the triggers that count changes to pilot, destination and terminal in dbSettings, which tell
+    dbReferenceCache.py when to reload them.
+"""
+def migrateReferenceDataVersions(conn):
+    for createTrigger in createReferenceDataTriggers:
+        conn.execute(createTrigger)
+
+#(version, description, function) in the order they must be applied
+migrations = [
+    (1, "crewAssignment table, triggers and backfill from flight", migrateCrewAssignment),
+    (2, "pilotMonthlyWorkload summary table and triggers", migratePilotMonthlyWorkload),
+    (3, "generated delay columns on flight and pilotPunctuality rollup", migratePunctuality),
+    (4, "terminalUsage counters and triggers", migrateTerminalUsage),
+    (5, "crewDutyIndex R*Tree of crew duty periods", migrateCrewDutyIndex),
+    (6, "stored integer time columns on flight", migrateEpochColumns),
+    (7, "archive database, and summary triggers that keep counting archived flights", migrateArchive),
+    (8, "change counters for the pilot, destination and terminal tables", migrateReferenceDataVersions),
+]
+
+latestSchemaVersion = migrations[-1][0]
+
+"""
+Applies every migration newer than the database's schema version.
+Each migration runs in its own transaction together with the new version number, so an interrupted run
+leaves the database at the last migration that completed.
+Returns the list of (version, description) applied.
+Called with: migrateDatabase('flightManagement.db')
+"""
+def migrateDatabase(databasePath=databaseFile):
+    applied = []
+    conn = sqlite3.connect(databasePath)
+    try:
+        currentVersion = readSchemaVersion(conn)
+        for version, description, migration in migrations:
+            if version <= currentVersion:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                migration(conn)
+                recordSchemaVersion(conn, version)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            applied.append((version, description))
+    finally:
+        conn.close()
+    return applied
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations to an existing database.")
+    parser.add_argument("--database", default=databaseFile, help="database file to migrate")
+    options = parser.parse_args(args)
+
+    try:
+        applied = migrateDatabase(options.database)
+    except sqlite3.Error as e:
+        print(f"Migration failed: {e}")
+        return 1
+
+    if applied:
+        for version, description in applied:
+            print(f"Applied migration {version}: {description}")
+    else:
+        print(f"{options.database} is already at schema version {latestSchemaVersion}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,151 @@
+"""
+dbProfiles.py - SQLite Performance Profiles
+    Named sets of PRAGMA settings that trade durability against write speed.
+    dbSetup.py stores the chosen profile name in the dbSettings table and the connection pool
+    (dbConnection.py) applies that profile to every connection it opens.
+    Run 'python dbProfiles.py' to see the active profile, or 'python dbProfiles.py <profile>' to switch.
+"""
+import sys
+import sqlite3
+
+"""
+___________________________________________
+=============• PROFILES •=============
+-------------------------------------------
+"""
+"""
+journal_mode  - WAL lets staff sessions keep reading while another session writes.
+synchronous   - FULL fsyncs on every commit, NORMAL only at WAL checkpoints, OFF never (bulk loads only).
+mmap_size     - Bytes of the database file read through memory mapping instead of read() calls.
+cache_size    - Negative values are KiB of page cache per connection.
+temp_store    - Where temporary tables and sort spills live.
+busy_timeout  - Milliseconds to wait for a lock before raising 'database is locked'.
+foreign_keys  - Enforce the FOREIGN KEY constraints declared in dbSetup.py.
+"""
+performanceProfiles = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -8000,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 10000,
+        "foreign_keys": "ON",
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -32000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 1073741824,
+        "cache_size": -262144,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+        "foreign_keys": "OFF",
+    },
+}
+
+defaultProfile = "balanced"
+
+#dbSettings row that records the profile chosen for a database file
+profileSettingName = "performanceProfile"
+
+"""
+_____________________________________________________
+=============• READING & WRITING PROFILES •=============
+-----------------------------------------------------
+"""
+"""
+Returns the PRAGMA settings for a profile name, raising ValueError for unknown names.
+"""
+def getProfileSettings(profileName):
+    if profileName not in performanceProfiles:
+        raise ValueError(f"Unknown performance profile '{profileName}'. "
+                         f"Choose from: {', '.join(performanceProfiles)}")
+    return dict(performanceProfiles[profileName])
+
+"""
+Reads the profile name stored in dbSettings.
+Falls back to the default profile if the table or row doesn't exist (e.g. a database created before profiles).
+"""
+def readStoredProfile(conn):
+    try:
+        row = conn.execute("SELECT settingValue FROM dbSettings WHERE settingName = ?",
+                           (profileSettingName,)).fetchone()
+    except sqlite3.OperationalError:
+        return defaultProfile
+    if row is None or row[0] not in performanceProfiles:
+        return defaultProfile
+    return row[0]
+
+"""
+Records the profile name in dbSettings so every later connection uses it.
+"""
+def storeProfile(conn, profileName):
+    getProfileSettings(profileName)
+    conn.execute("""CREATE TABLE IF NOT EXISTS dbSettings (
+                        settingName VARCHAR NOT NULL PRIMARY KEY,
+                        settingValue VARCHAR
+                    )""")
+    conn.execute("INSERT OR REPLACE INTO dbSettings (settingName, settingValue) VALUES (?, ?)",
+                 (profileSettingName, profileName))
+    conn.commit()
+
+"""
+Applies a dictionary of PRAGMA settings to a connection.
+journal_mode is skipped on read-only connections, where it can't be changed.
+"""
+def applyPragmas(conn, pragmas, readOnly=False):
+    for pragmaName, pragmaValue in pragmas.items():
+        if readOnly and pragmaName == "journal_mode":
+            continue
+        conn.execute(f"PRAGMA {pragmaName} = {pragmaValue}").fetchall()
+
+"""
+Reads back the current value of every PRAGMA a profile controls, for reporting.
+"""
+def readCurrentPragmas(conn):
+    currentSettings = {}
+    for pragmaName in performanceProfiles[defaultProfile]:
+        row = conn.execute(f"PRAGMA {pragmaName}").fetchone()
+        currentSettings[pragmaName] = row[0] if row else None
+    return currentSettings
+
+"""
+Returns the active profile name and the PRAGMA values actually in effect on a pooled connection.
+Called with: profileName, settings = getActiveProfile()
+"""
+def getActiveProfile():
+    from dbConnection import getPool
+
+    pool = getPool()
+    with pool.connection() as conn:
+        return pool.activeProfile, readCurrentPragmas(conn)
+
+"""
+Prints the active profile, or stores a new one when a profile name is passed on the command line.
+"""
+def main(args):
+    from dbConnection import getPool, configurePool
+
+    if args:
+        with getPool().connection() as conn:
+            storeProfile(conn, args[0])
+        #Reopen the pool so the new profile is applied to fresh connections
+        configurePool()
+        print(f"Performance profile set to '{args[0]}'.")
+
+    profileName, settings = getActiveProfile()
+    print(f"\nActive performance profile: {profileName}")
+    for pragmaName, value in settings.items():
+        print(f"    {pragmaName} = {value}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,152 @@
+"""
+dbReferenceCache.py - Reference Data Cache
+    pilot, destination and terminal are small tables that rarely change, yet pilot names, qualifications and
+    terminals are looked up over and over. This cache loads each table once into dictionaries and answers those
+    lookups from memory:
+        > a pilot's record, name and qualifications, or every pilot
+        > whether a destination exists
+        > whether a terminal belongs to a destination
+    A table is only dropped from the cache when it changes:
+        - Write-through: the pilot functions in dbOperations.py drop pilot as soon as their change is committed.
+        - Any other writer (dbSeeding.py, another process): triggers count the changes to each table in dbSettings
+          (see dbSetup.py). Each lookup reads PRAGMA data_version on a watcher connection; only if something has been
+          committed since the last lookup are the counters read, and only the tables whose counter moved are reloaded.
+    Called with: referenceData.getPilot(3), referenceData.terminalBelongsTo('5', 'LHR')
+"""
+import threading
+from dbConnection import DataVersionWatcher
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+referenceTables = ["pilot", "destination", "terminal"]
+
+#dbSettings rows counting the changes to each table, e.g. referenceDataVersion.pilot (kept by triggers, see dbSetup.py)
+referenceDataVersionPrefix = "referenceDataVersion."
+
+#The query each table is loaded with. Pilot rows are in the order of dbOperations.pilotAttributeList.
+referenceQueries = {
+    "pilot": """SELECT pilotID, pilotName, email, dob, isCaptainQualified, isFirstOfficerQualified
+                FROM pilot ORDER BY pilotID""",
+    "destination": "SELECT destinationID, destinationName, country, city FROM destination ORDER BY destinationID",
+    "terminal": "SELECT terminalID, destinationID, terminalName FROM terminal",
+}
+
+referenceVersionsQuery = (f"SELECT settingName, settingValue FROM dbSettings WHERE settingName IN "
+                          f"({', '.join('?' * len(referenceTables))})")
+referenceVersionNames = tuple(referenceDataVersionPrefix + table for table in referenceTables)
+
+#Pilot qualification columns, by their position in a pilot row
+qualificationColumns = {"isCaptainQualified": 4, "isFirstOfficerQualified": 5}
+
+"""
+____________________________________________
+=============• REFERENCE CACHE •=============
+--------------------------------------------
+"""
+"""
+ReferenceDataCache
+    tables holds each loaded table, built from its rows by the build functions below:
+        pilot       -> {pilotID: pilot row}, in pilotID order
+        destination -> {destinationID: destination row}
+        terminal    -> {destinationID: {terminalID: terminalName}}
+    A table missing from tables is loaded on its next lookup.
+"""
+class ReferenceDataCache:
+    def __init__(self):
+        self.tables = {}
+        self.dataVersion = None
+        self.tableVersions = {}
+        self.watcher = DataVersionWatcher()
+        self.lock = threading.RLock()
+        self.stats = {"lookups": 0, "loads": 0, "invalidations": 0}
+
+    """
+    Drops the tables that have changed since the last lookup. Called with the lock held.
+    The counters are only read when the data version shows something was committed.
+    """
+    def refresh(self):
+        watchedVersion = self.watcher.read()
+        dataVersion = (self.watcher.databasePath, watchedVersion)
+        if dataVersion == self.dataVersion:
+            return
+        if self.dataVersion is not None and self.dataVersion[0] != dataVersion[0]:
+            self.tables.clear()
+        versions = dict(self.watcher.fetchAll(referenceVersionsQuery, referenceVersionNames))
+        for table in referenceTables:
+            version = versions.get(referenceDataVersionPrefix + table)
+            if version != self.tableVersions.get(table) and table in self.tables:
+                del self.tables[table]
+                self.stats["invalidations"] += 1
+            self.tableVersions[table] = version
+        self.dataVersion = dataVersion
+
+    #Returns a table from the cache, loading it if it isn't there
+    def getTable(self, table):
+        with self.lock:
+            self.refresh()
+            self.stats["lookups"] += 1
+            if table not in self.tables:
+                self.tables[table] = tableBuilders[table](self.watcher.fetchAll(referenceQueries[table]))
+                self.stats["loads"] += 1
+            return self.tables[table]
+
+    #Drops one table (or every table) so it is reloaded on its next lookup; called after a write is committed
+    def invalidate(self, table=None):
+        with self.lock:
+            for droppedTable in ([table] if table else list(self.tables)):
+                if self.tables.pop(droppedTable, None) is not None:
+                    self.stats["invalidations"] += 1
+
+    #The pilot row for pilotID, or None. Like the SQL comparison with the INTEGER column, '3' finds pilot 3.
+    def getPilot(self, pilotID):
+        if isinstance(pilotID, str) and pilotID.strip().isdigit():
+            pilotID = int(pilotID)
+        return self.getTable("pilot").get(pilotID)
+
+    #Every pilot row, in pilotID order
+    def getPilots(self):
+        return list(self.getTable("pilot").values())
+
+    #Whether pilotID holds a qualification, e.g. isCaptainQualified; False for an unknown pilot
+    def isQualified(self, pilotID, qualification):
+        pilot = self.getPilot(pilotID)
+        return bool(pilot and pilot[qualificationColumns[qualification]])
+
+    #IDs are compared as text, as the text columns compare them in SQL (terminal 5 is '5')
+    def destinationExists(self, destinationID):
+        return str(destinationID) in self.getTable("destination")
+
+    def terminalBelongsTo(self, terminalID, destinationID):
+        return str(terminalID) in self.getTable("terminal").get(str(destinationID), ())
+
+    def getStats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["tablesLoaded"] = sorted(self.tables)
+        return stats
+
+def buildPilotTable(rows):
+    return {row[0]: row for row in rows}
+
+def buildDestinationTable(rows):
+    return {row[0]: row for row in rows}
+
+def buildTerminalTable(rows):
+    terminals = {}
+    for terminalID, destinationID, terminalName in rows:
+        terminals.setdefault(destinationID, {})[terminalID] = terminalName
+    return terminals
+
+tableBuilders = {"pilot": buildPilotTable, "destination": buildDestinationTable, "terminal": buildTerminalTable}
+
+"""
+________________________________________________
+=============• MODULE-LEVEL CACHE •=============
+------------------------------------------------
+"""
+
+referenceData = ReferenceDataCache()
@@ -0,0 +1,162 @@
+"""
+dbReportCache.py - Report Result Cache
+    Keeps the records each report in dbOperations.py returned, keyed on the report name and its parameters, so a
+    report opened again before anything has changed is answered from memory instead of being run from scratch.
+    - Invalidation: SQLite's PRAGMA data_version, read on a watcher connection (dbConnection.py), changes whenever
+      any other connection commits to the database (or to the attached archive), whether it's one of this process's
+      pooled connections or another process sharing flightManagement.db. Every cached report is dropped as soon as
+      it changes, so a cached result is never older than the last commit.
+    - Size: at most maxEntries reports and maxRows records in total; the least recently used report goes first.
+      A report with more than maxRows records isn't cached.
+    - Counters record hits, misses, invalidations and evictions.
+    Called with:
+        @cachedReport
+        def reportBusiestTerminal(): ...
+"""
+import functools
+import threading
+from collections import OrderedDict
+from dbConnection import DataVersionWatcher
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+defaultMaxEntries = 32
+defaultMaxRows = 200000
+
+"""
+____________________________________________
+=============• REPORT CACHE •=============
+--------------------------------------------
+"""
+"""
+ReportCache
+    An LRU cache of report results, valid for one data_version of the database the shared pool points at.
+"""
+class ReportCache:
+    def __init__(self, maxEntries=defaultMaxEntries, maxRows=defaultMaxRows):
+        if maxEntries < 1 or maxRows < 1:
+            raise ValueError("maxEntries and maxRows must be at least 1")
+        self.maxEntries = maxEntries
+        self.maxRows = maxRows
+        self.enabled = True
+        self.entries = OrderedDict()
+        self.cachedRows = 0
+        self.dataVersion = None
+        self.watcher = DataVersionWatcher()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0, "uncacheable": 0}
+
+    """
+    Reads the data version of the database (and archive) and drops every cached report if it has moved on.
+    Called with the lock held.
+    """
+    def checkDataVersion(self):
+        watchedVersion = self.watcher.read()
+        #The path too: a watcher re-opened on another file starts counting again
+        dataVersion = (self.watcher.databasePath, watchedVersion)
+        if dataVersion != self.dataVersion:
+            self.stats["invalidations"] += len(self.entries)
+            self.entries.clear()
+            self.cachedRows = 0
+            self.dataVersion = dataVersion
+        return dataVersion
+
+    """
+    Returns the cached records for (name, params), or runs compute() and caches what it returns.
+    The data version is read before compute() runs, so a commit made while the report is running leaves the result
+    filed under the older version, and it is dropped at the next check.
+    Each caller gets its own copy of the list.
+    """
+    def fetch(self, name, params, compute):
+        if not self.enabled:
+            return compute()
+        key = (name, params)
+        with self.lock:
+            dataVersion = self.checkDataVersion()
+            records = self.entries.get(key)
+            if records is not None:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return list(records)
+            self.stats["misses"] += 1
+
+        records = compute()
+        with self.lock:
+            if len(records) > self.maxRows:
+                self.stats["uncacheable"] += 1
+            elif self.dataVersion == dataVersion and key not in self.entries:
+                self.entries[key] = tuple(records)
+                self.cachedRows += len(records)
+                while len(self.entries) > self.maxEntries or self.cachedRows > self.maxRows:
+                    evictedKey, evictedRecords = self.entries.popitem(last=False)
+                    self.cachedRows -= len(evictedRecords)
+                    self.stats["evictions"] += 1
+        return records
+
+    #Drops every cached report
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.cachedRows = 0
+
+    def getStats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+            stats["rows"] = self.cachedRows
+            lookups = stats["hits"] + stats["misses"]
+            stats["hitRate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.watcher.close()
+            self.entries.clear()
+            self.cachedRows = 0
+
+"""
+________________________________________________
+=============• MODULE-LEVEL CACHE •=============
+------------------------------------------------
+"""
+
+reportCache = ReportCache()
+
+"""
+Decorator for a report function: its result is cached under the function's name and the arguments it was called with.
+"""
+def cachedReport(report):
+    @functools.wraps(report)
+    def cached(*args, **kwargs):
+        params = (args, tuple(sorted(kwargs.items())))
+        return reportCache.fetch(report.__name__, params, lambda: report(*args, **kwargs))
+    return cached
+
+"""
+Changes the cache size or switches it off (enabled=False); cached reports are dropped.
+Called with: configureReportCache(maxEntries=64, maxRows=500000)
+"""
+def configureReportCache(maxEntries=None, maxRows=None, enabled=None):
+    with reportCache.lock:
+        if maxEntries is not None:
+            if maxEntries < 1:
+                raise ValueError("maxEntries must be at least 1")
+            reportCache.maxEntries = maxEntries
+        if maxRows is not None:
+            if maxRows < 1:
+                raise ValueError("maxRows must be at least 1")
+            reportCache.maxRows = maxRows
+        if enabled is not None:
+            reportCache.enabled = enabled
+    reportCache.clear()
+
+#Returns the cache counters: hits, misses, invalidations, evictions, uncacheable, entries, rows and hitRate
+def getReportCacheStats():
+    return reportCache.getStats()
+
+def clearReportCache():
+    reportCache.clear()
@@ -0,0 +1,145 @@
+"""
+dbReportPack.py - Report Packs
+    Runs a set of the reports in dbOperations.py side by side instead of one after another, e.g. a manager's
+    morning round of reports, and returns every result together with the time each report took.
+    - Each report runs on a thread of its own with a read-only connection (mode=ro, see dbConnection.py), so the
+      pack takes about as long as its slowest report rather than the sum of them all.
+    - Every connection reads the same snapshot of the database: the reports agree with each other even if staff
+      sessions commit changes while the pack is running (see openSnapshotConnections).
+    - Reports are run directly, not through the report cache (dbReportCache.py): a result read from an older
+      snapshot must not be filed as current.
+    Called with:
+        pack = runReportPack(["pilot-punctuality", "flight-punctuality"])
+        pack.results["pilot-punctuality"], pack.timings, pack.wallSeconds
+"""
+import inspect
+import queue
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dbConnection import getPool, openReadOnlyConnection, attachArchive, isArchiveAttached, archiveSchema
+from dbOperations import (reportPilotFlightCount, reportPilotWorkloadByMonth, reportBusiestTerminal,
+                          reportBusiestTerminalByPeriod, reportTerminalUsageSplit, reportPilotPunctuality,
+                          reportFlightPunctuality)
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+#Most reports run at once; each one running holds a read-only connection
+defaultPackWorkers = 4
+
+#Report name -> (dbOperations report, arguments). Every report that needs no dates; by-period runs by week.
+#The names are the ones 'python main.py report ...' uses.
+packReports = {
+    "pilot-flight-count": (reportPilotFlightCount, ()),
+    "pilot-workload": (reportPilotWorkloadByMonth, ()),
+    "busiest-terminal": (reportBusiestTerminal, ()),
+    "busiest-terminal-by-period": (reportBusiestTerminalByPeriod, ("week",)),
+    "terminal-usage-split": (reportTerminalUsageSplit, ()),
+    "pilot-punctuality": (reportPilotPunctuality, ()),
+    "flight-punctuality": (reportFlightPunctuality, ()),
+}
+
+#A read of each database file, so a read transaction's snapshot is fixed on it straight away
+snapshotQuery = "SELECT COUNT(*) FROM {schema}.sqlite_master"
+
+#How long one report in a pack took; error is None unless the report failed
+ReportPackTiming = namedtuple("ReportPackTiming", ["report", "rows", "milliseconds", "error"])
+reportPackTimingHeaders = ["Report", "Rows", "Milliseconds", "Error"]
+
+#results maps each report name to its records (empty if it failed)
+ReportPack = namedtuple("ReportPack", ["results", "timings", "wallSeconds"])
+
+"""
+____________________________________________
+=============• RUNNING A PACK •=============
+--------------------------------------------
+"""
+"""
+Opens count read-only connections to databasePath, each inside a read transaction on the same snapshot.
+SQLite fixes a connection's snapshot when its transaction first reads a database file. While those first reads
+happen, a short-lived connection holds the write lock (BEGIN IMMEDIATE, on the archive too), so no commit can land
+between one connection's snapshot and the next. The lock is held for a few milliseconds and then let go; in WAL
+mode staff sessions carry on writing while the reports run, and the reports don't see those changes.
+The transactions end when the connections are closed.
+"""
+def openSnapshotConnections(count, databasePath):
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(openReadOnlyConnection(databasePath, getPool().profileName))
+        #A writer of its own: the calling thread's pooled connection may already be inside a transaction
+        writer = sqlite3.connect(databasePath, timeout=getPool().acquireTimeout, isolation_level=None)
+        try:
+            attachArchive(writer, databasePath)
+            writer.execute("BEGIN IMMEDIATE")
+            for conn in connections:
+                conn.execute("BEGIN")
+                schemas = ["main", archiveSchema] if isArchiveAttached(conn) else ["main"]
+                for schema in schemas:
+                    conn.execute(snapshotQuery.format(schema=schema)).fetchall()
+        finally:
+            #Closing the writer ends its empty transaction and lets the lock go
+            writer.close()
+    except (sqlite3.Error, ValueError):
+        for conn in connections:
+            conn.close()
+        raise
+    return connections
+
+"""
+Runs one report on a connection borrowed from idleConnections and times it.
+The shared pool hands that connection to the report (ConnectionPool.useConnection), so it runs unchanged.
+A report that fails is recorded with its error rather than stopping the rest of the pack.
+"""
+def runPackedReport(reportName, idleConnections):
+    report, args = packReports[reportName]
+    conn = idleConnections.get()
+    startedAt = time.perf_counter()
+    records, error = [], None
+    try:
+        with getPool().useConnection(conn):
+            records = inspect.unwrap(report)(*args)
+    except (sqlite3.Error, ValueError) as e:
+        error = str(e)
+    finally:
+        idleConnections.put(conn)
+    milliseconds = round((time.perf_counter() - startedAt) * 1000, 1)
+    return records, ReportPackTiming(reportName, len(records), milliseconds, error)
+
+"""
+Runs the named reports (every report in packReports by default) at once, on at most maxWorkers threads,
+against the database the shared pool points at.
+Raises ValueError for an unknown report name.
+Returns a ReportPack: the records of each report, a ReportPackTiming per report (in the order asked for) and the
+wall time of the whole pack in seconds.
+"""
+def runReportPack(reportNames=None, maxWorkers=defaultPackWorkers):
+    reportNames = list(dict.fromkeys(reportNames or packReports))
+    unknownReports = [reportName for reportName in reportNames if reportName not in packReports]
+    if unknownReports:
+        raise ValueError(f"Unknown report(s): {', '.join(unknownReports)}. Choose from: {', '.join(packReports)}")
+    if maxWorkers < 1:
+        raise ValueError("maxWorkers must be at least 1")
+
+    startedAt = time.perf_counter()
+    workers = min(maxWorkers, len(reportNames))
+    connections = openSnapshotConnections(workers, getPool().databasePath)
+    idleConnections = queue.Queue()
+    for conn in connections:
+        idleConnections.put(conn)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reportPack") as executor:
+            futures = [executor.submit(runPackedReport, reportName, idleConnections) for reportName in reportNames]
+            outcomes = [future.result() for future in futures]
+    finally:
+        for conn in connections:
+            conn.close()
+
+    results = {reportName: records for reportName, (records, timing) in zip(reportNames, outcomes)}
+    timings = [timing for records, timing in outcomes]
+    return ReportPack(results, timings, time.perf_counter() - startedAt)
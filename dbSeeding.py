@@ -1,13 +1,15 @@
 """
 dbSeeding.py - Data Population via Seeding
-    This script seeds flightManagement.db with sample data
+    This script seeds flightManagement.db with sample data.
+    It can also build a large synthetic database for sizing and performance testing (see dbDataGenerator.py).
+    Run with:
+        python dbSeeding.py                                    sample data
+        python dbSeeding.py --synthetic --flights 1000000 --pilots 500 --database big.db
 """
+import argparse
 import sqlite3
 from dbOperations import flightAttributeList
-
-#Establish connection to db
-conn = sqlite3.connect('flightManagement.db')
-cursor = conn.cursor()
+from dbConnection import databaseFile
 
 #Add data to tables in order of reverse dependency (independent to dependent)
 
@@ -26,12 +28,6 @@ destinations = [
     ('CDG', 'Paris Charles de Gaulle', 'France', 'Paris')
 ]
 
-#Use loop in Python to go line by line to populate the tables record by record
-#Use INSERT OR REPLACE to prevent key duplicate errors during re-runs
-for dest in destinations:
-    cursor.execute("INSERT OR REPLACE INTO destination VALUES (?, ?, ?, ?)", dest)
-conn.commit()
-
 #Seed terminal
 terminals = [
     ('N', 'LGW', 'North Terminal'),
@@ -48,10 +44,6 @@ terminals = [
     ('T1', 'LCA', 'Main Terminal'),
     ('1', 'CDG', 'Terminal 1')
 ]
-for term in terminals:
-    cursor.execute("INSERT OR REPLACE INTO terminal VALUES (?, ?, ?)", term)
-conn.commit()
-
 #pilot
 pilots = [
     ('Johnathon Truston', 'j.truston@airline.com', '1996-08-27', 1, 1),
@@ -65,25 +57,15 @@ pilots = [
     ('Elena Andreou', 'e.andreou@airline.com', '1997-08-08', 0, 1),
     ('Olusola Adebayo', 'o.adebayo@airline.com', '1966-10-25', 1, 1)
 ]
-for pilot in pilots:
-    cursor.execute('''INSERT OR REPLACE INTO pilot 
-                   (pilotName, email, dob, isCaptainQualified, isFirstOfficerQualified)
-                   VALUES (?, ?, ?, ?, ?)
-                   ''', pilot)
-conn.commit()
-
 #flight seeding
 #(flightID, schDep, status, capt, FO, arrivDest, depDest, divertedDest, depTerminal, arrTerminal, divTerminal, scheduledArrival, actualArrival, actualDep)
-flightAttributes = ", ".join(flightAttributeList)
-valuePlaceholders = ", ".join(["?"] * len(flightAttributeList)) 
-insertSQL = f"INSERT OR REPLACE INTO flight ({flightAttributes}) VALUES ({valuePlaceholders})"
 flights = [
     # 1. Bristol to Innsbruck, 20.01
     ('EZY2101', '2026-01-20 06:15:00', 'Landed', 1, 2, 'INN', 'BRS', None, 'TERM', '1', None, '2026-01-20 09:15:00', '2026-01-20 09:10:00', '2026-01-20 06:20:00'),
     # 2. Innsbruck to London Heathrow, 20.01
     ('BA601', '2026-01-20 14:00:00', 'Landed', 1, 3, 'LHR', 'INN', None, '1', 'T5', None, '2026-01-20 16:05:00', '2026-01-20 16:15:00', None),
     # 3. Larnaca to Heathrow, 28.01
-    ('BA663', '2026-01-28 14:45:00', 'Landed', 1, 2, 'LHR', 'LCA', None, '1', 'T5', None, '2026-01-28 17:45:00', '2026-01-28 17:50:00', '2026-01-28 14:50:00'),
+    ('BA663', '2026-01-28 14:45:00', 'Landed', 1, 2, 'LHR', 'LCA', None, 'T1', 'T5', None, '2026-01-28 17:45:00', '2026-01-28 17:50:00', '2026-01-28 14:50:00'),
     # 4. Edinburgh to Heathrow, diverted back to Edinburgh
     ('BA1435', '2025-12-02 14:00:00', 'Landed', 6, 7, 'LHR', 'EDI', 'EDI', 'T1', 'T5', 'T1', '2025-12-02 15:30:00', '2025-12-02 15:15:00', '2025-12-02 14:05:00'),
     # 5. INN to LGW, morning
@@ -93,19 +75,89 @@ flights = [
     # 7. INN to BRS
     ('EZY2712', '2026-02-03 22:30:00', 'Scheduled', None, 7, 'INN', 'BRS', None, 'TERM', '1', None, '2026-02-04 01:30:00', None, None),
     # 8. CDG to LCA
-    ('CY381', '2026-02-03 12:40:00', 'In-air', 1, 6, 'LCA', 'CDG', None, '1', '1', None, '2026-02-03 17:50:00', None, '2026-02-03 12:45:00'),
+    ('CY381', '2026-02-03 12:40:00', 'In-air', 1, 6, 'LCA', 'CDG', None, '1', 'T1', None, '2026-02-03 17:50:00', None, '2026-02-03 12:45:00'),
     # 9. CDG to LCA
-    ('CY380', '2026-02-03 22:00:00', 'Scheduled', None, None, 'CDG', 'LCA', None, '1', '1', None, '2026-02-04 01:40:00', None, None),
+    ('CY380', '2026-02-03 22:00:00', 'Scheduled', None, None, 'CDG', 'LCA', None, 'T1', '1', None, '2026-02-04 01:40:00', None, None),
     # 10. CDG to LCA, same flightID as #8
-    ('CY381', '2026-02-19 08:00:00', 'Scheduled', None, None, 'LCA', 'CDG', None, '1', '1', None, '2026-02-05 13:10:00', None, None),
+    ('CY381', '2026-02-19 08:00:00', 'Scheduled', None, None, 'LCA', 'CDG', None, '1', 'T1', None, '2026-02-05 13:10:00', None, None),
     # 11. LCA to LHR (Feb 6 Afternoon)
-    ('BA663', '2026-02-06 14:45:00', 'Scheduled', 7, 6, 'LHR', 'LCA', None, '1', 'T5', None, '2026-02-06 17:45:00', None, None),
+    ('BA663', '2026-02-06 14:45:00', 'Scheduled', 7, 6, 'LHR', 'LCA', None, 'T1', 'T5', None, '2026-02-06 17:45:00', None, None),
     # 12. INN to LHR, 26.02
     ('BA605', '2026-02-26 07:15:00', 'Scheduled', 1, None, 'INN', 'LHR', None, 'T5', '1', None, '2026-02-05 09:20:00', None, None)   
 ]
-for flight in flights:
-    cursor.execute(insertSQL, flight)
 
-conn.commit()
-print("Database seeding complete.")
-conn.close()
\ No newline at end of file
+"""
+Inserts the sample lists above into the database.
+Uses executemany to insert each list in one call rather than record by record, and
+INSERT OR REPLACE to prevent key duplicate errors during re-runs.
+"""
+def seedSampleData(databasePath=databaseFile):
+    #Establish connection to db
+    conn = sqlite3.connect(databasePath)
+    cursor = conn.cursor()
+
+    cursor.executemany("INSERT OR REPLACE INTO destination VALUES (?, ?, ?, ?)", destinations)
+    conn.commit()
+
+    cursor.executemany("INSERT OR REPLACE INTO terminal VALUES (?, ?, ?)", terminals)
+    conn.commit()
+
+    cursor.executemany('''INSERT OR REPLACE INTO pilot 
+                       (pilotName, email, dob, isCaptainQualified, isFirstOfficerQualified)
+                       VALUES (?, ?, ?, ?, ?)
+                       ''', pilots)
+    conn.commit()
+
+    flightAttributes = ", ".join(flightAttributeList)
+    valuePlaceholders = ", ".join(["?"] * len(flightAttributeList)) 
+    insertSQL = f"INSERT OR REPLACE INTO flight ({flightAttributes}) VALUES ({valuePlaceholders})"
+    cursor.executemany(insertSQL, flights)
+
+    conn.commit()
+    print("Database seeding complete.")
+    conn.close()
+
+"""
+Builds the command line parser for the whole script. Every generator setting in
+dbDataGenerator.defaultGeneratorSettings can be given as --settingName value; options that aren't given are left
+out of the parsed result, so the generator's own defaults apply and a forgotten --synthetic can be caught.
+"""
+def buildParser():
+    from dbDataGenerator import defaultGeneratorSettings
+
+    parser = argparse.ArgumentParser(description="Seed flightManagement.db with sample data, or build a synthetic "
+                                                 "flight database with --synthetic.")
+    parser.add_argument("--synthetic", action="store_true", help="build a synthetic database instead of the sample data")
+    synthetic = parser.add_argument_group("synthetic database options (need --synthetic)")
+    synthetic.add_argument("--database", default=argparse.SUPPRESS, help=f"database file (default: {databaseFile})")
+    synthetic.add_argument("--profile", default=argparse.SUPPRESS, help="performance profile (default: balanced)")
+    for settingName, defaultValue in defaultGeneratorSettings.items():
+        settingType = type(defaultValue) if defaultValue is not None else str
+        synthetic.add_argument(f"--{settingName}", type=settingType, default=argparse.SUPPRESS,
+                               help=f"(default: {defaultValue})")
+    return parser
+
+"""
+Builds a synthetic database from the parsed synthetic options (see buildParser).
+"""
+def seedSyntheticData(options):
+    from dbDataGenerator import generateDatabase
+
+    databasePath = options.pop("database", databaseFile)
+    profileName = options.pop("profile", "balanced")
+    summary = generateDatabase(databasePath, profileName, **options)
+
+    print(f"\nSynthetic database written to {databasePath}")
+    for name, value in summary.items():
+        print(f"    {name}: {value}")
+
+if __name__ == "__main__":
+    parser = buildParser()
+    options = vars(parser.parse_args())
+    if options.pop("synthetic"):
+        seedSyntheticData(options)
+    elif options:
+        #Without this, e.g. --flights 1000000 --database big.db would quietly seed the sample data instead
+        parser.error(f"{', '.join('--' + name for name in options)} only apply with --synthetic")
+    else:
+        seedSampleData()
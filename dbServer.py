@@ -0,0 +1,321 @@
+"""
+dbServer.py - HTTP/JSON Service
+    Serves the flight, pilot and report operations of dbOperations.py as JSON over HTTP, for dashboards and scripts
+    on the same machine, using only the standard library (http.server).
+        GET  /flights                  flights a page at a time: ?orderBy=&direction=ASC&pageSize=25&after=<nextAfter>
+        GET  /flights?status=Scheduled also ?destination=LHR or ?unassigned=true; ?columns=flightID,flightStatus
+        GET  /pilots                   every pilot
+        POST /assignments              {"flightID": "BA663", "scheduledDeparture": "2026-02-06 14:45:00",
+                                        "pilotID": 3, "role": "captain" | "first-officer"}
+        GET  /reports                  the report names
+        GET  /reports/<name>           e.g. /reports/busiest-terminal-by-period?period=week&start=2026-01-01
+        GET  /stats                    connection pool, cache and request counters
+    - Every request is answered on a thread of its own; the database work shares the connection pool
+      (dbConnection.py), which is sized with --connections. A request that can't get a connection in time, or finds
+      the database locked, gets 503; any other database error gets 500.
+    - Each response carries a Server-Timing header: db is the time spent in dbOperations, total the whole request.
+    - GET responses carry an ETag built from PRAGMA data_version. A client that sends it back in If-None-Match gets
+      304 Not Modified, without any query being run, until something is committed to the database.
+    Run with:
+        python dbServer.py                          serves http://127.0.0.1:8080
+        python dbServer.py --port 9000 --connections 10 --database other.db
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import uuid
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from dbConnection import configurePool, getPoolStats, DataVersionWatcher, PoolTimeoutError, databaseFile
+from dbReportCache import getReportCacheStats
+from dbReferenceCache import referenceData
+from dbOperations import (flightAttributeList, defaultPageSize, viewFlightPage, viewFlightsByCriteria, viewAllPilots,
+                          assignPilotToFlight, AssignmentConflict, reportPilotFlightCount, reportPilotWorkloadByMonth,
+                          reportBusiestTerminal, reportBusiestTerminalByPeriod, reportTerminalUsageSplit, reportByTimeframe,
+                          reportPilotPunctuality, reportFlightPunctuality)
+
+"""
+___________________________________________
+=============• SETTINGS •=============
+-------------------------------------------
+"""
+
+defaultHost = "127.0.0.1"
+defaultPort = 8080
+defaultConnections = 8
+
+#Seconds a request waits for a pooled connection before it is answered with 503
+defaultAcquireTimeout = 5
+
+maxPageSize = 1000
+
+#Report name -> (dbOperations report, function reading its arguments from the query string)
+serviceReports = {
+    "pilot-flight-count": (reportPilotFlightCount, lambda query: ()),
+    "pilot-workload": (reportPilotWorkloadByMonth, lambda query: ()),
+    "busiest-terminal": (reportBusiestTerminal, lambda query: ()),
+    "busiest-terminal-by-period": (reportBusiestTerminalByPeriod, lambda query: (
+        query.get("period", "day"), query.get("start", "0001-01-01"), query.get("end", "9999-12-31"))),
+    "terminal-usage-split": (reportTerminalUsageSplit, lambda query: ()),
+    "pilot-punctuality": (reportPilotPunctuality, lambda query: ()),
+    "flight-punctuality": (reportFlightPunctuality, lambda query: ()),
+    "timeframe": (reportByTimeframe, lambda query: (
+        requireParameter(query, "start"), toEndOfDay(requireParameter(query, "end")), query.get("pilot"))),
+}
+
+#Role in a POST /assignments body -> the flight column it fills. The roles are those of
+#'python main.py pilot assign --role', so scripts can move between the two; firstOfficer is accepted too.
+assignmentRoles = {"captain": "captainID", "first-officer": "firstOfficerID", "firstOfficer": "firstOfficerID"}
+
+"""
+____________________________________________
+=============• REQUEST HANDLING •=============
+--------------------------------------------
+"""
+
+#A request the service can't carry out, answered with status and message
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def requireParameter(query, name):
+    if not query.get(name):
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"Missing query parameter '{name}'")
+    return query[name]
+
+#An end date without a time covers the whole day, as on the command line (main.py)
+def toEndOfDay(value):
+    return value + " 23:59:59" if len(value.strip()) == 10 else value
+
+#Whether a database error is only a matter of waiting (locked, busy, no free connection), so worth retrying
+def isBusyError(error):
+    if isinstance(error, PoolTimeoutError):
+        return True
+    errorCode = getattr(error, "sqlite_errorcode", None)
+    return errorCode is not None and errorCode & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+def toDictionaries(records):
+    return [record._asdict() for record in records]
+
+"""
+The route functions below take (request, query, body) and return the JSON payload.
+request.runOperation(operation, *args) calls a dbOperations function and adds its time to the db timing.
+"""
+def getFlights(request, query, body):
+    selectedAttributes = query["columns"].split(",") if query.get("columns") else flightAttributeList
+    for criteria, parameter in (("flightStatus", "status"), ("arrivalDestination", "destination")):
+        if query.get(parameter):
+            return {"flights": toDictionaries(request.runOperation(
+                viewFlightsByCriteria, criteria, (query[parameter],), selectedAttributes))}
+    if query.get("unassigned", "").lower() in ("1", "true", "yes"):
+        return {"flights": toDictionaries(request.runOperation(
+            viewFlightsByCriteria, "unassigned", (), selectedAttributes))}
+
+    try:
+        pageSize = min(int(query.get("pageSize", defaultPageSize)), maxPageSize)
+        after = json.loads(query["after"]) if query.get("after") else None
+    except ValueError:
+        raise ServiceError(HTTPStatus.BAD_REQUEST, "pageSize must be a number and after a value from nextAfter")
+    page = request.runOperation(viewFlightPage, selectedAttributes, query.get("orderBy", "scheduledDepartureDateTime"),
+                                query.get("direction", "ASC").upper(), pageSize, after)
+    return {"flights": toDictionaries(page.records), "nextAfter": page.lastKey if page.hasNext else None}
+
+def getPilots(request, query, body):
+    return {"pilots": toDictionaries(request.runOperation(viewAllPilots))}
+
+def getReports(request, query, body, reportName=None):
+    if reportName is None:
+        return {"reports": list(serviceReports)}
+    if reportName not in serviceReports:
+        raise ServiceError(HTTPStatus.NOT_FOUND, f"No report named '{reportName}'")
+    report, readArguments = serviceReports[reportName]
+    return {"report": reportName, "records": toDictionaries(request.runOperation(report, *readArguments(query)))}
+
+def postAssignment(request, query, body):
+    missing = [name for name in ("flightID", "scheduledDeparture", "pilotID", "role") if body.get(name) in (None, "")]
+    if missing:
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"Missing field(s): {', '.join(missing)}")
+    #Checked here so a wrong type is a 400 rather than, e.g., "No pilot with ID abc" from the assignment checks
+    if not isinstance(body["pilotID"], int) or isinstance(body["pilotID"], bool):
+        raise ServiceError(HTTPStatus.BAD_REQUEST, "pilotID must be a whole number")
+    for name in ("flightID", "scheduledDeparture", "role"):
+        if not isinstance(body[name], str):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"{name} must be a string")
+    if body["role"] not in assignmentRoles:
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"role must be one of: {', '.join(assignmentRoles)}")
+    if not request.runOperation(assignPilotToFlight, body["flightID"], body["scheduledDeparture"], body["pilotID"],
+                                assignmentRoles[body["role"]]):
+        raise ServiceError(HTTPStatus.NOT_FOUND, "No scheduled flight matches that flight ID and departure time")
+    return {"assigned": True}
+
+def getStats(request, query, body):
+    with serviceStatsLock:
+        requests = dict(serviceStats)
+    return {"requests": requests, "pool": getPoolStats(), "reportCache": getReportCacheStats(),
+            "referenceData": referenceData.getStats()}
+
+#(method, first path segment) -> (route function, whether responses carry an ETag)
+routes = {
+    ("GET", "flights"): (getFlights, True),
+    ("GET", "pilots"): (getPilots, True),
+    ("GET", "reports"): (getReports, True),
+    ("GET", "stats"): (getStats, False),
+    ("POST", "assignments"): (postAssignment, False),
+}
+
+#Request counters for /stats: served, notModified, clientErrors, serverErrors
+serviceStats = {"served": 0, "notModified": 0, "clientErrors": 0, "serverErrors": 0}
+serviceStatsLock = threading.Lock()
+
+"""
+The ETag of every GET response: the data version of the database and archive, with a token for this run of the
+server, since data_version starts counting again on a new connection.
+A change to any table changes every ETag; it is read before the query runs, so a response is never labelled
+newer than its data.
+"""
+dataVersionWatcher = DataVersionWatcher()
+serverRunToken = uuid.uuid4().hex[:8]
+
+def currentETag():
+    dataVersion = dataVersionWatcher.read()
+    versionText = ".".join(map(str, dataVersion)) if isinstance(dataVersion, tuple) else str(dataVersion)
+    return f'"{serverRunToken}-{versionText}"'
+
+"""
+FlightServiceHandler
+    Parses each request, finds its route, and writes the JSON response with the timing and ETag headers.
+"""
+class FlightServiceHandler(BaseHTTPRequestHandler):
+    server_version = "FlightManagement/1.0"
+    #Keep-alive: a dashboard polling the service reuses one connection
+    protocol_version = "HTTP/1.1"
+    #Headers and body are written separately; without this, Nagle's algorithm holds the body back ~40ms
+    disable_nagle_algorithm = True
+    verbose = False
+
+    def do_GET(self):
+        self.handleRequest("GET")
+
+    def do_POST(self):
+        self.handleRequest("POST")
+
+    def runOperation(self, operation, *args):
+        startedAt = time.perf_counter()
+        try:
+            return operation(*args)
+        finally:
+            self.databaseSeconds += time.perf_counter() - startedAt
+
+    def handleRequest(self, method):
+        self.startedAt = time.perf_counter()
+        self.databaseSeconds = 0.0
+        url = urlsplit(self.path)
+        pathParts = [part for part in url.path.split("/") if part]
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        etag = None
+        try:
+            #Read first, so the body never stays in the connection to be mistaken for the next request
+            body = self.readBody()
+            if not pathParts or (method, pathParts[0]) not in routes:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"No route for {method} {url.path}")
+            route, usesETag = routes[(method, pathParts[0])]
+            if usesETag:
+                etag = currentETag()
+                if self.headers.get("If-None-Match") in (etag, "*"):
+                    self.sendResponse(HTTPStatus.NOT_MODIFIED, None, etag)
+                    return
+            payload = route(self, query, body, *pathParts[1:2])
+            self.sendResponse(HTTPStatus.CREATED if method == "POST" else HTTPStatus.OK, payload, etag)
+        except ServiceError as e:
+            self.sendResponse(e.status, {"error": str(e)})
+        except AssignmentConflict as e:
+            self.sendResponse(HTTPStatus.CONFLICT, {"error": str(e)})
+        except (ValueError, TypeError) as e:
+            self.sendResponse(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except sqlite3.Error as e:
+            #503 asks the client to try again later; anything else (a missing table, an interrupted query) won't mend
+            if isBusyError(e):
+                self.sendResponse(HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"Database busy: {e}"})
+            else:
+                self.sendResponse(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Database error: {e}"})
+        except Exception as e:
+            #Answer rather than drop the keep-alive connection; the traceback goes to the server's log
+            self.log_error("Unexpected error handling %s %s: %r", method, url.path, e)
+            traceback.print_exc()
+            self.sendResponse(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"})
+
+    #The JSON body of a POST, or {} for a request without one
+    def readBody(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "The request body isn't valid JSON")
+        if not isinstance(body, dict):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "The request body must be a JSON object")
+        return body
+
+    def sendResponse(self, status, payload, etag=None):
+        content = b"" if payload is None else json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        totalMs = (time.perf_counter() - self.startedAt) * 1000
+        self.send_header("Server-Timing", f"db;dur={self.databaseSeconds * 1000:.2f}, total;dur={totalMs:.2f}")
+        self.end_headers()
+        self.wfile.write(content)
+
+        counter = ("notModified" if status == HTTPStatus.NOT_MODIFIED else "serverErrors" if status >= 500
+                   else "clientErrors" if status >= 400 else "served")
+        with serviceStatsLock:
+            serviceStats[counter] += 1
+
+    #Request lines are only logged with --verbose
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+"""
+Creates the server on host:port, with the shared pool pointed at databasePath and holding up to connections.
+Port 0 picks a free port (see server.server_address). Call serve_forever() to start answering requests.
+"""
+def createServer(host=defaultHost, port=defaultPort, databasePath=databaseFile, connections=defaultConnections):
+    configurePool(databasePath=databasePath, maxConnections=connections, acquireTimeout=defaultAcquireTimeout)
+    server = ThreadingHTTPServer((host, port), FlightServiceHandler)
+    server.daemon_threads = True
+    return server
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Serve the flight, pilot and report operations as JSON over HTTP.")
+    parser.add_argument("--host", default=defaultHost, help=f"address to listen on (default: {defaultHost})")
+    parser.add_argument("--port", type=int, default=defaultPort)
+    parser.add_argument("--database", default=databaseFile, help="database file to serve")
+    parser.add_argument("--connections", type=int, default=defaultConnections, help="size of the connection pool")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    options = parser.parse_args(args)
+
+    FlightServiceHandler.verbose = options.verbose
+    server = createServer(options.host, options.port, options.database, options.connections)
+    print(f"Serving {options.database} on http://{server.server_address[0]}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -3,29 +3,17 @@ dbSetup.py - Database Initialisation
     This script creates the relational schema for the Flight Management System.
     It contains queries necessary to create schemas, set-up tables and views and it defines primary and foreign keys. 
     It drops existing the schemas at the beginning of each run for a clean slate. 
+    It also records the SQLite performance profile (see dbProfiles.py) that connections to the database should use.
+    Run with: python dbSetup.py [durable | balanced | bulk-load]
 """
 
+import os
+import sys
 import sqlite3
 from dbOperations import allowedFlightStatus
-
-#Establish connection to database file
-conn = sqlite3.connect('flightManagement.db')
-cursor = conn.cursor()
-
-#Drop existing tables in order of dependency (dependent to independent) to avoid foreign key dependencies
-cursor.execute('DROP TABLE IF EXISTS flight')
-cursor.execute('DROP TABLE IF EXISTS terminal')
-cursor.execute('DROP TABLE IF EXISTS pilot')
-cursor.execute('DROP TABLE IF EXISTS destination')
-
-print('Drop tables script complete.')
-
-
-#Drop existing views
-cursor.execute('DROP VIEW IF EXISTS departurePerformance')
-cursor.execute('DROP VIEW IF EXISTS arrivalPerformance')
-
-print('Drop views script complete.')
+from dbConnection import databaseFile, getArchivePath
+from dbReferenceCache import referenceTables, referenceDataVersionPrefix
+from dbProfiles import defaultProfile, getProfileSettings, storeProfile, applyPragmas
 
 #Create tables, in order of reverse dependency (independent to dependent). 
 #Independent tables have no foreign keys and are created first.
@@ -66,8 +54,33 @@ createPilotTable = '''
 #Check constraint for flightStatus, which is an attribute in the flight table
 flightStatusConstraint = ", ".join([f"'{s}'" for s in allowedFlightStatus])
 
+#Integer copies of the flight times, as seconds since 1970 (UTC), for range queries and arithmetic on times.
+#STORED so the integers are kept in the table rather than parsed from the text on every read; NULL for a missing time.
+#The text columns stay as the primary key and the values shown to staff.
+flightEpochColumns = [
+    f"""{column.replace("DateTime", "Epoch")} INTEGER GENERATED ALWAYS AS
+        (CAST(strftime('%s', {column}) AS INTEGER)) STORED"""
+    for column in ("scheduledDepartureDateTime", "scheduledArrivalDateTime", "actualDepartureDateTime", "actualArrivalDateTime")
+]
+
+#Calculated punctuality columns on flight, worked out by SQLite from the integer times above.
+#Delays are whole minutes (negative when early) and NULL until the actual time is recorded.
+#Statuses follow the performance views: a flight is On Time until it's proven to be Delayed.
+#VIRTUAL, as they are cheap to work out from the stored integers.
+flightPerformanceColumns = [
+    """departureDelayMinutes INTEGER GENERATED ALWAYS AS
+        (CAST(round((actualDepartureEpoch - scheduledDepartureEpoch) / 60.0) AS INTEGER)) VIRTUAL""",
+    """arrivalDelayMinutes INTEGER GENERATED ALWAYS AS
+        (CAST(round((actualArrivalEpoch - scheduledArrivalEpoch) / 60.0) AS INTEGER)) VIRTUAL""",
+    """departureStatus VARCHAR GENERATED ALWAYS AS
+        (CASE WHEN actualDepartureEpoch > scheduledDepartureEpoch THEN 'Delayed' ELSE 'On Time' END) VIRTUAL""",
+    """arrivalStatus VARCHAR GENERATED ALWAYS AS
+        (CASE WHEN actualArrivalEpoch > scheduledArrivalEpoch THEN 'Delayed' ELSE 'On Time' END) VIRTUAL""",
+]
+
 #Flight table for storing flight details
 #Has many foreign keys and uses the contraint above
+#Terminal IDs are only unique within a destination, so terminal foreign keys reference the full (terminalID, destinationID) key
 createFlightTable = f'''
                     CREATE TABLE flight (
                         flightID VARCHAR NOT NULL,
@@ -84,68 +97,618 @@ createFlightTable = f'''
                         scheduledArrivalDateTime DATETIME NOT NULL,
                         actualArrivalDateTime DATETIME,
                         actualDepartureDateTime DATETIME,
+                        {", ".join(flightEpochColumns)},
+                        {", ".join(flightPerformanceColumns)},
                         PRIMARY KEY (flightID, scheduledDepartureDateTime),
                         FOREIGN KEY (captainID) REFERENCES pilot(pilotID),
                         FOREIGN KEY (firstOfficerID) REFERENCES pilot(pilotID),
                         FOREIGN KEY (arrivalDestinationID) REFERENCES destination(destinationID),
                         FOREIGN KEY (departureDestinationID) REFERENCES destination(destinationID),
                         FOREIGN KEY (diversionDestinationID) REFERENCES destination(destinationID),
-                        FOREIGN KEY (departureTerminalID) REFERENCES terminal(terminalID),
-                        FOREIGN KEY (arrivalTerminalID) REFERENCES terminal(terminalID)
-                        FOREIGN KEY (diversionTerminalID) REFERENCES terminal(terminalID)
+                        FOREIGN KEY (departureTerminalID, departureDestinationID) REFERENCES terminal(terminalID, destinationID),
+                        FOREIGN KEY (arrivalTerminalID, arrivalDestinationID) REFERENCES terminal(terminalID, destinationID),
+                        FOREIGN KEY (diversionTerminalID, diversionDestinationID) REFERENCES terminal(terminalID, destinationID)
                     );
                     '''
 
-print('Table creation script complete.')
+#Table linking pilots to the flights they crew, one row per pilot per flight.
+#It holds the same assignments as flight.captainID / flight.firstOfficerID, kept in step by the triggers below,
+#so pilot queries can read one indexed table instead of a UNION over both flight columns.
+#scheduledArrivalDateTime is copied from flight so schedule and availability checks don't need to join back to it,
+#and the actual times so the pilot punctuality rollup can be maintained from this table alone.
+createCrewAssignmentTable = '''
+                    CREATE TABLE IF NOT EXISTS crewAssignment (
+                        flightID VARCHAR NOT NULL,
+                        scheduledDepartureDateTime DATETIME NOT NULL,
+                        role VARCHAR NOT NULL CHECK (role IN ('Captain', 'First Officer')),
+                        pilotID INTEGER NOT NULL,
+                        scheduledArrivalDateTime DATETIME NOT NULL,
+                        actualDepartureDateTime DATETIME,
+                        actualArrivalDateTime DATETIME,
+                        PRIMARY KEY (flightID, scheduledDepartureDateTime, role),
+                        FOREIGN KEY (pilotID) REFERENCES pilot(pilotID)
+                    ) WITHOUT ROWID;
+                    '''
+
+#Copies the NEW flight row's crew into crewAssignment; shared by the insert and update triggers below
+insertCrewForFlight = '''
+                            INSERT INTO crewAssignment (flightID, scheduledDepartureDateTime, role, pilotID, scheduledArrivalDateTime,
+                                                        actualDepartureDateTime, actualArrivalDateTime)
+                            SELECT NEW.flightID, NEW.scheduledDepartureDateTime, 'Captain', NEW.captainID, NEW.scheduledArrivalDateTime,
+                                   NEW.actualDepartureDateTime, NEW.actualArrivalDateTime
+                            WHERE NEW.captainID IS NOT NULL
+                            UNION ALL
+                            SELECT NEW.flightID, NEW.scheduledDepartureDateTime, 'First Officer', NEW.firstOfficerID, NEW.scheduledArrivalDateTime,
+                                   NEW.actualDepartureDateTime, NEW.actualArrivalDateTime
+                            WHERE NEW.firstOfficerID IS NOT NULL;'''
+
+#Triggers keeping crewAssignment in step with flight.
+#The insert trigger clears the key first because INSERT OR REPLACE on flight doesn't fire the delete trigger.
+createCrewAssignmentTriggers = [
+    f'''CREATE TRIGGER IF NOT EXISTS trgFlightCrewInsert AFTER INSERT ON flight
+        BEGIN
+            DELETE FROM crewAssignment
+            WHERE flightID = NEW.flightID AND scheduledDepartureDateTime = NEW.scheduledDepartureDateTime;
+            {insertCrewForFlight}
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trgFlightCrewUpdate
+        AFTER UPDATE OF flightID, scheduledDepartureDateTime, scheduledArrivalDateTime, captainID, firstOfficerID ON flight
+        BEGIN
+            DELETE FROM crewAssignment
+            WHERE flightID = OLD.flightID AND scheduledDepartureDateTime = OLD.scheduledDepartureDateTime;
+            {insertCrewForFlight}
+        END''',
+    #Recording actual times only copies them across, without rewriting the crew rows
+    '''CREATE TRIGGER IF NOT EXISTS trgFlightCrewActuals AFTER UPDATE OF actualDepartureDateTime, actualArrivalDateTime ON flight
+        BEGIN
+            UPDATE crewAssignment
+            SET actualDepartureDateTime = NEW.actualDepartureDateTime, actualArrivalDateTime = NEW.actualArrivalDateTime
+            WHERE flightID = NEW.flightID AND scheduledDepartureDateTime = NEW.scheduledDepartureDateTime;
+        END''',
+    '''CREATE TRIGGER IF NOT EXISTS trgFlightCrewDelete AFTER DELETE ON flight
+        BEGIN
+            DELETE FROM crewAssignment
+            WHERE flightID = OLD.flightID AND scheduledDepartureDateTime = OLD.scheduledDepartureDateTime;
+        END''',
+]
+
+#Fills crewAssignment from the crew already recorded on flight, e.g. when migrating an existing database
+backfillCrewAssignment = '''
+                    INSERT OR REPLACE INTO crewAssignment
+                        (flightID, scheduledDepartureDateTime, role, pilotID, scheduledArrivalDateTime,
+                        actualDepartureDateTime, actualArrivalDateTime)
+                    SELECT flightID, scheduledDepartureDateTime, 'Captain', captainID, scheduledArrivalDateTime,
+                        actualDepartureDateTime, actualArrivalDateTime
+                    FROM flight WHERE captainID IS NOT NULL
+                    UNION ALL
+                    SELECT flightID, scheduledDepartureDateTime, 'First Officer', firstOfficerID, scheduledArrivalDateTime,
+                        actualDepartureDateTime, actualArrivalDateTime
+                    FROM flight WHERE firstOfficerID IS NOT NULL
+                    '''
+
+#R*Tree interval index over crew duty periods, for "which pilots are busy between start and end?".
+#One entry per crewAssignment row: the first dimension is the duty period in whole minutes since 1970,
+#the second the pilot (minPilotID = maxPilotID), so one search can cover every pilot or just one.
+#Minutes are rounded outwards (start down, end up), so the index never misses an overlap; queries then compare the
+#exact times kept alongside (the + columns, stored but not indexed).
+#source: https://www.sqlite.org/rtree.html
+createCrewDutyIndex = '''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS crewDutyIndex USING rtree_i32 (
+                        id,
+                        startMinute, endMinute,
+                        minPilotID, maxPilotID,
+                        +flightID, +scheduledDepartureDateTime, +scheduledArrivalDateTime, +role
+                    );
+                    '''
+
+#SQL for a date time as whole minutes since 1970, rounded down or up
+def epochMinuteFloor(dateTime):
+    return f"(CAST(strftime('%s', {dateTime}) AS INTEGER) / 60)"
+
+def epochMinuteCeiling(dateTime):
+    return f"((CAST(strftime('%s', {dateTime}) AS INTEGER) + 59) / 60)"
+
+#Adds the NEW crewAssignment row's duty period; max() keeps the interval valid if arrival was entered before departure
+addCrewDuty = f'''
+            INSERT INTO crewDutyIndex (startMinute, endMinute, minPilotID, maxPilotID,
+                                       flightID, scheduledDepartureDateTime, scheduledArrivalDateTime, role)
+            VALUES ({epochMinuteFloor("NEW.scheduledDepartureDateTime")},
+                    max({epochMinuteCeiling("NEW.scheduledArrivalDateTime")}, {epochMinuteFloor("NEW.scheduledDepartureDateTime")}),
+                    NEW.pilotID, NEW.pilotID,
+                    NEW.flightID, NEW.scheduledDepartureDateTime, NEW.scheduledArrivalDateTime, NEW.role);'''
+
+#Removes the OLD crewAssignment row's duty period, found through the index by pilot and start minute
+removeCrewDuty = f'''
+            DELETE FROM crewDutyIndex
+            WHERE minPilotID = OLD.pilotID AND maxPilotID = OLD.pilotID
+            AND startMinute = {epochMinuteFloor("OLD.scheduledDepartureDateTime")}
+            AND flightID = OLD.flightID AND scheduledDepartureDateTime = OLD.scheduledDepartureDateTime AND role = OLD.role;'''
+
+#Triggers on crewAssignment keeping crewDutyIndex in step with it
+createCrewDutyTriggers = [
+    f'''CREATE TRIGGER IF NOT EXISTS trgCrewDutyInsert AFTER INSERT ON crewAssignment
+        BEGIN
+            {addCrewDuty}
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trgCrewDutyDelete AFTER DELETE ON crewAssignment
+        BEGIN
+            {removeCrewDuty}
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trgCrewDutyUpdate
+        AFTER UPDATE OF pilotID, scheduledDepartureDateTime, scheduledArrivalDateTime, role ON crewAssignment
+        BEGIN
+            {removeCrewDuty}
+            {addCrewDuty}
+        END''',
+]
+
+#Fills crewDutyIndex from crewAssignment, e.g. when migrating an existing database
+backfillCrewDutyIndex = f'''
+                    INSERT INTO crewDutyIndex (startMinute, endMinute, minPilotID, maxPilotID,
+                                               flightID, scheduledDepartureDateTime, scheduledArrivalDateTime, role)
+                    SELECT {epochMinuteFloor("scheduledDepartureDateTime")},
+                        max({epochMinuteCeiling("scheduledArrivalDateTime")}, {epochMinuteFloor("scheduledDepartureDateTime")}),
+                        pilotID, pilotID, flightID, scheduledDepartureDateTime, scheduledArrivalDateTime, role
+                    FROM crewAssignment
+                    '''
+
+#The summary tables count every flight ever flown, so moving flights into the archive (dbArchive.py) mustn't
+#take them off. dbArchive adds this dbSettings row inside its delete transaction and the summary delete triggers
+#check for it; no other connection ever sees the row.
+archiveInProgressSetting = "archiveInProgress"
+notArchiving = f"NOT EXISTS (SELECT 1 FROM dbSettings WHERE settingName = '{archiveInProgressSetting}')"
+
+#Summary table of flights per pilot per month, read by reportPilotWorkloadByMonth instead of grouping every crewAssignment row.
+#Kept up to date by the triggers below; python dbSummaries.py verify checks it against a full recompute.
+createPilotMonthlyWorkloadTable = '''
+                    CREATE TABLE IF NOT EXISTS pilotMonthlyWorkload (
+                        month CHAR(7) NOT NULL,
+                        pilotID INTEGER NOT NULL,
+                        flights INTEGER NOT NULL CHECK (flights > 0),
+                        PRIMARY KEY (month, pilotID)
+                    ) WITHOUT ROWID;
+                    '''
+
+#Full recompute of pilotMonthlyWorkload straight from the flights, used to rebuild and verify the summary (see dbSummaries.py).
+#{flights} is filled with flight, or flight and the archive together (see getFlightSource in dbSummaries.py)
+recomputePilotMonthlyWorkload = '''
+                    SELECT strftime('%Y-%m', scheduledDepartureDateTime) AS month, pilotID, COUNT(*) AS flights
+                    FROM (
+                        SELECT captainID AS pilotID, scheduledDepartureDateTime FROM {flights} WHERE captainID IS NOT NULL
+                        UNION ALL
+                        SELECT firstOfficerID, scheduledDepartureDateTime FROM {flights} WHERE firstOfficerID IS NOT NULL
+                    )
+                    GROUP BY month, pilotID
+                    '''
+
+#Triggers on crewAssignment, which the flight triggers rewrite whenever crew or departure times change,
+#so a reassignment or a move to another month is a -1 for the old (month, pilot) and a +1 for the new one.
+#Rows that reach 0 flights are removed so the table only holds months a pilot actually flew.
+createPilotMonthlyWorkloadTriggers = [
+    '''CREATE TRIGGER IF NOT EXISTS trgCrewWorkloadInsert AFTER INSERT ON crewAssignment
+        BEGIN
+            INSERT INTO pilotMonthlyWorkload (month, pilotID, flights)
+            VALUES (strftime('%Y-%m', NEW.scheduledDepartureDateTime), NEW.pilotID, 1)
+            ON CONFLICT (month, pilotID) DO UPDATE SET flights = flights + 1;
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trgCrewWorkloadDelete AFTER DELETE ON crewAssignment WHEN {notArchiving}
+        BEGIN
+            DELETE FROM pilotMonthlyWorkload
+            WHERE month = strftime('%Y-%m', OLD.scheduledDepartureDateTime) AND pilotID = OLD.pilotID AND flights = 1;
+            UPDATE pilotMonthlyWorkload SET flights = flights - 1
+            WHERE month = strftime('%Y-%m', OLD.scheduledDepartureDateTime) AND pilotID = OLD.pilotID;
+        END''',
+    '''CREATE TRIGGER IF NOT EXISTS trgCrewWorkloadUpdate
+        AFTER UPDATE OF scheduledDepartureDateTime, pilotID ON crewAssignment
+        BEGIN
+            DELETE FROM pilotMonthlyWorkload
+            WHERE month = strftime('%Y-%m', OLD.scheduledDepartureDateTime) AND pilotID = OLD.pilotID AND flights = 1;
+            UPDATE pilotMonthlyWorkload SET flights = flights - 1
+            WHERE month = strftime('%Y-%m', OLD.scheduledDepartureDateTime) AND pilotID = OLD.pilotID;
+            INSERT INTO pilotMonthlyWorkload (month, pilotID, flights)
+            VALUES (strftime('%Y-%m', NEW.scheduledDepartureDateTime), NEW.pilotID, 1)
+            ON CONFLICT (month, pilotID) DO UPDATE SET flights = flights + 1;
+        END''',
+]
+
+#Per-pilot punctuality rollup read by reportPilotPunctuality, one row per pilot with at least one recorded actual time.
+#On time means the actual time is no later than scheduled; a time that isn't recorded yet counts as neither.
+createPilotPunctualityTable = '''
+                    CREATE TABLE IF NOT EXISTS pilotPunctuality (
+                        pilotID INTEGER NOT NULL PRIMARY KEY,
+                        departuresOnTime INTEGER NOT NULL,
+                        departuresDelayed INTEGER NOT NULL,
+                        arrivalsOnTime INTEGER NOT NULL,
+                        arrivalsDelayed INTEGER NOT NULL
+                    );
+                    '''
+
+#Full recompute of pilotPunctuality straight from the flights, used to rebuild and verify the rollup (see dbSummaries.py).
+#{flights} is filled with flight, or flight and the archive together (see getFlightSource in dbSummaries.py)
+recomputePilotPunctuality = '''
+                    SELECT pilotID,
+                        SUM(COALESCE(actualDepartureDateTime <= scheduledDepartureDateTime, 0)) AS departuresOnTime,
+                        SUM(COALESCE(actualDepartureDateTime > scheduledDepartureDateTime, 0)) AS departuresDelayed,
+                        SUM(COALESCE(actualArrivalDateTime <= scheduledArrivalDateTime, 0)) AS arrivalsOnTime,
+                        SUM(COALESCE(actualArrivalDateTime > scheduledArrivalDateTime, 0)) AS arrivalsDelayed
+                    FROM (
+                        SELECT captainID AS pilotID, scheduledDepartureDateTime, actualDepartureDateTime,
+                            scheduledArrivalDateTime, actualArrivalDateTime
+                        FROM {flights} WHERE captainID IS NOT NULL
+                        UNION ALL
+                        SELECT firstOfficerID, scheduledDepartureDateTime, actualDepartureDateTime,
+                            scheduledArrivalDateTime, actualArrivalDateTime
+                        FROM {flights} WHERE firstOfficerID IS NOT NULL
+                    )
+                    WHERE actualDepartureDateTime IS NOT NULL OR actualArrivalDateTime IS NOT NULL
+                    GROUP BY pilotID
+                    '''
+
+#Adds the NEW crewAssignment row's flight to its pilot's counts; shared by the insert and update triggers below
+addPilotPunctuality = '''
+            INSERT INTO pilotPunctuality (pilotID, departuresOnTime, departuresDelayed, arrivalsOnTime, arrivalsDelayed)
+            SELECT NEW.pilotID,
+                COALESCE(NEW.actualDepartureDateTime <= NEW.scheduledDepartureDateTime, 0),
+                COALESCE(NEW.actualDepartureDateTime > NEW.scheduledDepartureDateTime, 0),
+                COALESCE(NEW.actualArrivalDateTime <= NEW.scheduledArrivalDateTime, 0),
+                COALESCE(NEW.actualArrivalDateTime > NEW.scheduledArrivalDateTime, 0)
+            WHERE NEW.actualDepartureDateTime IS NOT NULL OR NEW.actualArrivalDateTime IS NOT NULL
+            ON CONFLICT (pilotID) DO UPDATE SET
+                departuresOnTime = departuresOnTime + excluded.departuresOnTime,
+                departuresDelayed = departuresDelayed + excluded.departuresDelayed,
+                arrivalsOnTime = arrivalsOnTime + excluded.arrivalsOnTime,
+                arrivalsDelayed = arrivalsDelayed + excluded.arrivalsDelayed;'''
+
+#Takes the OLD crewAssignment row's flight off its pilot's counts, removing the row once nothing is left
+removePilotPunctuality = '''
+            UPDATE pilotPunctuality SET
+                departuresOnTime = departuresOnTime - COALESCE(OLD.actualDepartureDateTime <= OLD.scheduledDepartureDateTime, 0),
+                departuresDelayed = departuresDelayed - COALESCE(OLD.actualDepartureDateTime > OLD.scheduledDepartureDateTime, 0),
+                arrivalsOnTime = arrivalsOnTime - COALESCE(OLD.actualArrivalDateTime <= OLD.scheduledArrivalDateTime, 0),
+                arrivalsDelayed = arrivalsDelayed - COALESCE(OLD.actualArrivalDateTime > OLD.scheduledArrivalDateTime, 0)
+            WHERE pilotID = OLD.pilotID;
+            DELETE FROM pilotPunctuality
+            WHERE pilotID = OLD.pilotID
+            AND departuresOnTime + departuresDelayed + arrivalsOnTime + arrivalsDelayed = 0;'''
+
+#Triggers on crewAssignment keeping pilotPunctuality up to date.
+#Recording an actual time on flight updates the crewAssignment rows (trgFlightCrewActuals), so the update trigger
+#takes off each pilot's OLD contribution and adds the NEW one.
+createPilotPunctualityTriggers = [
+    f'''CREATE TRIGGER IF NOT EXISTS trgCrewPunctualityInsert AFTER INSERT ON crewAssignment
+        BEGIN
+            {addPilotPunctuality}
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trgCrewPunctualityDelete AFTER DELETE ON crewAssignment WHEN {notArchiving}
+        BEGIN
+            {removePilotPunctuality}
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trgCrewPunctualityUpdate AFTER UPDATE ON crewAssignment
+        BEGIN
+            {removePilotPunctuality}
+            {addPilotPunctuality}
+        END''',
+]
+
+#Counters of terminal use per airport, terminal, kind of use and day, read by the busiest terminal reports
+#instead of unioning the three terminal columns of every flight. Departures count on the scheduled departure day,
+#arrivals and diversions on the scheduled arrival day.
+createTerminalUsageTable = '''
+                    CREATE TABLE IF NOT EXISTS terminalUsage (
+                        destinationID CHAR NOT NULL,
+                        terminalID VARCHAR NOT NULL,
+                        usageKind VARCHAR NOT NULL CHECK (usageKind IN ('Departure', 'Arrival', 'Diversion')),
+                        day DATE NOT NULL,
+                        usageCount INTEGER NOT NULL CHECK (usageCount > 0),
+                        PRIMARY KEY (destinationID, terminalID, usageKind, day)
+                    ) WITHOUT ROWID;
+                    '''
+
+#(usageKind, airport column, terminal column, time column) for each way a flight can use a terminal
+terminalUsageColumns = [
+    ("Departure", "departureDestinationID", "departureTerminalID", "scheduledDepartureDateTime"),
+    ("Arrival", "arrivalDestinationID", "arrivalTerminalID", "scheduledArrivalDateTime"),
+    ("Diversion", "diversionDestinationID", "diversionTerminalID", "scheduledArrivalDateTime"),
+]
+
+"""
+Returns a SELECT of the (destinationID, terminalID, usageKind, day) keys a flight uses, one row per terminal.
+row is NEW inside a trigger, or a table alias named in fromClause.
+"""
+def selectTerminalUsageKeys(row, fromClause=""):
+    return "\n            UNION ALL\n".join(
+        f"""            SELECT {row}.{airport} AS destinationID, {row}.{terminal} AS terminalID, '{usageKind}' AS usageKind,
+                date({row}.{time}) AS day {fromClause}
+            WHERE {row}.{airport} IS NOT NULL AND {row}.{terminal} IS NOT NULL"""
+        for usageKind, airport, terminal, time in terminalUsageColumns)
+
+#Full recompute of terminalUsage straight from the flights, used to rebuild and verify the counters (see dbSummaries.py).
+#{flights} is filled with flight, or flight and the archive together (see getFlightSource in dbSummaries.py)
+recomputeTerminalUsage = f'''
+            SELECT destinationID, terminalID, usageKind, day, COUNT(*) AS usageCount
+            FROM (
+{selectTerminalUsageKeys("f", "FROM {flights} f")}
+            )
+            GROUP BY destinationID, terminalID, usageKind, day
+            '''
+
+#Adds 1 to the counter of each terminal the NEW flight row uses
+addTerminalUsage = f'''
+            INSERT INTO terminalUsage (destinationID, terminalID, usageKind, day, usageCount)
+            SELECT *, 1 FROM (
+{selectTerminalUsageKeys("NEW")}
+            ) WHERE 1
+            ON CONFLICT (destinationID, terminalID, usageKind, day) DO UPDATE SET usageCount = usageCount + 1;'''
+
+"""
+Takes 1 off the counter of each terminal a flight row used, removing counters that reach 0.
+columnOf maps a flight column name to the SQL for its value, e.g. OLD.departureTerminalID.
+Each kind of use is matched on the full primary key, so only the affected counters are read.
+"""
+def removeTerminalUsage(columnOf):
+    statements = []
+    for usageKind, airport, terminal, time in terminalUsageColumns:
+        usageKey = (f"destinationID = {columnOf(airport)} AND terminalID = {columnOf(terminal)}"
+                    f" AND usageKind = '{usageKind}' AND day = date({columnOf(time)})")
+        statements.append(f"""
+            DELETE FROM terminalUsage WHERE {usageKey} AND usageCount = 1;
+            UPDATE terminalUsage SET usageCount = usageCount - 1 WHERE {usageKey};""")
+    return "".join(statements)
+
+#The value of a column of the flight row an INSERT OR REPLACE is about to replace (NULL when there is none)
+def replacedFlightColumn(column):
+    return f"""(SELECT {column} FROM flight
+                WHERE flightID = NEW.flightID AND scheduledDepartureDateTime = NEW.scheduledDepartureDateTime)"""
+
+#Triggers on flight keeping terminalUsage up to date.
+#INSERT OR REPLACE on flight (seeding, bulk import) removes the old row without firing the delete trigger,
+#so the BEFORE INSERT trigger takes off the counts of the row the insert is about to replace, when there is one.
+#If a plain INSERT then fails on the primary key, the whole statement, trigger changes included, is rolled back.
+createTerminalUsageTriggers = [
+    f'''CREATE TRIGGER IF NOT EXISTS trgFlightTerminalUsageReplace BEFORE INSERT ON flight
+        WHEN EXISTS (SELECT 1 FROM flight
+                     WHERE flightID = NEW.flightID AND scheduledDepartureDateTime = NEW.scheduledDepartureDateTime)
+        BEGIN
+            {removeTerminalUsage(replacedFlightColumn)}
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trgFlightTerminalUsageInsert AFTER INSERT ON flight
+        BEGIN
+            {addTerminalUsage}
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trgFlightTerminalUsageUpdate
+        AFTER UPDATE OF departureDestinationID, departureTerminalID, arrivalDestinationID, arrivalTerminalID,
+            diversionDestinationID, diversionTerminalID, scheduledDepartureDateTime, scheduledArrivalDateTime ON flight
+        BEGIN
+            {removeTerminalUsage(lambda column: f"OLD.{column}")}
+            {addTerminalUsage}
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trgFlightTerminalUsageDelete AFTER DELETE ON flight WHEN {notArchiving}
+        BEGIN
+            {removeTerminalUsage(lambda column: f"OLD.{column}")}
+        END''',
+]
 
 #Create view for calculated field departureStatus
-    #This view calculates the field departureStatus, giving it a value of Delayed or On Time without altering the flight table
-    #source: https://www.sqlite.org/lang_expr.html
+    #departureStatus is calculated by a generated column on flight (see flightPerformanceColumns), giving it a value of Delayed or On Time
+    #source: https://www.sqlite.org/gencol.html
 createDeparturePerformanceView = '''
                                 CREATE VIEW departurePerformance AS
-                                    SELECT
-                                        flightID, scheduledDepartureDateTime, actualDepartureDateTime,
-                                        CASE
-                                            WHEN actualDepartureDateTime IS NULL THEN 'On Time'
-                                            WHEN actualDepartureDateTime > scheduledDepartureDateTime THEN 'Delayed'
-                                            ELSE 'On Time'
-                                        END AS departureStatus
+                                    SELECT flightID, scheduledDepartureDateTime, actualDepartureDateTime, departureStatus
                                     FROM flight;
                             '''
                             
 #Create view for calculated field arrivalStatus
 createArrivalPerformanceView = '''
                                 CREATE VIEW arrivalPerformance AS
-                                    SELECT
-                                        flightID, scheduledArrivalDateTime, actualArrivalDateTime,
-                                        CASE
-                                            WHEN actualArrivalDateTime IS NULL THEN 'On Time'
-                                            WHEN actualArrivalDateTime > scheduledArrivalDateTime THEN 'Delayed'
-                                            ELSE 'On Time'
-                                        END AS arrivalStatus
+                                    SELECT flightID, scheduledArrivalDateTime, actualArrivalDateTime, arrivalStatus
                                     FROM flight;
                             '''
 
-# Execute table and view creation within a try-except block to handle errors
-    #Taken from exceptions lesson from in Database APIs using python
-try:
-    cursor.execute(createDestinationTable)
-    conn.commit()
-    cursor.execute(createTerminalTable)
-    conn.commit()
-    cursor.execute(createPilotTable)
-    conn.commit()
-    cursor.execute(createFlightTable)
-    conn.commit()
-    cursor.execute(createDeparturePerformanceView)
+#Index on crewAssignment for pilot schedules, availability and reports: each pilot's assignments in time order
+createCrewPilotIndex = '''CREATE INDEX IF NOT EXISTS idxCrewPilot
+        ON crewAssignment (pilotID, scheduledDepartureDateTime, scheduledArrivalDateTime)'''
+
+#Secondary indexes on flight and crewAssignment, designed around the queries in dbOperations.py.
+#Run python dbIndexAdvisor.py to check which queries they serve.
+createSecondaryIndexes = [
+    #viewFlightsByCriteria: filter by status
+    '''CREATE INDEX IF NOT EXISTS idxFlightStatus
+        ON flight (flightStatus, scheduledDepartureDateTime)''',
+    #viewFlightsByCriteria: filter by arrival destination
+    '''CREATE INDEX IF NOT EXISTS idxFlightArrivalDestination
+        ON flight (arrivalDestinationID, scheduledDepartureDateTime)''',
+    #viewFlightPage: ordering on departure time.
+    #flightID completes the keyset used by viewFlightPage, so pages sorted by departure need no sort step
+    '''CREATE INDEX IF NOT EXISTS idxFlightDeparture
+        ON flight (scheduledDepartureDateTime, flightID)''',
+    #reportByTimeframe and autoRosterFlights: departure time ranges, compared as integers
+    '''CREATE INDEX IF NOT EXISTS idxFlightDepartureEpoch
+        ON flight (scheduledDepartureEpoch)''',
+    createCrewPilotIndex,
+    #reportBusiestTerminalByPeriod: terminalUsage counters for a range of days
+    '''CREATE INDEX IF NOT EXISTS idxTerminalUsageDay
+        ON terminalUsage (day, destinationID, terminalID, usageCount)''',
+    #Deleting a pilot checks the flight.captainID / firstOfficerID foreign keys. Unassigned rows are left out of the index.
+    '''CREATE INDEX IF NOT EXISTS idxFlightCaptain
+        ON flight (captainID) WHERE captainID IS NOT NULL''',
+    '''CREATE INDEX IF NOT EXISTS idxFlightFirstOfficer
+        ON flight (firstOfficerID) WHERE firstOfficerID IS NOT NULL''',
+    #viewUnassignedFlights and autoRosterFlights: partial index holding only scheduled flights that are missing crew
+    """CREATE INDEX IF NOT EXISTS idxFlightUnassigned
+        ON flight (scheduledDepartureEpoch)
+        WHERE (captainID IS NULL OR firstOfficerID IS NULL) AND flightStatus = 'Scheduled'""",
+]
+
+#Table for database-wide settings, such as the performance profile chosen below
+createSettingsTable = '''
+                    CREATE TABLE dbSettings (
+                        settingName VARCHAR NOT NULL PRIMARY KEY,
+                        settingValue VARCHAR
+                    );
+                    '''
+
+"""
+Reference data versions
+    pilot, destination and terminal are small and rarely change, so dbReferenceCache.py keeps them in memory.
+    Each has a counter in dbSettings (e.g. referenceDataVersion.pilot) that these triggers bump on every insert,
+    update and delete, whoever makes the change, so a cache in any process can tell which table changed and reload
+    only that one.
+"""
+createReferenceDataTriggers = [
+    f'''CREATE TRIGGER IF NOT EXISTS trg{table.capitalize()}Version{event.capitalize()} AFTER {event} ON {table}
+        BEGIN
+            INSERT INTO dbSettings (settingName, settingValue) VALUES ('{referenceDataVersionPrefix}{table}', 1)
+            ON CONFLICT (settingName) DO UPDATE SET settingValue = settingValue + 1;
+        END'''
+    for table in referenceTables for event in ("INSERT", "UPDATE", "DELETE")]
+
+"""
+Drops existing tables and views for a clean slate.
+Tables are dropped in order of dependency (dependent to independent) to avoid foreign key dependencies.
+"""
+def dropSchema(cursor):
+    cursor.execute('DROP TABLE IF EXISTS crewDutyIndex')
+    cursor.execute('DROP TABLE IF EXISTS terminalUsage')
+    cursor.execute('DROP TABLE IF EXISTS pilotPunctuality')
+    cursor.execute('DROP TABLE IF EXISTS pilotMonthlyWorkload')
+    cursor.execute('DROP TABLE IF EXISTS crewAssignment')
+    cursor.execute('DROP TABLE IF EXISTS flight')
+    cursor.execute('DROP TABLE IF EXISTS terminal')
+    cursor.execute('DROP TABLE IF EXISTS pilot')
+    cursor.execute('DROP TABLE IF EXISTS destination')
+    cursor.execute('DROP TABLE IF EXISTS dbSettings')
+
+    print('Drop tables script complete.')
+
+    cursor.execute('DROP VIEW IF EXISTS departurePerformance')
+    cursor.execute('DROP VIEW IF EXISTS arrivalPerformance')
+
+    print('Drop views script complete.')
+
+"""
+Creates every table and view, in order of reverse dependency (independent to dependent).
+"""
+def createSchema(conn):
+    cursor = conn.cursor()
+    # Execute table and view creation within a try-except block to handle errors
+        #Taken from exceptions lesson from in Database APIs using python
+    try:
+        cursor.execute(createDestinationTable)
+        conn.commit()
+        cursor.execute(createTerminalTable)
+        conn.commit()
+        cursor.execute(createPilotTable)
+        conn.commit()
+        cursor.execute(createFlightTable)
+        conn.commit()
+        cursor.execute(createCrewAssignmentTable)
+        conn.commit()
+        cursor.execute(createPilotMonthlyWorkloadTable)
+        conn.commit()
+        cursor.execute(createPilotPunctualityTable)
+        conn.commit()
+        cursor.execute(createTerminalUsageTable)
+        conn.commit()
+        cursor.execute(createCrewDutyIndex)
+        conn.commit()
+        cursor.execute(createSettingsTable)
+        conn.commit()
+        print('Table creation script complete.')
+
+        for createTrigger in (createCrewAssignmentTriggers + createPilotMonthlyWorkloadTriggers
+                              + createPilotPunctualityTriggers + createTerminalUsageTriggers + createCrewDutyTriggers
+                              + createReferenceDataTriggers):
+            cursor.execute(createTrigger)
+        conn.commit()
+        print('Trigger creation script complete.')
+
+        createIndexes(conn)
+
+        cursor.execute(createDeparturePerformanceView)
+        conn.commit()
+        cursor.execute(createArrivalPerformanceView)
+        conn.commit()
+        print('View creation script complete.')
+    except Exception as e:
+        conn.rollback()
+        print(f'Error during table creation: {e}')
+        raise e
+
+"""
+Creates the secondary indexes. Uses IF NOT EXISTS, so it is also safe to run against an existing database.
+"""
+def createIndexes(conn):
+    for createIndex in createSecondaryIndexes:
+        conn.execute(createIndex)
     conn.commit()
-    cursor.execute(createArrivalPerformanceView)
+    print('Index creation script complete.')
+
+"""
+Drops the secondary indexes, e.g. before a large load, after which createIndexes() rebuilds them
+in one pass instead of updating them row by row.
+"""
+def dropIndexes(conn):
+    for createIndex in createSecondaryIndexes:
+        indexName = createIndex.split("IF NOT EXISTS")[1].split()[0]
+        conn.execute(f"DROP INDEX IF EXISTS {indexName}")
     conn.commit()
-except Exception as e:
-    conn.rollback()
-    print(f'Error during table creation: {e}')
-    raise e
-finally:
-    conn.close()
-
-print('View creation script complete.')
\ No newline at end of file
+
+"""
+Creates the archive database beside databasePath (see dbArchive.py) if it doesn't exist yet: the same flight and
+crewAssignment tables, with the indexes the historical reports search them by. Nothing already archived is changed.
+It uses the same journal mode as the main database, so reports can read it while flights are being archived.
+"""
+archiveIndexes = [
+    createIndex for createIndex in createSecondaryIndexes
+    if createIndex.split()[5] in ("idxFlightDeparture", "idxFlightDepartureEpoch")
+] + [createCrewPilotIndex]
+
+def createArchiveDatabase(databasePath, journalMode="WAL"):
+    conn = sqlite3.connect(getArchivePath(databasePath))
+    try:
+        conn.execute(createFlightTable.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS"))
+        conn.execute(createCrewAssignmentTable)
+        for createIndex in archiveIndexes:
+            conn.execute(createIndex)
+        conn.commit()
+        applyPragmas(conn, {"journal_mode": journalMode})
+    finally:
+        conn.close()
+
+"""
+Builds a fresh database file and records its performance profile.
+The profile's journal mode (WAL) is written into the database file itself, so it is switched on here once;
+the per-connection settings are applied by the connection pool each time it opens a connection.
+Called with: setupDatabase('flightManagement.db', 'balanced')
+"""
+def setupDatabase(databasePath=databaseFile, profileName=defaultProfile):
+    profileSettings = getProfileSettings(profileName)
+
+    #Establish connection to database file
+    conn = sqlite3.connect(databasePath)
+    try:
+        #Foreign keys are switched off while dropping so the drop order can't trip over existing rows
+        conn.execute('PRAGMA foreign_keys = OFF')
+        dropSchema(conn.cursor())
+        conn.commit()
+        createSchema(conn)
+
+        storeProfile(conn, profileName)
+        #A new database already has every migration's changes (see dbMigrations.py)
+        from dbMigrations import recordSchemaVersion, latestSchemaVersion
+        recordSchemaVersion(conn, latestSchemaVersion)
+        conn.commit()
+        applyPragmas(conn, {"journal_mode": profileSettings["journal_mode"]})
+        print(f"Performance profile '{profileName}' recorded.")
+    finally:
+        conn.close()
+
+    #A new database starts with an empty archive
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(getArchivePath(databasePath) + suffix):
+            os.remove(getArchivePath(databasePath) + suffix)
+    createArchiveDatabase(databasePath, profileSettings["journal_mode"])
+    print('Archive database created.')
+
+if __name__ == "__main__":
+    setupDatabase(profileName=sys.argv[1] if len(sys.argv) > 1 else defaultProfile)
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+dbSummaries.py - Summary Tables
+    Some reports read summary tables that triggers keep up to date as flights are added, changed and deleted,
+    instead of recomputing over every flight each time they run (see dbSetup.py).
+    This script checks each summary against a full recompute from flight, and can rebuild one that has drifted,
+    e.g. after rows were changed with the triggers dropped.
+    The summaries count archived flights too (see dbArchive.py), so the archive is attached and included in the recompute.
+    Run with:
+        python dbSummaries.py verify                        check every summary table
+        python dbSummaries.py rebuild pilotMonthlyWorkload  recompute one summary table
+        python dbSummaries.py verify --database other.db
+"""
+import argparse
+import sqlite3
+import sys
+from dbConnection import databaseFile, archiveSchema, isArchiveAttached, attachArchive
+from dbOperations import printTableOfResults
+from dbSetup import recomputePilotMonthlyWorkload, recomputePilotPunctuality, recomputeTerminalUsage
+
+"""
+_____________________________________________
+=============• SUMMARY TABLES •=============
+---------------------------------------------
+"""
+"""
+Summary table name -> (recompute query, number of key columns).
+Each recompute query returns the table's columns in order, key columns first.
+"""
+summaryTables = {
+    "pilotMonthlyWorkload": (recomputePilotMonthlyWorkload, 2),
+    "pilotPunctuality": (recomputePilotPunctuality, 1),
+    "terminalUsage": (recomputeTerminalUsage, 4),
+}
+
+#The flights the recompute queries count: flight, with the archived flights added when the archive is attached
+def getFlightSource(conn):
+    if isArchiveAttached(conn):
+        return f"(SELECT * FROM main.flight UNION ALL SELECT * FROM {archiveSchema}.flight)"
+    return "flight"
+
+#Raises ValueError for a name that isn't in summaryTables
+def getSummaryTable(name):
+    if name not in summaryTables:
+        raise ValueError(f"Unknown summary table '{name}'. Choose from: {', '.join(summaryTables)}")
+    return summaryTables[name]
+
+"""
+Compares a summary table with a full recompute.
+Returns a list of (key, stored values, recomputed values) for every key that differs; None means the row is missing.
+An empty list means the summary is correct.
+"""
+def verifySummary(conn, name):
+    recomputeQuery, keyColumns = getSummaryTable(name)
+    stored = {row[:keyColumns]: row[keyColumns:] for row in conn.execute(f"SELECT * FROM main.{name}")}
+    recomputed = {row[:keyColumns]: row[keyColumns:]
+                  for row in conn.execute(recomputeQuery.format(flights=getFlightSource(conn)))}
+
+    differences = []
+    for key in sorted(stored.keys() | recomputed.keys(), key=lambda k: tuple(str(part) for part in k)):
+        if stored.get(key) != recomputed.get(key):
+            differences.append((key, stored.get(key), recomputed.get(key)))
+    return differences
+
+"""
+Replaces a summary table's contents with a full recompute.
+Not committed here, so callers can include it in a larger transaction (e.g. a migration).
+Returns the number of rows written.
+"""
+def rebuildSummary(conn, name):
+    recomputeQuery, keyColumns = getSummaryTable(name)
+    conn.execute(f"DELETE FROM main.{name}")
+    return conn.execute(f"INSERT INTO main.{name} {recomputeQuery.format(flights=getFlightSource(conn))}").rowcount
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Verify or rebuild the trigger-maintained summary tables.")
+    parser.add_argument("action", choices=["verify", "rebuild"])
+    parser.add_argument("tables", nargs="*", help="summary tables to check (default: all)")
+    parser.add_argument("--database", default=databaseFile)
+    options = parser.parse_args(args)
+
+    names = options.tables or list(summaryTables)
+    conn = sqlite3.connect(options.database)
+    try:
+        attachArchive(conn, options.database)
+        for name in names:
+            getSummaryTable(name)
+
+        if options.action == "rebuild":
+            conn.execute("BEGIN IMMEDIATE")
+            for name in names:
+                print(f"{name}: rebuilt with {rebuildSummary(conn, name):,} rows.")
+            conn.commit()
+            return 0
+
+        failed = False
+        for name in names:
+            differences = verifySummary(conn, name)
+            if differences:
+                failed = True
+                print(f"\n{name}: {len(differences)} row(s) differ from a full recompute.")
+                printTableOfResults(differences[:20], ["Key", "Stored", "Recomputed"])
+            else:
+                print(f"{name}: matches a full recompute.")
+        return 1 if failed else 0
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 2
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Database error: {e}")
+        return 3
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -8,14 +8,68 @@ data, such as making changes to the database and getting information from the da
 
 Press play to run the script or type 'python main.py' into the terminal to start the 
 application.
+
+It can also be run without the menus, one command at a time, for scripts and scheduled jobs
+(see HEADLESS COMMAND MODE below), e.g. 'python main.py report busiest-terminal --format json'.
+Run 'python main.py --help' for the list of commands.
 """
+import argparse
+import csv
+import itertools
+import json
 import sys
 import time
-from dbOperations import (flightAttributeList, viewAllFlights, addFlight, viewFlightsByCriteria, updateFlightRecord, viewSelectedFlightAttibutes, allowedFlightStatus, FlightRecord, viewUnassignedFlights,
-getPilotName, addPilot, viewPilotSchedules, updatePilotDetails, viewAvailablePilots, assignPilotToFlight, viewAllPilots, deletePilotRecord,
-reportPilotFlightCount, reportPilotWorkloadByMonth, reportByTimeframe, reportBusiestTerminal, reportPilotPunctuality, reportFlightPunctuality)   
+import sqlite3
+from contextlib import redirect_stdout
+from dbReportCache import getReportCacheStats
+from dbReferenceCache import referenceData
+from dbReportPack import runReportPack, packReports, defaultPackWorkers, reportPackTimingHeaders
+from dbInstrumentation import enableInstrumentation, getOperationSummary, operationSummaryHeaders, defaultSlowQueryMs
+from dbOperations import (flightAttributeList, requiredFlightAttributes, pilotAttributeList, defaultPageSize, viewFlightPage, streamFlights, addFlight, viewFlightsByCriteria, updateFlightRecord, updateFlightDetails, viewSelectedFlightAttibutes, allowedFlightStatus, viewUnassignedFlights,
+deleteFlightRecord, getPilotName, addPilot, viewPilotSchedules, updatePilotDetails, updatePilotAttributes, viewAvailablePilots, viewAvailablePilotsForUnassignedFlights, assignPilotToFlight, AssignmentConflict, autoRosterFlights, defaultTurnaroundMinutes, viewAllPilots, deletePilotRecord,
+reportPilotFlightCount, reportPilotWorkloadByMonth, reportByTimeframe, reportBusiestTerminal, reportPilotPunctuality, reportFlightPunctuality,
+reportBusiestTerminalByPeriod, reportTerminalUsageSplit, terminalUsagePeriods,
+printTableOfResults)   
 
 
+"""
+______________________________________________________
+=============• DISPLAYING RESULTS •=============
+------------------------------------------------------
+"""
+"""
+The functions in dbOperations.py return records rather than printing them. 
+These helpers run an operation, report any database error to the user and display what it returned.
+"""
+#Total time spent in dbOperations calls, read by the menu engine to report database time per action
+operationTimings = {"calls": 0, "seconds": 0.0}
+
+def runOperation(operation, *args):
+    startedAt = time.perf_counter()
+    try:
+        return operation(*args)
+    except sqlite3.Error as e:
+        print(f"\nDatabase error: {e}")
+    except ValueError as e:
+        print(f"\nERROR: {e}")
+    finally:
+        operationTimings["calls"] += 1
+        operationTimings["seconds"] += time.perf_counter() - startedAt
+    time.sleep(2)
+    return None
+
+#Runs a read operation and prints its records as a table under an optional title
+def showResults(operation, args, headers, title=None, delay=0):
+    results = runOperation(operation, *args)
+    if results is None:
+        return None
+    if title:
+        print(title)
+        time.sleep(min(delay, 2))
+    printTableOfResults(results, headers)
+    time.sleep(delay)
+    return results
+
 """
 __________________________________________________________________
 =================• ENTRY POINT & ROLE SELECTION •=================
@@ -23,43 +77,102 @@ __________________________________________________________________
 """
 """
 main()
-    Greets the user and directs them to sub-menus based on their choices.
+    Greets the user and starts the menus at role selection.
 """
 def main():
     print("\nHello, welcome to the flight management system.")
     time.sleep(2)
-    print("\nWhat is your role?")
-    time.sleep(1.5)
-    print("1. Cat Walking Over Keyboard")
-    print("2. Flight Attendant")
-    print("3. Airlines Manager")
-    time.sleep(1.5)
-    
-    userRole = input("\nEnter role number: ").strip() # strip() to remove leading and trailing spaces
-    time.sleep(1.5)
-    
-    if userRole == "1":
-        catRole()
-    elif userRole == "2":
-        flightAttendantActions() #view/read only
-    elif userRole == "3":
-        airlinesManagerActions() #full CRUD permissions
-    else:
-        print("Invalid role. Restarting.")
-        time.sleep(3)
-        main()
+    runMenus("role")
  
 """
 _________________________________________________________________   
 # =================• SUB-MENUS (ORCHESTRATION) •=================
 -----------------------------------------------------------------
 """
+"""
+Menu engine
+    Every menu is an entry in menuTable (defined after the actions, below). runMenus() is a single loop:
+    it shows the current menu, runs the chosen action and moves to the next menu, so going back and forth
+    between menus never nests function calls and the stack stays the same depth however long the session.
+    Each option is (label, action, nextMenu):
+        - action is a function to run, or None for options that only move to another menu.
+          An action may return a menu name to go to instead of nextMenu.
+        - nextMenu is the menu to show afterwards; None stays in the current menu, exitMenu ends the session.
+    The time each action takes, and the part of it spent in the database, is recorded in actionTimings
+    and summarised when the session ends.
+"""
+exitMenu = "exit"
+
+#"menu: option" -> {"count", "seconds", "maxSeconds", "databaseSeconds"}
+actionTimings = {}
+
+def runMenus(menuName):
+    previousMenu = None
+    while menuName != exitMenu:
+        menu = menuTable[menuName]
+        if menuName != previousMenu and menu.get("intro"):
+            print(menu["intro"])
+            time.sleep(1)
+        previousMenu = menuName
+
+        print(f"\n{menu['title']}")
+        for number, (label, action, nextMenu) in enumerate(menu["options"], start=1):
+            print(f"{number}. {label}")
+        userChoice = input(f"\n{menu.get('prompt', 'Enter the number of your choice: ')}").strip() # strip() to remove leading and trailing spaces
+
+        if not userChoice.isdigit() or not 1 <= int(userChoice) <= len(menu["options"]):
+            print("\nInvalid selection. Please try again by entering a number from the menu.")
+            time.sleep(1)
+            continue
+
+        label, action, nextMenu = menu["options"][int(userChoice) - 1]
+        if action is not None:
+            actionResult = timeAction(f"{menuName}: {label}", action)
+            nextMenu = actionResult or nextMenu
+        menuName = nextMenu or menuName
+
+    printSessionSummary()
+
+#Runs one menu action and records how long it took, overall and in the database
+def timeAction(actionName, action):
+    databaseSecondsBefore = operationTimings["seconds"]
+    startedAt = time.perf_counter()
+    try:
+        return action()
+    finally:
+        elapsed = time.perf_counter() - startedAt
+        timing = actionTimings.setdefault(actionName, {"count": 0, "seconds": 0.0, "maxSeconds": 0.0, "databaseSeconds": 0.0})
+        timing["count"] += 1
+        timing["seconds"] += elapsed
+        timing["maxSeconds"] = max(timing["maxSeconds"], elapsed)
+        timing["databaseSeconds"] += operationTimings["seconds"] - databaseSecondsBefore
+
+#Prints how often each action was used and how long it took, with the database time shown separately
+def printSessionSummary():
+    if not actionTimings:
+        return
+    print("\nSession summary:")
+    rows = [(actionName, timing["count"], f"{timing['seconds'] / timing['count']:.2f}", f"{timing['maxSeconds']:.2f}",
+             f"{timing['databaseSeconds'] * 1000 / timing['count']:.1f}")
+            for actionName, timing in actionTimings.items()]
+    printTableOfResults(rows, ["Action", "Times Used", "Mean Seconds", "Max Seconds", "Mean Database ms"])
+
+    cacheStats = getReportCacheStats()
+    if cacheStats["hits"] + cacheStats["misses"]:
+        print(f"\nReports answered from the cache: {cacheStats['hits']} of {cacheStats['hits'] + cacheStats['misses']} "
+              f"({cacheStats['invalidations']} dropped after data changed, {cacheStats['evictions']} evicted).")
+    referenceStats = referenceData.getStats()
+    if referenceStats["lookups"]:
+        print(f"Pilot, destination and terminal lookups from memory: {referenceStats['lookups']} "
+              f"({referenceStats['loads']} table loads).")
+
 """
 ================•ROLE MENUS•================
 """
 def catRole():
     print("\nSorry, you don't have access to the data.")
     time.sleep(1.5)
+    return exitMenu
     
 
 #The Flight Attended is only able to view (SELECT) data and information.
@@ -69,39 +182,12 @@ def flightAttendantActions():
     time.sleep(2)
     print("\nSorry, your profile hasn't been set up yet.")
     time.sleep(1.5)
-    handleUserReset()
+    return handleUserReset()
 
-"""
-    The Airlines Manager is able to perform all CRUD operations.
-    This menu is constructed with a loop that allows the user to navigate between Flight, Pilot,
-    Destination and Reporting options.
-"""
-def airlinesManagerActions():
-    while True:
-        print("\nHello, Airlines Manager")    
-        time.sleep(2)  
-        print("\nWhat would you like to do? Please review the below actions:")
-        time.sleep(2)
-        print("1. Manage Flights")
-        print("2. Manage Pilots")
-        print("3. Manage Destinations")
-        print("4. View Reports & Summaries")
-        
-        time.sleep(2)
-        userChoice = input("\nEnter your selection's number: ").strip()   
-        
-        if userChoice == "1":
-            getManageFlightsMenu()
-        if userChoice == "2":
-            getManagePilotsMenu()
-        if userChoice == "3":
-            print("Destination Management - Coming Soon")
-            pass
-        if userChoice == "4":
-            getReportsMenu()
-        else:
-            print("\nInvalid selection, please enter a number from the options.")    
-        time.sleep(1)  
+#The Airlines Manager is able to perform all CRUD operations, through the "manager" menu and its sub-menus.
+def manageDestinations():
+    print("Destination Management - Coming Soon")
+    time.sleep(1)
 
 
 """
@@ -109,44 +195,11 @@ ____________________________________________
 =============• MANAGE FLIGHTS •=============
 --------------------------------------------
 """
-"""
-    Menu for flight-related CRUD operations. 
-    Routes the user choices to functions for viewing, adding, udpdating and deleting flight 
-    records. It also includes an option to return to the main menu.
-"""
-def getManageFlightsMenu():
-    while True:
-        time.sleep(2)
-        print("\n======FLIGHT MANAGEMENT======")
-        print("1. View All Flights")
-        print("2. Add a New Flight")
-        print("3. View Flights by Criteria (Status or Destination)")
-        print("4. Update Flight Details")
-        print("5. Delete a Flight Record")
-        print("6. Return to Main Menu")
-        
-        time.sleep(2)
-        userChoice = input("\nEnter the number of your choice: ").strip()
-        
-        if userChoice == '1':
-            getAllFlights()
-        elif userChoice == '2':
-            userInput = getUserInput("flight", flightAttributeList)
-            addFlight(userInput)
-        elif userChoice == '3':
-            getFlightsByCriteria()
-        elif userChoice == '4':
-            getUpdateFlightRecord()     
-        elif userChoice == '5':
-            getDeleteFlightRecord()
-        elif userChoice == '6':
-            main() 
-        else:
-            print("\nInvalid selection. Please try again by entering a number from the menu.")
-        
 """
 1.1. View All Flights
-    Collects user choice for attributes and sorting before calling the database fetch function.
+    Collects user choice for attributes, sorting and page size, then shows the flights a page at a time.
+    The user moves through the pages with N (next) and P (previous); only one page is held in memory,
+    however many flights there are.
 """
 def getAllFlights():
     print("\nAction: View all flights")
@@ -156,17 +209,57 @@ def getAllFlights():
     selectedAttributes = flightAttributeList if colInput == 'all' else [a.strip() for a in colInput.split(",")]
     
     print(f"\nSort by which column? ({', '.join(flightAttributeList)})")
-    orderCol = input("Enter column(s) (comma-separated): ").strip()
+    orderCol = input("Enter column: ").strip()
     
     direction = input("Order by ASC or DESC? ").strip().upper()
     if direction not in ["ASC", "DESC"]: direction = "ASC"
+
+    pageSizeInput = input(f"How many flights per page? (default {defaultPageSize}): ").strip()
+    pageSize = int(pageSizeInput) if pageSizeInput.isdigit() and int(pageSizeInput) > 0 else defaultPageSize
     
-    viewAllFlights(selectedAttributes, orderCol, direction)
+    page = runOperation(viewFlightPage, selectedAttributes, orderCol, direction, pageSize)
+    pageNumber = 1
+    while page is not None:
+        print(f"\nPage {pageNumber}")
+        headers = page.records[0]._fields if page.records else selectedAttributes
+        printTableOfResults(page.records, headers)
+
+        choices = (["N = next page"] if page.hasNext else []) + (["P = previous page"] if page.hasPrevious else [])
+        userChoice = input(f"\n{', '.join(choices + ['Q = return to menu'])}: ").strip().upper()
+
+        if userChoice == "N" and page.hasNext:
+            nextPage = runOperation(viewFlightPage, selectedAttributes, orderCol, direction, pageSize, page.lastKey)
+            pageNumber += 1
+        elif userChoice == "P" and page.hasPrevious:
+            nextPage = runOperation(viewFlightPage, selectedAttributes, orderCol, direction, pageSize, None, page.firstKey)
+            pageNumber -= 1
+        elif userChoice == "Q":
+            break
+        else:
+            print("\nInvalid selection. Please choose one of the options shown.")
+            continue
+        page = nextPage
     
 """
 1.2. Add a New Flight
-    Not needed, addFlight() from dbOperations.py is used directly
+    Collects the new flight's details with getUserInput() and tells the user whether it was added.
 """
+def getAddFlight():
+    userInput = getUserInput("flight", flightAttributeList)
+    try:
+        addFlight(userInput)
+        print("\nOperation Successful. A new flight has been added to the database.")
+    except sqlite3.IntegrityError:
+        #Catch duplicate primary keys or foreign keys that don't exit
+        print("Operation has failed.")
+        time.sleep(2)
+        print("Check that")
+        time.sleep(2)
+        print("(1) The flightID and Scheduled Time combination don't already exist.")
+        print("(2) All IDs (except Flight ID) exist in other tables.")
+    except Exception as e:
+        print(f"\nAn unexpected error occurred: {e}")
+
 """
 1.3. View Flights by Criteria (Status, Destination, Date)
     Collects user choice for viewing flight by status or arrival destination and then asks them
@@ -190,15 +283,16 @@ def getFlightsByCriteria():
     attributeInput = input("Enter columns (or 'all'): ").strip().lower()
     
     selectedAttributes = [a.strip() for a in attributeInput.split(",")]
+    displayAttributes = flightAttributeList if "all" in selectedAttributes else selectedAttributes
     
     if userChoice == "1":
         search = getUserInput("flight", ["flightStatus"])
         #pass tuple to function in dbOperations
-        viewFlightsByCriteria("flightStatus", search, selectedAttributes)
+        showResults(viewFlightsByCriteria, ("flightStatus", search, selectedAttributes), displayAttributes)
         
     elif userChoice == "2":
         search = getUserInput("flight", ["arrivalDestinationID"])
-        viewFlightsByCriteria("arrivalDestination", search, selectedAttributes)
+        showResults(viewFlightsByCriteria, ("arrivalDestination", search, selectedAttributes), displayAttributes)
 """
 1.4. Update Flight Details
     Asks user which attribute they'd like to change and for the record of which primary key. 
@@ -221,7 +315,7 @@ def getUpdateFlightRecord():
     # 2. Show current table with context
     print("\nCurrent Records")
     time.sleep(1)
-    viewSelectedFlightAttibutes([valueToChange])
+    showResults(viewSelectedFlightAttibutes, ([valueToChange],), ["flightID", "scheduledDepartureDateTime", valueToChange], delay=4)
     
     # 3. Identify the record (composite PK)
     print("\nPlease use the table above to identify the record to change")
@@ -251,12 +345,17 @@ def getUpdateFlightRecord():
     time.sleep(2)
     
     # 5. Perform update 
-    updateFlightRecord(targetFlightID, targetDepartureTime, valueToChange, newValue)
+    updated = runOperation(updateFlightRecord, targetFlightID, targetDepartureTime, valueToChange, newValue)
+    if updated:
+        print(f"\nSuccess: {valueToChange} updated to '{newValue}'.")
+    elif updated is not None:
+        print("\nError: No record found matching selected Flight ID and Departure Time.")
     
     # 6. Show updated table for verification
     print("\nYour Record:")
     time.sleep(2)
-    viewSelectedFlightAttibutes([valueToChange], targetFlightID, targetDepartureTime)
+    showResults(viewSelectedFlightAttibutes, ([valueToChange], targetFlightID, targetDepartureTime),
+                ["flightID", "scheduledDepartureDateTime", valueToChange], delay=4)
  
 """
 1.5. Delete a Flight Record
@@ -271,7 +370,7 @@ def getDeleteFlightRecord():
     
     print("\nFlights in database:")
     time.sleep(1)
-    viewSelectedFlightAttibutes([]) #fetch PK's and pass in 0 extra attributes
+    showResults(viewSelectedFlightAttibutes, ([],), ["flightID", "scheduledDepartureDateTime"], delay=4) #fetch PK's and pass in 0 extra attributes
     
     #identify record to be created using PK
     print("\nWhich record would you like to delete?")  
@@ -285,48 +384,20 @@ def getDeleteFlightRecord():
     time.sleep(2)
     
     if userConfirm == 'Y':
-        deleteFlightRecord(targetFlightID, targetDepartureTime)
+        deleted = runOperation(deleteFlightRecord, targetFlightID, targetDepartureTime)
+        if deleted:
+            print(f"\nFlight {targetFlightID} scheduled for {targetDepartureTime} has been deleted.")
+        elif deleted is not None:
+            print("No record found matching those details - nothing has been deleted.")
     elif userConfirm == 'N':
         print("\nDeletion cancelled. Returning to menu.")
-        getManageFlightsMenu()
     else:
         print("\nInvalid Input. Returning to menu.")
-        getManageFlightsMenu()
 """
 ____________________________________________
 =============• MANAGE PILOTS •=============
 --------------------------------------------
 """
-"""
-    Menu for managing pilots. Offers a menu of cjoices to perform CRUD operations on the pilot table. 
-"""
-def getManagePilotsMenu():
-    while True:
-        print("\n======PILOT MANAGEMENT======")
-        print("1. Add New Pilot")
-        print("2. View Pilot Schedules")
-        print("3. Assign Pilot to Flight")
-        print("4. Update Pilot Details")
-        print("5. Delete Pilot")
-        print("6. Return to Main Menu")
-        
-        userChoice = input("\nEnter the number of your choice: ").strip()
-        
-        if userChoice == '1':
-            getAddPilot()
-        elif userChoice == '2':
-            getPilotSchedule()
-        elif userChoice == '3':
-            getAssignPilot()
-        elif userChoice == '4':
-            getUpdatePilotDetails()       
-        elif userChoice == '5':
-            getDeletePilotRecord()
-        elif userChoice == '6':
-            main() 
-        else:
-            print("\nInvalid selection. Please try again by entering a number from the menu.")
-
 """
 2.1. Add pilot
     Asks user to input values for each attribute belonging to pilot, except pilotID which is
@@ -343,52 +414,55 @@ def getAddPilot():
     userInput = getUserInput("pilot", pilotAttributeList)
     
     #call db operation
-    addPilot(userInput)
+    try:
+        newPilot = addPilot(userInput)
+    except sqlite3.IntegrityError:
+        print(f"\nERROR: Could not add pilot.")
+        return
+    except Exception as e:
+        print(f"\nAn unexpected error occurred: {e}")
+        return
+
+    print(f"\nNew pilot record has been added to the database.")
+    time.sleep(2)
+    #show new record with headers
+    printTableOfResults([newPilot] if newPilot else [], ["pilotID", "pilotName", "email", "dob", "isCaptain", "isFO"])
+    time.sleep(4)
     
     
 """
 2.2. View Pilot Schedules
-    Displays existing pilot schedules and provides the user with a menu of options
+    Displays existing pilot schedules, then moves to the pilotSchedule menu of options
     which are useful for checking pilot availability or assigning pilots to flights.
 """
 def getPilotSchedule():
     time.sleep(1)
     print("\nLoading pilot schedules...")
     time.sleep(2)
-    viewPilotSchedules()
+    showResults(viewPilotSchedules, (), ["Pilot ID", "Name", "Flight", "Departure", "Arrival ", "Departing From", "Arriving To", "Role"],
+                title="\nPilot Schedule:")
     time.sleep(3)
-    
-    inSubMenu = True
-    while inSubMenu:
-        print("\nNext, would you like to:")
-        time.sleep(1)
-        print("1. See flights without full crew?")
-        print("2. See available pilots for a time period?")
-        print("3. Assign a pilot to a flight?")
-        print("4. Return to Main Menu?")
-        time.sleep(1)
-    
-        userChoice = input("\nEnter your choice (1-4): ").strip()
-        
-        if userChoice == '1':
-            viewUnassignedFlights()
-            time.sleep(3)
-        
-        elif userChoice == '2':
-            print("\nChecking pilot availability...")
-            startTime = input("Planned Departure (YYYY-MM-DD HH:MM:SS): ").strip()
-            endTime = input("Planned Arrival (YYYY-MM-DD HH:MM:SS): ").strip()
-            viewAvailablePilots(startTime, endTime)
-            time.sleep(4)
-            
-        elif userChoice == '3':
-            getAssignPilot() 
-            
-        elif userChoice == '4':
-            inSubMenu = False 
-            
-        else:
-            print("Invalid choice. Please enter 1-4.")        
+
+def getAvailablePilots():
+    print("\nChecking pilot availability...")
+    startTime = input("Planned Departure (YYYY-MM-DD HH:MM:SS): ").strip()
+    endTime = input("Planned Arrival (YYYY-MM-DD HH:MM:SS): ").strip()
+    showAvailablePilots(startTime, endTime)
+    time.sleep(4)
+
+#Shared by the pilot schedule sub-menu and pilot assignment
+def showUnassignedFlights():
+    showResults(viewUnassignedFlights, (), ["Flight", "Departure", "Arrival ", "Departing From", "Arriving To", "Flight Status"],
+                title="\nPilot Schedule:", delay=3)
+
+def showPilotsForUnassignedFlights():
+    showResults(viewAvailablePilotsForUnassignedFlights, (),
+                ["Flight", "Departure", "Arrival", "Pilot ID", "Name", "Captain", "First Officer"],
+                title="\nAvailable Pilots for Each Flight Needing Crew:", delay=3)
+
+def showAvailablePilots(startTime, endTime):
+    showResults(viewAvailablePilots, (startTime, endTime), ["Pilot ID", "Name", "Email", "Captain", "First Officer"],
+                title=f"\nAvailable Pilots: From {startTime} to {endTime}")
 
 """
 2.3. Assign Pilot to Flight
@@ -404,7 +478,7 @@ def getAssignPilot():
     #1. Show scheduled flights without full crew
     print("\nAvailable 'Scheduled' flights needing crew:")
     time.sleep(2)
-    viewUnassignedFlights()
+    showUnassignedFlights()
     time.sleep(3)
     
     #2. Collect ID's for flight and pilot
@@ -426,7 +500,7 @@ def getAssignPilot():
         endTime = input("Planned Arrival (YYYY-MM-DD HH:MM:SS): ").strip()
         time.sleep(2)
         
-        viewAvailablePilots(startTime, endTime)
+        showAvailablePilots(startTime, endTime)
         time.sleep(4)
     else: pass
     
@@ -440,8 +514,53 @@ def getAssignPilot():
     roleChoice = input("Selection: ").strip()
     role = "captainID" if roleChoice == "1" else "firstOfficerID"
     
-    assignPilotToFlight(flightID, depTime, pilotID, role)
+    assigned = runOperation(assignPilotToFlight, flightID, depTime, pilotID, role)
+    time.sleep(2)
+    if assigned:
+        print(f"\nPilot {pilotID} assigned as {role[:-2]} to flight {flightID} departure {depTime}.")
+    elif assigned is not None:
+        print("\nAssignment failed. Either flight does not exist or flight has already departed or has been cancelled.")
     
+"""
+2.3.1. Auto-Roster Flights
+    1. Asks for the departure window and minimum turnaround.
+    2. Shows the proposed assignments as a diff of empty seats being filled, and the seats no pilot is free for.
+    3. Applies them all in one transaction if the user confirms.
+"""
+rosterHeaders = ["Flight", "Departure", "Arrival", "Role", "Pilot ID", "Name", "Flights in Window"]
+
+#Prints a roster plan as + lines, one per seat filled, so it reads like a diff of the flight table
+def printRosterDiff(plan):
+    for row in plan.assignments:
+        print(f"+ {row.flightID} {row.scheduledDepartureDateTime} {row.role}: (empty) -> {row.pilotID} {row.pilotName}")
+    for row in plan.unfilled:
+        print(f"! {row.flightID} {row.scheduledDepartureDateTime} {row.role}: no free qualified pilot")
+
+def getAutoRoster():
+    print("\nAction: Auto-Roster Flights Without Full Crew")
+    startTime = toTimestamp(input("First departure (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS): ").strip())
+    endTime = toTimestamp(input("Last departure (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS): ").strip(), endOfDay=True)
+    turnaround = input(f"Minimum turnaround in minutes (Enter for {defaultTurnaroundMinutes}): ").strip()
+    if turnaround and not turnaround.isdigit():
+        print("\nTurnaround must be a whole number of minutes.")
+        return
+    turnaround = int(turnaround) if turnaround else defaultTurnaroundMinutes
+
+    plan = runOperation(autoRosterFlights, startTime, endTime, turnaround)
+    if plan is None:
+        return
+    if not plan.assignments and not plan.unfilled:
+        print("\nNo scheduled flights in that window are missing crew.")
+        return
+    print("\nProposed changes:")
+    printRosterDiff(plan)
+    print(f"\n{len(plan.assignments)} seat(s) can be filled, {len(plan.unfilled)} cannot.")
+    if plan.assignments and input("Apply these assignments? (Y/N) ").strip().upper() == "Y":
+        applied = runOperation(autoRosterFlights, startTime, endTime, turnaround, True)
+        if applied is not None:
+            print(f"\n{len(applied.assignments)} pilot assignment(s) made.")
+    time.sleep(2)
+
 """
 2.4. Update Pilot Details
     1. Prompts user to input the details of the pilot record they'd like to update.
@@ -455,7 +574,7 @@ def getUpdatePilotDetails():
     print("\nAction: Update Pilot Details")
     time.sleep(2)
     
-    viewAllPilots()
+    showAllPilots()
     time.sleep(2)
     targetID = input("\nEnter Pilot ID to update: ").strip()
     time.sleep(1)
@@ -482,7 +601,11 @@ def getUpdatePilotDetails():
             attributeToChange = fieldMapping[userChoice]
             newValue = input(f"Enter the new value for {attributeToChange}: ").strip()
             
-        updatePilotDetails(targetID, targetName, attributeToChange, newValue)
+        updated = runOperation(updatePilotDetails, targetID, targetName, attributeToChange, newValue)
+        if updated:
+            print(f"\nPilot {targetID} has been updated. The value of {attributeToChange} is now {newValue}.")
+        elif updated is not None:
+            print("\nError: No match found for pilot ID and name combination.")
         
         anotherChange = input("\nWould you like to change another attribute for this pilot? (Y/N): ").strip().upper()
         if anotherChange == 'N':
@@ -491,6 +614,10 @@ def getUpdatePilotDetails():
             print("Invalid selection. Returning to menu.")
             updatingPilot = False
 
+#Shared by updating and deleting pilots, so the user can see the IDs
+def showAllPilots():
+    showResults(viewAllPilots, (), ["ID", "Name", "Email", "DOB", "Captain", "First Officer"], title="\nAll Pilots:", delay=2)
+
 """
 2.5 Delete a pilot record
 """
@@ -499,7 +626,7 @@ def getDeletePilotRecord():
     time.sleep(1)
     
     # 1. Show all pilots so the user can see available IDs
-    viewAllPilots() 
+    showAllPilots() 
     time.sleep(2)
     
     targetID = input("\nEnter the ID of the Pilot you wish to delete: ").strip()
@@ -511,7 +638,7 @@ def getDeletePilotRecord():
         return
 
     # 2. Fetch the pilot name for confirmation that this is the correct pilot
-    pilotName = getPilotName(targetID)
+    pilotName = runOperation(getPilotName, targetID)
     
     if pilotName:
         # 3. Confirm with both pilot ID and name
@@ -519,7 +646,11 @@ def getDeletePilotRecord():
         time.sleep(2)
         
         if userConfirm == 'Y':
-            deletePilotRecord(targetID)
+            deleted = runOperation(deletePilotRecord, targetID)
+            if deleted:
+                print(f"\nPilot with ID no. {targetID} has been successfully deleted.")
+            elif deleted is not None:
+                print(f"\nNo record found for Pilot ID {targetID} - nothing has been deleted.")
         else:
             print("\nDeletion cancelled. Returning to menu.")
             time.sleep(2)
@@ -533,63 +664,36 @@ ______________________________________________________
 ------------------------------------------------------
 """
 """
- 4. Reports Menu
-    Main menu for reports and summaries, showing the user the reports available and prompting them to select one.
+4.1 Popularity Reports
+    Reached from the popularity menu. Each shows one report, then returns to the reports menu.
 """
-def getReportsMenu():
-    while True:
-        print("\n======REPORTS & SUMMARIES======")
-        time.sleep(2)
-        print("\nWould you like to...")
-        time.sleep(2)
-        print("1. View Popularity")
-        print("2. View Flights Within Timeframe")
-        print("3. View Pilot Punctuality")
-        print("4. View Flight Punctuality")
-        print("5. Return to Main Menu")
-        time.sleep(2)
-        
-        userChoice = input("\nEnter the number of your choice (1-5): ").strip()
-        
-        if userChoice == '1':
-            getPopularityReport()
-        elif userChoice == '2':
-            getReportByTimeframe()
-        elif userChoice == '3':
-            reportPilotPunctuality()
-        elif userChoice == '4':
-            reportFlightPunctuality()
-        elif userChoice == '5':
-            main() 
-        else:
-            print("\nInvalid selection. Please try again by entering a number from the menu.")
+def getPilotFlightCountReport():
+    showResults(reportPilotFlightCount, (), ["Pilot ID", "Pilot Name", "Count of Flights"],
+                title="\nReport: Total Flights by Pilot", delay=4)
 
-"""
-4.1 Report Counter
-    A sub-menu for popularity reports. Prompts user to enter they number of the report they'd like to access.
-"""
-def getPopularityReport():
-    print("\nAction: View Popularity Report")
-    time.sleep(2)
-    print("1. Flights by Pilot")
-    print("2. Pilot Workload by Month")
-    print("3. Busiest Terminal Overall")
-    print("4. Return to Reports & Summaries Main Menu")
-    
-    time.sleep(2)
-    userChoice = input("\nSelect an option (1-4): ")
-    time.sleep(2)
-    
-    if userChoice == '1':
-        reportPilotFlightCount()
-    elif userChoice == '2':
-        reportPilotWorkloadByMonth() # Uses UNION ALL grouped by month
-    elif userChoice == '3':
-        reportBusiestTerminal() # Uses UNION ALL for Departure + Arrival terminals 
-    elif userChoice == '4':
-        getReportsMenu() 
-    else:
-        print("Invalid choice. Returning to reports menu.")
+def getPilotWorkloadReport():
+    showResults(reportPilotWorkloadByMonth, (), ["Month-Year", "Pilot Name", "Total Flights"],
+                title="\nReport: Pilot Workload by Month", delay=2) # Uses UNION ALL grouped by month
+
+def getBusiestTerminalReport():
+    # We display the Airport alongside the Terminal so the user knows which location it belongs to.
+    showResults(reportBusiestTerminal, (), ["Airport ID", "Terminal", "Total Traffic Count"],
+                title="\nReport: Busiest Terminals Overall", delay=4) # Reads the terminalUsage counters
+
+def getBusiestTerminalByDayReport():
+    startDate = input("Enter Start Date (YYYY-MM-DD): ")
+    endDate = input("Enter End Date (YYYY-MM-DD): ")
+    showResults(reportBusiestTerminalByPeriod, ("day", startDate, endDate), ["Day", "Airport ID", "Terminal", "Traffic Count"],
+                title="\nReport: Busiest Terminal by Day", delay=4)
+
+def getBusiestTerminalByWeekReport():
+    showResults(reportBusiestTerminalByPeriod, ("week",), ["Week", "Airport ID", "Terminal", "Traffic Count"],
+                title="\nReport: Busiest Terminal by Week", delay=4)
+
+def getTerminalUsageSplitReport():
+    showResults(reportTerminalUsageSplit, (),
+                ["Airport ID", "Terminal", "Departures", "Arrivals", "Diversions", "Total Traffic Count"],
+                title="\nReport: Terminal Departures vs Arrivals", delay=4)
     
 """
 4.2. View Flights Within Timeframe
@@ -598,21 +702,146 @@ def getPopularityReport():
 def getReportByTimeframe():
     startDate = input("Enter Start Date (YYYY-MM-DD): ")
     endDate = input("Enter End Date (YYYY-MM-DD): ")
-    reportByTimeframe(startDate + " 00:00:00", endDate + " 23:59:59")
+    showResults(reportByTimeframe, (startDate + " 00:00:00", endDate + " 23:59:59"), ["Flight", "Departure", "Status"])
             
+"""
+4.3. / 4.4. Punctuality Reports
+"""
+def getPilotPunctualityReport():
+    showResults(reportPilotPunctuality, (),
+                ["Pilot ID", "Pilot Name", "On-Time Departures", "Delayed Departures", "On-Time Arrivals", "Delayed Arrivals"],
+                title="\nReport: Pilot Punctuality", delay=4)
+
+def getFlightPunctualityReport():
+    showResults(reportFlightPunctuality, (),
+                ["Flight ID", "Scheduled Departure", "Departure Status", "Arrival Status", "Departure Delay (min)",
+                 "Arrival Delay (min)"],
+                title="\nReport: Individual Flight Punctuality", delay=4)
+
+"""
+4.5. Morning Report Pack
+    Runs every report that needs no dates at once, on one snapshot of the data (dbReportPack.py), shows each in
+    turn and then how long each one took.
+"""
+def getReportPack():
+    pack = runOperation(runReportPack)
+    if pack is None:
+        return
+    for reportName, records in pack.results.items():
+        print(f"\nReport: {reportName}")
+        printTableOfResults(records, reportCommands[reportName][1])
+    printPackTimings(pack)
+    time.sleep(4)
+
+#Prints the time each report in a pack took, against the time the whole pack took
+def printPackTimings(pack):
+    printTableOfResults([timing._replace(error=timing.error or "") for timing in pack.timings], reportPackTimingHeaders)
+    reportSeconds = sum(timing.milliseconds for timing in pack.timings) / 1000
+    print(f"\n{len(pack.timings)} reports in {pack.wallSeconds:.2f}s (one after another: {reportSeconds:.2f}s).")
+
+"""
+_____________________________________________
+=============• MENU TABLE •=============
+---------------------------------------------
+"""
+"""
+Menu name -> title, options and (optionally) an intro shown on entering the menu and a custom prompt.
+Options are (label, action, nextMenu); see the menu engine above.
+"""
+menuTable = {
+    "role": {
+        "title": "What is your role?",
+        "prompt": "Enter role number: ",
+        "options": [
+            ("Cat Walking Over Keyboard", catRole, None),
+            ("Flight Attendant", flightAttendantActions, None), #view/read only
+            ("Airlines Manager", None, "manager"), #full CRUD permissions
+        ],
+    },
+    "manager": {
+        "intro": "\nHello, Airlines Manager",
+        "title": "What would you like to do? Please review the below actions:",
+        "prompt": "Enter your selection's number: ",
+        "options": [
+            ("Manage Flights", None, "flights"),
+            ("Manage Pilots", None, "pilots"),
+            ("Manage Destinations", manageDestinations, None),
+            ("View Reports & Summaries", None, "reports"),
+            ("Leave the Session", None, exitMenu),
+        ],
+    },
+    "flights": {
+        "title": "======FLIGHT MANAGEMENT======",
+        "options": [
+            ("View All Flights", getAllFlights, None),
+            ("Add a New Flight", getAddFlight, None),
+            ("View Flights by Criteria (Status or Destination)", getFlightsByCriteria, None),
+            ("Update Flight Details", getUpdateFlightRecord, None),
+            ("Delete a Flight Record", getDeleteFlightRecord, None),
+            ("Return to Main Menu", None, "manager"),
+        ],
+    },
+    "pilots": {
+        "title": "======PILOT MANAGEMENT======",
+        "options": [
+            ("Add New Pilot", getAddPilot, None),
+            ("View Pilot Schedules", getPilotSchedule, "pilotSchedule"),
+            ("Assign Pilot to Flight", getAssignPilot, None),
+            ("Update Pilot Details", getUpdatePilotDetails, None),
+            ("Delete Pilot", getDeletePilotRecord, None),
+            ("Return to Main Menu", None, "manager"),
+        ],
+    },
+    "pilotSchedule": {
+        "title": "Next, would you like to:",
+        "options": [
+            ("See flights without full crew?", showUnassignedFlights, None),
+            ("See available pilots for a time period?", getAvailablePilots, None),
+            ("See available pilots for every flight without full crew?", showPilotsForUnassignedFlights, None),
+            ("Assign a pilot to a flight?", getAssignPilot, None),
+            ("Auto-roster every flight without full crew?", getAutoRoster, None),
+            ("Return to Pilot Management?", None, "pilots"),
+        ],
+    },
+    "reports": {
+        "title": "======REPORTS & SUMMARIES======\n\nWould you like to...",
+        "options": [
+            ("View Popularity", None, "popularity"),
+            ("View Flights Within Timeframe", getReportByTimeframe, None),
+            ("View Pilot Punctuality", getPilotPunctualityReport, None),
+            ("View Flight Punctuality", getFlightPunctualityReport, None),
+            ("Run Morning Report Pack", getReportPack, None),
+            ("Return to Main Menu", None, "manager"),
+        ],
+    },
+    "popularity": {
+        "intro": "\nAction: View Popularity Report",
+        "title": "Which report would you like?",
+        "options": [
+            ("Flights by Pilot", getPilotFlightCountReport, "reports"),
+            ("Pilot Workload by Month", getPilotWorkloadReport, "reports"),
+            ("Busiest Terminal Overall", getBusiestTerminalReport, "reports"),
+            ("Busiest Terminal by Day", getBusiestTerminalByDayReport, "reports"),
+            ("Busiest Terminal by Week", getBusiestTerminalByWeekReport, "reports"),
+            ("Terminal Departures vs Arrivals", getTerminalUsageSplitReport, "reports"),
+            ("Return to Reports & Summaries Main Menu", None, "reports"),
+        ],
+    },
+}
+
 """
 __________________________________________________________________
 #================• UTILITY DATA & INPUT HANDLING •================
 ------------------------------------------------------------------
 """
+#Returns the menu to go to next: exitMenu to leave the session, or back to role selection
 def handleUserReset():
     print("\nEnter 'Exit' to leave the session, enter 'Return' to start again.")
     userInput = input("Enter: ").strip().lower() #lower so that it isn't case sensitive
     time.sleep(2)
     if userInput == 'exit':
-        sys.exit()
-    else:
-        main()
+        return exitMenu
+    return "role"
         
 """
 Dictionary for field guidance
@@ -688,5 +917,378 @@ def getUserInput(tableName, attributeList):
         
     return tuple(collectedData)
 
+"""
+__________________________________________________________________
+#===================• HEADLESS COMMAND MODE •===================
+------------------------------------------------------------------
+"""
+"""
+Running main.py with arguments skips the menus: the command is parsed, the matching dbOperations function
+is called once and the result is written to stdout, with no pauses or prompts. This lets staff script
+reports and updates from shell scripts or cron.
+    python main.py flights list --status Scheduled --format csv
+    python main.py flights update BA663 "2026-02-06 14:45:00" --set flightStatus=Landed
+    python main.py pilot assign BA663 "2026-02-06 14:45:00" 3 --role captain
+    python main.py report busiest-terminal --format json
+    python main.py report pack --reports pilot-punctuality,flight-punctuality --format json
+Exit codes tell the calling script what happened.
+Options before the command time it (dbInstrumentation.py): --timings writes p50/p95/p99 per operation to stderr,
+--slow-log writes calls slower than --slow-ms to a log, with their query plans if --explain is given.
+    python main.py --timings --slow-log slowQueries.log --slow-ms 50 --explain report flight-punctuality
+"""
+exitSuccess = 0
+exitNotFound = 1         #no record matched, or the change was refused (e.g. flight no longer 'Scheduled')
+exitUsageError = 2       #invalid arguments (also used by argparse)
+exitDatabaseError = 3    #the database rejected the operation or could not be reached
+exitConflict = 4         #the pilot isn't qualified for the role or is already crewing an overlapping flight
+
+outputFormats = ["table", "json", "csv"]
+
+#Report name on the command line -> (dbOperations function, table headers)
+reportCommands = {
+    "pilot-flight-count": (reportPilotFlightCount, ["Pilot ID", "Pilot Name", "Count of Flights"]),
+    "pilot-workload": (reportPilotWorkloadByMonth, ["Month-Year", "Pilot Name", "Total Flights"]),
+    "busiest-terminal": (reportBusiestTerminal, ["Airport ID", "Terminal", "Total Traffic Count"]),
+    "busiest-terminal-by-period": (reportBusiestTerminalByPeriod, ["Period", "Airport ID", "Terminal", "Traffic Count"]),
+    "terminal-usage-split": (reportTerminalUsageSplit, ["Airport ID", "Terminal", "Departures", "Arrivals", "Diversions",
+                                                        "Total Traffic Count"]),
+    "pilot-punctuality": (reportPilotPunctuality, ["Pilot ID", "Pilot Name", "On-Time Departures", "Delayed Departures",
+                                                   "On-Time Arrivals", "Delayed Arrivals"]),
+    "flight-punctuality": (reportFlightPunctuality, ["Flight ID", "Scheduled Departure", "Departure Status", "Arrival Status",
+                                                     "Departure Delay (min)", "Arrival Delay (min)"]),
+    "timeframe": (reportByTimeframe, ["Flight", "Departure", "Status"]),
+}
+
+"""
+Writes records to stdout as a table (the same layout as the menus), a JSON array or CSV with a header row.
+records may be a generator; rows are written as they arrive, so streamed listings are never held in memory.
+The table uses the display headers, JSON and CSV use the record field names.
+"""
+def writeRecords(records, headers, outputFormat):
+    fieldNames = None
+    rowCount = 0
+    writer = csv.writer(sys.stdout) if outputFormat == "csv" else None
+    for record in records:
+        if fieldNames is None:
+            fieldNames = record._fields
+            if outputFormat == "table":
+                header = " | ".join(headers or fieldNames)
+                print(f"\n{header}")
+                print("-" * len(header))
+            elif outputFormat == "json":
+                sys.stdout.write("[\n")
+            else:
+                writer.writerow(fieldNames)
+
+        if outputFormat == "table":
+            print(" | ".join(str(item) for item in record))
+        elif outputFormat == "json":
+            sys.stdout.write((",\n" if rowCount else "") + "  " + json.dumps(record._asdict()))
+        else:
+            writer.writerow(record)
+        rowCount += 1
+
+    if outputFormat == "json":
+        sys.stdout.write("\n]\n" if rowCount else "[]\n")
+    elif outputFormat == "table" and rowCount == 0:
+        print("\nNo results found.")
+    return rowCount
+
+#Reads repeated --set attribute=value options into (attribute, value) pairs; an empty value stores NULL
+def parseAssignments(assignments):
+    changes = []
+    for assignment in assignments:
+        attribute, separator, value = assignment.partition("=")
+        if not separator or not attribute.strip():
+            raise ValueError(f"--set expects attribute=value, got '{assignment}'")
+        changes.append((attribute.strip(), value.strip() or None))
+    return changes
+
+#Accepts YYYY-MM-DD (covering the whole day) or a full YYYY-MM-DD HH:MM:SS timestamp
+def toTimestamp(value, endOfDay=False):
+    value = value.strip()
+    if len(value) == 10:
+        return value + (" 23:59:59" if endOfDay else " 00:00:00")
+    return value
+
+"""
+Builds the argument parser for every headless command.
+"""
+def buildCommandParser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Flight Management System. "
+                                     "Run without arguments for the interactive menus.")
+    parser.add_argument("--timings", action="store_true", help="write the time each operation took to stderr")
+    parser.add_argument("--slow-log", help="log operations slower than --slow-ms to this file")
+    parser.add_argument("--slow-ms", type=float, default=defaultSlowQueryMs,
+                        help=f"slow-query threshold in milliseconds (default: {defaultSlowQueryMs})")
+    parser.add_argument("--explain", action="store_true", help="add query plans to the slow-query log")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    #Output options shared by every command that lists records
+    outputOptions = argparse.ArgumentParser(add_help=False)
+    outputOptions.add_argument("--format", choices=outputFormats, default="table", help="output format (default: table)")
+
+    #flights ...
+    flights = commands.add_parser("flights", aliases=["flight"], help="list and manage flights")
+    flightCommands = flights.add_subparsers(dest="action", required=True)
+
+    flightList = flightCommands.add_parser("list", parents=[outputOptions], help="list flights")
+    flightFilter = flightList.add_mutually_exclusive_group()
+    flightFilter.add_argument("--status", choices=allowedFlightStatus, help="only flights with this status")
+    flightFilter.add_argument("--destination", help="only flights arriving at this destination ID")
+    flightFilter.add_argument("--unassigned", action="store_true", help="only scheduled flights missing crew")
+    flightList.add_argument("--columns", default="all", help="comma-separated flight attributes (default: all)")
+    flightList.add_argument("--order-by", default="scheduledDepartureDateTime", help="attribute to sort by")
+    flightList.add_argument("--direction", choices=["ASC", "DESC"], default="ASC", type=str.upper)
+    flightList.add_argument("--limit", type=int, help="stop after this many flights")
+
+    flightAdd = flightCommands.add_parser("add", parents=[outputOptions], help="add a flight")
+    for attribute in flightAttributeList:
+        flightAdd.add_argument(f"--{attribute}", required=attribute in requiredFlightAttributes,
+                               help=attributeGuidance["flight"].get(attribute))
+
+    flightUpdate = flightCommands.add_parser("update", help="change attributes of one flight")
+    flightUpdate.add_argument("flightID")
+    flightUpdate.add_argument("scheduledDeparture", help="YYYY-MM-DD HH:MM:SS")
+    flightUpdate.add_argument("--set", action="append", required=True, metavar="ATTRIBUTE=VALUE",
+                              help="attribute to change; repeat for several")
+
+    flightDelete = flightCommands.add_parser("delete", help="delete one flight")
+    flightDelete.add_argument("flightID")
+    flightDelete.add_argument("scheduledDeparture", help="YYYY-MM-DD HH:MM:SS")
+
+    #pilot ...
+    pilots = commands.add_parser("pilot", aliases=["pilots"], help="list and manage pilots")
+    pilotCommands = pilots.add_subparsers(dest="action", required=True)
+
+    pilotCommands.add_parser("list", parents=[outputOptions], help="list all pilots")
+    pilotCommands.add_parser("schedules", parents=[outputOptions], help="flights each pilot is assigned to")
+
+    pilotAvailable = pilotCommands.add_parser("available", parents=[outputOptions],
+                                              help="pilots with no flight overlapping a time period")
+    pilotAvailable.add_argument("--start", required=True, help="YYYY-MM-DD HH:MM:SS")
+    pilotAvailable.add_argument("--end", required=True, help="YYYY-MM-DD HH:MM:SS")
+    pilotCommands.add_parser("available-for-unassigned", parents=[outputOptions],
+                             help="free, qualified pilots for every scheduled flight missing crew")
+
+    pilotAdd = pilotCommands.add_parser("add", parents=[outputOptions], help="add a pilot")
+    pilotAdd.add_argument("--name", required=True)
+    pilotAdd.add_argument("--email", required=True)
+    pilotAdd.add_argument("--dob", required=True, help="YYYY-MM-DD")
+    pilotAdd.add_argument("--captain", type=int, choices=[0, 1], default=0, help="captain qualified (0/1)")
+    pilotAdd.add_argument("--first-officer", type=int, choices=[0, 1], default=0, help="first officer qualified (0/1)")
+
+    pilotAssign = pilotCommands.add_parser("assign", help="assign a pilot to a scheduled flight")
+    pilotAssign.add_argument("flightID")
+    pilotAssign.add_argument("scheduledDeparture", help="YYYY-MM-DD HH:MM:SS")
+    pilotAssign.add_argument("pilotID", type=int)
+    pilotAssign.add_argument("--role", choices=["captain", "first-officer"], required=True)
+
+    pilotRoster = pilotCommands.add_parser("auto-roster", parents=[outputOptions],
+                                           help="fill every empty crew seat on scheduled flights departing in a window")
+    pilotRoster.add_argument("--start", required=True, help="YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
+    pilotRoster.add_argument("--end", required=True, help="YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
+    pilotRoster.add_argument("--turnaround", type=int, default=defaultTurnaroundMinutes,
+                             help=f"minimum minutes between a pilot's arrival and next departure (default: {defaultTurnaroundMinutes})")
+    pilotRoster.add_argument("--apply", action="store_true", help="make the assignments (default: preview only)")
+
+    pilotUpdate = pilotCommands.add_parser("update", help="change details of one pilot")
+    pilotUpdate.add_argument("pilotID", type=int)
+    pilotUpdate.add_argument("pilotName", help="current name, to confirm the right pilot")
+    pilotUpdate.add_argument("--set", action="append", required=True, metavar="ATTRIBUTE=VALUE",
+                             help="attribute to change; repeat for several")
+
+    pilotDelete = pilotCommands.add_parser("delete", help="delete a pilot")
+    pilotDelete.add_argument("pilotID", type=int)
+
+    #report ...
+    reports = commands.add_parser("report", aliases=["reports"], help="run a report")
+    reportNames = reports.add_subparsers(dest="report", required=True)
+    for reportName in reportCommands:
+        reportParser = reportNames.add_parser(reportName, parents=[outputOptions])
+        if reportName == "timeframe":
+            reportParser.add_argument("--start", required=True, help="YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
+            reportParser.add_argument("--end", required=True, help="YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
+            reportParser.add_argument("--pilot", type=int, help="only flights crewed by this pilot ID")
+        if reportName == "busiest-terminal-by-period":
+            reportParser.add_argument("--period", choices=list(terminalUsagePeriods), default="day")
+            reportParser.add_argument("--start", default="0001-01-01", help="first day, YYYY-MM-DD")
+            reportParser.add_argument("--end", default="9999-12-31", help="last day, YYYY-MM-DD")
+    reportPack = reportNames.add_parser("pack", help="run several reports at once on one snapshot of the data")
+    reportPack.add_argument("--reports", help=f"comma-separated report names (default: {','.join(packReports)})")
+    reportPack.add_argument("--workers", type=int, default=defaultPackWorkers,
+                            help=f"reports run at once (default: {defaultPackWorkers})")
+    reportPack.add_argument("--format", choices=["table", "json"], default="table", help="output format (default: table)")
+    return parser
+
+"""
+Runs one parsed command and returns its exit code.
+"""
+def runFlightCommand(options):
+    if options.action == "list":
+        selectedAttributes = flightAttributeList if options.columns.lower() == "all" else options.columns.split(",")
+        if options.status:
+            records = viewFlightsByCriteria("flightStatus", (options.status,), selectedAttributes)
+        elif options.destination:
+            records = viewFlightsByCriteria("arrivalDestination", (options.destination.upper(),), selectedAttributes)
+        elif options.unassigned:
+            records = viewFlightsByCriteria("unassigned", (), selectedAttributes)
+        else:
+            records = streamFlights(selectedAttributes, options.order_by, options.direction)
+        if options.limit is not None:
+            records = itertools.islice(records, options.limit)
+        writeRecords(records, None, options.format)
+        return exitSuccess
+
+    if options.action == "add":
+        values = tuple(getattr(options, attribute) for attribute in flightAttributeList)
+        writeRecords([addFlight(values)], None, options.format)
+        return exitSuccess
+
+    if options.action == "update":
+        #Every change is checked first, then all are applied in one UPDATE, so a bad value changes nothing
+        if not updateFlightDetails(options.flightID, options.scheduledDeparture, parseAssignments(options.set)):
+            print("No record found matching selected Flight ID and Departure Time.", file=sys.stderr)
+            return exitNotFound
+        print(f"Flight {options.flightID} {options.scheduledDeparture} updated.")
+        return exitSuccess
+
+    if options.action == "delete":
+        if not deleteFlightRecord(options.flightID, options.scheduledDeparture):
+            print("No record found matching those details - nothing has been deleted.", file=sys.stderr)
+            return exitNotFound
+        print(f"Flight {options.flightID} scheduled for {options.scheduledDeparture} has been deleted.")
+        return exitSuccess
+
+def runPilotCommand(options):
+    if options.action == "list":
+        writeRecords(viewAllPilots(), ["ID", "Name", "Email", "DOB", "Captain", "First Officer"], options.format)
+        return exitSuccess
+
+    if options.action == "schedules":
+        writeRecords(viewPilotSchedules(), ["Pilot ID", "Name", "Flight", "Departure", "Arrival ", "Departing From",
+                                            "Arriving To", "Role"], options.format)
+        return exitSuccess
+
+    if options.action == "available":
+        writeRecords(viewAvailablePilots(options.start, options.end),
+                     ["Pilot ID", "Name", "Email", "Captain", "First Officer"], options.format)
+        return exitSuccess
+
+    if options.action == "available-for-unassigned":
+        writeRecords(viewAvailablePilotsForUnassignedFlights(),
+                     ["Flight", "Departure", "Arrival", "Pilot ID", "Name", "Captain", "First Officer"], options.format)
+        return exitSuccess
+
+    if options.action == "add":
+        newPilot = addPilot((options.name, options.email, options.dob, options.captain, options.first_officer))
+        writeRecords([newPilot], None, options.format)
+        return exitSuccess
+
+    if options.action == "assign":
+        role = "captainID" if options.role == "captain" else "firstOfficerID"
+        if not assignPilotToFlight(options.flightID, options.scheduledDeparture, options.pilotID, role):
+            print("Assignment failed. Either flight does not exist or flight has already departed or has been cancelled.",
+                  file=sys.stderr)
+            return exitNotFound
+        print(f"Pilot {options.pilotID} assigned as {role[:-2]} to flight {options.flightID} "
+              f"departure {options.scheduledDeparture}.")
+        return exitSuccess
+
+    if options.action == "auto-roster":
+        plan = autoRosterFlights(toTimestamp(options.start), toTimestamp(options.end, endOfDay=True),
+                                 options.turnaround, options.apply)
+        writeRecords(plan.assignments, rosterHeaders, options.format)
+        print(f"{len(plan.assignments)} seat(s) {'filled' if plan.applied else 'can be filled'}, "
+              f"{len(plan.unfilled)} with no free qualified pilot."
+              + ("" if plan.applied else " Preview only: add --apply to make these assignments."), file=sys.stderr)
+        return exitSuccess
+
+    if options.action == "update":
+        #Every change is checked first, then all are applied in one UPDATE keyed on the current name
+        if not updatePilotAttributes(options.pilotID, options.pilotName, parseAssignments(options.set)):
+            print("No match found for pilot ID and name combination.", file=sys.stderr)
+            return exitNotFound
+        print(f"Pilot {options.pilotID} has been updated.")
+        return exitSuccess
+
+    if options.action == "delete":
+        if not deletePilotRecord(options.pilotID):
+            print(f"No record found for Pilot ID {options.pilotID} - nothing has been deleted.", file=sys.stderr)
+            return exitNotFound
+        print(f"Pilot with ID no. {options.pilotID} has been successfully deleted.")
+        return exitSuccess
+
+def runReportCommand(options):
+    if options.report == "pack":
+        return runReportPackCommand(options)
+    report, headers = reportCommands[options.report]
+    if options.report == "timeframe":
+        records = report(toTimestamp(options.start), toTimestamp(options.end, endOfDay=True), options.pilot)
+    elif options.report == "busiest-terminal-by-period":
+        records = report(options.period, options.start, options.end)
+    else:
+        records = report()
+    writeRecords(records, headers, options.format)
+    return exitSuccess
+
+#Writes every report in the pack, then the timings; a report that failed gives exitDatabaseError
+def runReportPackCommand(options):
+    reportNames = [reportName.strip() for reportName in options.reports.split(",")] if options.reports else None
+    pack = runReportPack(reportNames, options.workers)
+    if options.format == "json":
+        json.dump({"reports": {reportName: [record._asdict() for record in records]
+                               for reportName, records in pack.results.items()},
+                   "timings": [timing._asdict() for timing in pack.timings],
+                   "wallSeconds": round(pack.wallSeconds, 3)}, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for reportName, records in pack.results.items():
+            print(f"\nReport: {reportName}")
+            writeRecords(records, reportCommands[reportName][1], "table")
+        printPackTimings(pack)
+    failedReports = [timing for timing in pack.timings if timing.error]
+    for timing in failedReports:
+        print(f"Report {timing.report} failed: {timing.error}", file=sys.stderr)
+    return exitDatabaseError if failedReports else exitSuccess
+
+commandHandlers = {
+    "flights": runFlightCommand, "flight": runFlightCommand,
+    "pilot": runPilotCommand, "pilots": runPilotCommand,
+    "report": runReportCommand, "reports": runReportCommand,
+}
+
+#Writes the instrumentation summary to stderr, so it never ends up in CSV or JSON output
+def printOperationTimings():
+    with redirect_stdout(sys.stderr):
+        printTableOfResults(getOperationSummary(), operationSummaryHeaders)
+
+"""
+Entry point for headless mode: parses args, runs the command and returns the exit code.
+Errors are written to stderr rather than stdout so they never end up in CSV or JSON output.
+"""
+def runCommand(args):
+    options = buildCommandParser().parse_args(args)
+    try:
+        if options.timings or options.slow_log:
+            enableInstrumentation(options.slow_ms, options.slow_log, options.explain)
+        try:
+            return commandHandlers[options.command](options)
+        finally:
+            if options.timings:
+                printOperationTimings()
+    except AssignmentConflict as e:
+        print(f"Assignment refused: {e}", file=sys.stderr)
+        return exitConflict
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return exitUsageError
+    except sqlite3.Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return exitDatabaseError
+
 if __name__ == "__main__":
+    #With arguments, run one command headlessly; without, start the interactive menus
+    if len(sys.argv) > 1:
+        sys.exit(runCommand(sys.argv[1:]))
     main()